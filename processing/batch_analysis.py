@@ -0,0 +1,313 @@
+"""Kayıtlı görüntüler için başsız toplu analiz (arşiv denetimi).
+
+Örnekler:
+    python batch_analysis.py kayit1.mp4 kayit2.mp4 --fps 2 --workers 4
+    python batch_analysis.py arsiv/*.mp4 --polygon danger_zone.json --zones zones.json --output rapor
+
+Kayıtlar `--chunk-seconds` uzunluğunda parçalara bölünür ve süreç havuzunda
+işlenir. Her parçada saniyede `--fps` kare örneklenir (kısa aralıklar grab()
+ile atlanır, uzun aralıklarda arama yapılır). Biten her parçanın sonucu
+`<output>/chunks/` altına yazılır; yarıda kalan çalışma aynı komutla
+kaldığı yerden devam eder (ayarlar değiştiyse `manifest.json` devam etmeyi
+reddeder). Kişi takibi örnekleme hızına göre ölçeklenir. Sonunda birleşik ihlal zaman çizelgesi
+(`timeline.csv`, `events.jsonl`) ve özet rapor (`summary.json`) üretilir.
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+FRAME_SIZE = (854, 480)
+LIVE_FPS = 15.0  # PersonTracker varsayılanlarının ayarlandığı canlı kare hızı
+
+# Süreç başına bir işlemci (model her parçada yeniden yüklenmez)
+_processor = None
+
+
+def probe(path):
+    """Videonun (fps, kare sayısı, süre sn) bilgisini döndürür."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Video açılamadı: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return fps, frame_count, frame_count / fps
+
+
+def _short_hash(value):
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()[:10]
+
+
+def plan_chunks(paths, chunk_seconds):
+    """Kayıtları zaman parçalarına böler: [{id, file, start, end}].
+
+    Kimlik tam yolun özetini içerir: farklı klasörlerdeki aynı isimli kayıtlar çakışmaz.
+    """
+    tasks = []
+    for path in paths:
+        _, _, duration = probe(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        path_key = _short_hash(os.path.abspath(path))
+        start, index = 0.0, 0
+        while start < duration:
+            end = min(start + chunk_seconds, duration)
+            tasks.append({"id": f"{name}_{path_key}_{index:05d}", "file": path, "start": start, "end": end})
+            start, index = end, index + 1
+    return tasks
+
+
+def tracker_for_sample_rate(fps, live_fps=LIVE_FPS):
+    """PersonTracker'ı örnekleme hızına ölçekler.
+
+    Varsayılanlar canlı kare hızına göre: 2 fps'de kareler arası hareket büyük
+    olduğundan IoU eşiği düşürülür, ihlal onayı ve iz kaybı süresi saniye
+    cinsinden korunur, KKD yumuşatması kare başına güçlendirilir.
+    """
+    from modules.person_tracker import PersonTracker
+
+    ratio = min(1.0, fps / live_fps)
+    defaults = PersonTracker()
+    return PersonTracker(
+        iou_threshold=max(0.1, defaults.iou_threshold * min(1.0, fps / 10.0)),
+        max_missed=max(2, round(defaults.max_missed * ratio)),
+        smoothing=1 - (1 - defaults.smoothing) ** (1 / ratio),
+        ppe_threshold=defaults.ppe_threshold,
+        confirm_frames=max(1, round(defaults.confirm_frames * ratio)))
+
+
+def _init_worker(options):
+    """Süreç havuzu başlatıcısı: işlemciyi bir kez oluşturur."""
+    global _processor
+    from guardian_processor import GuardianProcessor
+
+    _processor = GuardianProcessor(options["model"], detector_options=options["detector_options"])
+    _processor.person_tracker = tracker_for_sample_rate(options["fps"])
+    _processor.set_headless(True)
+    if options["zones"] and os.path.exists(options["zones"]):
+        _processor.load_zones(options["zones"])
+    if options["pose"]:
+        _processor.set_pose_verification(True)
+
+
+def sample_frames(path, start, end, fps):
+    """[start, end) aralığından saniyede `fps` kare örnekler; (video zamanı, kare) üretir."""
+    cap = cv2.VideoCapture(path)
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    # Bu kadar kareden kısa atlamalarda arama yerine grab() daha ucuz (anahtar kareye dönüş yok)
+    max_grab = int(source_fps * 2)
+    position = None
+    try:
+        t = start
+        while t < end:
+            target = int(round(t * source_fps))
+            if position is None or target < position or target - position > max_grab:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                position = target
+            while position < target:
+                cap.grab()
+                position += 1
+            success, frame = cap.read()
+            if not success:
+                break
+            position += 1
+            if (frame.shape[1], frame.shape[0]) != FRAME_SIZE:
+                frame = cv2.resize(frame, FRAME_SIZE)
+            yield target / source_fps, frame
+            t += 1.0 / fps
+    finally:
+        cap.release()
+
+
+def process_chunk(task, options):
+    """Bir parçayı işler ve sonucu sözlük olarak döndürür (işçi süreçte çalışır)."""
+    from modules.events import EventBuilder
+
+    processor = _processor
+    # Parçalar birbirinden bağımsız: takip durumları sıfırlanır
+    processor.person_tracker.reset()
+    processor.box_tracker.reset()
+    processor.pose_verifier.reset()
+    processor.prev_motion_gray = None
+    builder = EventBuilder()
+    polygon = options["polygon"]
+
+    events = []
+    risk_seconds = {}
+    frames = 0
+    started = time.time()
+    for video_time, frame in sample_frames(task["file"], task["start"], task["end"], options["fps"]):
+        _, data = processor.process_frame(frame, polygon)
+        frames += 1
+        risk_seconds[data["risk_level"]] = risk_seconds.get(data["risk_level"], 0.0) + 1.0 / options["fps"]
+        for event in builder.update(data, timestamp=round(video_time, 3)):
+            event["file"] = task["file"]
+            events.append(event)
+
+    return dict(task, frames=frames, events=events, risk_seconds=risk_seconds,
+                processing_seconds=time.time() - started)
+
+
+def _write_json(path, data):
+    """JSON'u atomik yazar (yarım kalmış kontrol noktası oluşmaz)."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def merge_results(results, output_dir):
+    """Parça sonuçlarını birleşik zaman çizelgesi ve özet rapora dönüştürür."""
+    results = sorted(results, key=lambda r: (r["file"], r["start"]))
+    events = [event for result in results for event in result["events"]]
+
+    with open(os.path.join(output_dir, "events.jsonl"), 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    violations = [event for event in events if event["type"] == "violation"]
+    with open(os.path.join(output_dir, "timeline.csv"), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "video_time", "hh:mm:ss", "track_id", "zones", "missing_ppe", "severity", "box"])
+        for event in violations:
+            writer.writerow([event["file"], event["timestamp"], time.strftime("%H:%M:%S", time.gmtime(event["timestamp"])),
+                             event.get("track_id"), "|".join(event.get("zones", [])),
+                             "|".join(event.get("missing_ppe", [])), event.get("severity"), event.get("box")])
+
+    summary = {"files": {}}
+    for result in results:
+        entry = summary["files"].setdefault(result["file"], {
+            "analyzed_seconds": 0.0, "frames": 0, "processing_seconds": 0.0, "violations": 0,
+            "violations_by_zone": {}, "violations_by_ppe": {}, "risk_seconds": {}})
+        entry["analyzed_seconds"] += result["end"] - result["start"]
+        entry["frames"] += result["frames"]
+        entry["processing_seconds"] += result["processing_seconds"]
+        for level, seconds in result["risk_seconds"].items():
+            entry["risk_seconds"][level] = entry["risk_seconds"].get(level, 0.0) + seconds
+        for event in result["events"]:
+            if event["type"] != "violation":
+                continue
+            entry["violations"] += 1
+            for zone in event.get("zones", []):
+                entry["violations_by_zone"][zone] = entry["violations_by_zone"].get(zone, 0) + 1
+            for ppe in event.get("missing_ppe", []):
+                entry["violations_by_ppe"][ppe] = entry["violations_by_ppe"].get(ppe, 0) + 1
+    summary["total_violations"] = len(violations)
+    _write_json(os.path.join(output_dir, "summary.json"), summary)
+    return summary
+
+
+def run_fingerprint(options, chunk_seconds):
+    """Parça sonuçlarını etkileyen ayarların özeti (devam ederken uyumsuz parçalar karışmasın)."""
+    relevant = {key: options[key] for key in ("model", "detector_options", "zones", "pose", "polygon", "fps")}
+    relevant["chunk_seconds"] = chunk_seconds
+    return _short_hash(json.dumps(relevant, sort_keys=True, default=str))
+
+
+def check_manifest(output_dir, fingerprint, restart):
+    """Kontrol noktaları başka ayarlarla üretildiyse devam etmeyi reddeder. Uyumluysa True."""
+    path = os.path.join(output_dir, "manifest.json")
+    if os.path.exists(path) and not restart:
+        with open(path, 'r', encoding='utf-8') as f:
+            previous = json.load(f).get("fingerprint")
+        if previous != fingerprint:
+            print("❌ Bu klasördeki parçalar farklı ayarlarla (fps, parça süresi, poligon, model...) üretilmiş. "
+                  "--restart ile baştan başlayın veya farklı --output seçin.")
+            return False
+    _write_json(path, {"fingerprint": fingerprint})
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Kayıtlı görüntüler için toplu KKD/bölge analizi")
+    parser.add_argument("inputs", nargs="+", help="Video dosyaları (glob desteklenir)")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--backend", default="torch", choices=("torch", "onnxruntime", "openvino"))
+    parser.add_argument("--threads", type=int, default=1, help="İşçi başına çıkarım thread sayısı")
+    parser.add_argument("--fps", type=float, default=2.0, help="Saniyede analiz edilen kare")
+    parser.add_argument("--chunk-seconds", type=float, default=300.0, help="Parça uzunluğu")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--polygon", default="danger_zone.json", help="Tehlikeli alan poligonu")
+    parser.add_argument("--zones", default="zones.json", help="İsimli ek bölgeler")
+    parser.add_argument("--pose", action="store_true", help="Pose ile KKD doğrulama")
+    parser.add_argument("--output", default="batch_report", help="Rapor ve kontrol noktası klasörü")
+    parser.add_argument("--restart", action="store_true", help="Kontrol noktalarını yok say, baştan başla")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = sorted({path for pattern in args.inputs for path in (glob.glob(pattern) or [pattern])})
+    chunk_dir = os.path.join(args.output, "chunks")
+    os.makedirs(chunk_dir, exist_ok=True)
+
+    polygon = []
+    if args.polygon and os.path.exists(args.polygon):
+        with open(args.polygon, 'r') as f:
+            polygon = [tuple(p) for p in json.load(f)]
+
+    detector_options = {}
+    if args.backend != "torch":
+        detector_options = {"backend": args.backend, "threads": args.threads}
+    options = {"model": args.model, "detector_options": detector_options, "zones": args.zones,
+               "pose": args.pose, "polygon": polygon, "fps": args.fps}
+
+    if not check_manifest(args.output, run_fingerprint(options, args.chunk_seconds), args.restart):
+        return 1
+
+    tasks = plan_chunks(paths, args.chunk_seconds)
+    results = []
+    pending = []
+    for task in tasks:
+        chunk_file = os.path.join(chunk_dir, task["id"] + ".json")
+        if os.path.exists(chunk_file) and not args.restart:
+            with open(chunk_file, 'r', encoding='utf-8') as f:
+                results.append(json.load(f))
+        else:
+            pending.append(task)
+
+    total_seconds = sum(task["end"] - task["start"] for task in tasks)
+    print(f"🎞️ {len(paths)} kayıt, {total_seconds / 60:.1f} dk, {len(tasks)} parça "
+          f"({len(tasks) - len(pending)} tamamlanmış). {args.workers} işçi, {args.fps} fps örnekleme.")
+
+    started = time.time()
+    if pending:
+        context = multiprocessing.get_context("spawn")
+        try:
+            with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(options,)) as executor:
+                futures = {executor.submit(process_chunk, task, options): task for task in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    task = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ Parça başarısız: {task['id']} ({e})")
+                        continue
+                    _write_json(os.path.join(chunk_dir, task["id"] + ".json"), result)
+                    results.append(result)
+                    print(f"✓ {done}/{len(pending)} {task['id']}: {result['frames']} kare, "
+                          f"{sum(e['type'] == 'violation' for e in result['events'])} ihlal")
+        except KeyboardInterrupt:
+            print("\n⚠️ Durduruldu. Aynı komutla kaldığı yerden devam edebilirsiniz.")
+            return 1
+
+    summary = merge_results(results, args.output)
+    elapsed = time.time() - started
+    processed_seconds = sum(t["end"] - t["start"] for t in pending)
+    speed = f", gerçek zamanın {processed_seconds / elapsed:.1f} katı" if pending and elapsed > 0 else ""
+    print(f"\n📋 Toplam {summary['total_violations']} ihlal. Rapor: {args.output}/summary.json, "
+          f"zaman çizelgesi: {args.output}/timeline.csv{speed}")
+    return 0 if len(results) == len(tasks) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
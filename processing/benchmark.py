@@ -0,0 +1,365 @@
+"""Guardian işlem hattı için tekrarlanabilir performans ölçümü.
+
+Örnekler:
+    python benchmark.py                                  # sentetik kareler, sahte dedektör
+    python benchmark.py --source test1.mp4 --frames 300  # kayıtlı klip üzerinden
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --tolerance 0.25
+    python benchmark.py --stages batch --cameras 8 --zone-cropping
+
+Sahte dedektör (varsayılan) model ağırlığı veya GPU gerektirmez; her çağrıda
+sahnede yürüyen kişiler için deterministik kutular üretir. `--model best.pt`
+verilirse gerçek YOLO kullanılır. Her aşama ayrı bir süreçte ölçülür, böylece
+tepe RSS değeri aşamaya özgüdür. Referans dosyasına göre p95 gecikme veya
+verim tolerans dışına çıkarsa çıkış kodu 1 olur. Depodaki
+`benchmark_baseline.json` sahte dedektörle yapılan ölçüm için CI bütçesidir
+(tests/test_benchmark.py bununla karşılaştırır).
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from modules.box_tracker import TrackedBoxes, TrackedResults
+
+# Eğitilen modelin sınıf isimleri (best.pt ile aynı sıra)
+CLASS_NAMES = {0: 'Hardhat', 1: 'Mask', 2: 'NO-Hardhat', 3: 'NO-Mask', 4: 'NO-Safety Vest',
+               5: 'Person', 6: 'Safety Cone', 7: 'Safety Vest', 8: 'machinery', 9: 'vehicle'}
+
+STAGES = ("process_frame", "ppe_matching", "polygon_tracking", "zone_test", "batch")
+
+# Poligon ve ek bölgeler 854x480 referans karesine göre
+BENCH_POLYGON = [(250, 200), (600, 200), (650, 470), (200, 470)]
+BENCH_ZONES = [
+    {"name": "Pres", "polygon": [[20, 250], [180, 250], [180, 470], [20, 470]], "severity": "KRITIK"},
+    {"name": "Forklift", "polygon": [[650, 150], [840, 150], [840, 400], [650, 400]], "severity": "ORTA",
+     "required_ppe": ["Yelek"]},
+]
+
+
+class _StubModel:
+    """YOLO modelinin sadece `names` alanını taklit eder."""
+
+    def __init__(self, names):
+        self.names = names
+
+
+class StubDetector:
+    """Model yüklemeden YoloDetector arayüzünü sağlayan deterministik sahte dedektör.
+
+    Sahnede soldan sağa yürüyen kişiler, bazılarında baret/yelek kutuları üretir.
+    """
+
+    def __init__(self, num_persons=6, frame_size=(854, 480), seed=0):
+        self.model = _StubModel(CLASS_NAMES)
+        self.frame_size = frame_size
+        rng = np.random.default_rng(seed)
+        self.start_x = rng.uniform(0, frame_size[0], num_persons)
+        self.base_y = rng.uniform(frame_size[1] * 0.3, frame_size[1] * 0.6, num_persons)
+        self.speed = rng.uniform(1.0, 4.0, num_persons)
+        self.helmet = rng.random(num_persons) > 0.3
+        self.vest = rng.random(num_persons) > 0.3
+        self.calls = 0
+
+    def _detections(self):
+        width, height = self.frame_size
+        xyxy, cls, conf = [], [], []
+        for i in range(len(self.start_x)):
+            x = (self.start_x[i] + self.speed[i] * self.calls) % (width - 60)
+            y = self.base_y[i]
+            person = [x, y, x + 60, min(y + 160, height - 1)]
+            xyxy.append(person)
+            cls.append(5)
+            conf.append(0.85)
+            if self.helmet[i]:
+                xyxy.append([x + 15, y, x + 45, y + 25])
+                cls.append(0)
+                conf.append(0.7)
+            else:
+                xyxy.append([x + 15, y, x + 45, y + 25])
+                cls.append(2)
+                conf.append(0.6)
+            if self.vest[i]:
+                xyxy.append([x + 5, y + 40, x + 55, y + 100])
+                cls.append(7)
+                conf.append(0.65)
+        self.calls += 1
+        return (np.array(xyxy, dtype=np.float32).reshape(-1, 4),
+                np.array(cls, dtype=np.float32),
+                np.array(conf, dtype=np.float32))
+
+    def detect_objects(self, frame, imgsz=None):
+        """YoloDetector.detect_objects ile aynı arayüz (imgsz yok sayılır)."""
+        xyxy, cls, conf = self._detections()
+        return TrackedResults(TrackedBoxes(xyxy, cls, conf), self.model.names, frame)
+
+    def detect_objects_batch(self, frames, imgsz=None):
+        """YoloDetector.detect_objects_batch ile aynı arayüz (imgsz yok sayılır)."""
+        return [self.detect_objects(frame) for frame in frames]
+
+    def detect_regions_batch(self, frames, regions, imgsz=None):
+        """YoloDetector.detect_regions_batch ile aynı arayüz: merkezi bölgeler dışında kalan kutular atılır."""
+        results = self.detect_objects_batch(frames, imgsz)
+        for i, frame_regions in enumerate(regions):
+            if frame_regions is None:
+                continue
+            boxes = results[i].boxes
+            centers = (boxes.xyxy[:, 0:2] + boxes.xyxy[:, 2:4]) / 2
+            keep = np.zeros(len(centers), dtype=bool)
+            for x1, y1, x2, y2 in frame_regions:
+                keep |= ((centers[:, 0] >= x1) & (centers[:, 0] < x2) &
+                         (centers[:, 1] >= y1) & (centers[:, 1] < y2))
+            results[i] = TrackedResults(TrackedBoxes(boxes.xyxy[keep], boxes.cls[keep], boxes.conf[keep]),
+                                        self.model.names, frames[i])
+        return results
+
+
+def synthetic_frames(count, frame_size=(854, 480), seed=0):
+    """Hafif kamera titremesi olan dokulu sentetik kareler üretir (ORB/LK için yeterli özellik)."""
+    width, height = frame_size
+    rng = np.random.default_rng(seed)
+    margin = 16
+    texture = rng.integers(0, 255, (height // 4 + margin, width // 4 + margin, 3), dtype=np.uint8)
+    texture = cv2.resize(texture, (width + 4 * margin, height + 4 * margin), interpolation=cv2.INTER_NEAREST)
+    texture = cv2.GaussianBlur(texture, (3, 3), 0)
+
+    frames = []
+    for i in range(count):
+        dx = int(margin + margin * np.sin(i / 15.0))
+        dy = int(margin + margin * np.cos(i / 20.0) / 2)
+        frames.append(np.ascontiguousarray(texture[dy:dy + height, dx:dx + width]))
+    return frames
+
+
+def load_frames(source, count, frame_size):
+    """Kayıtlı klipten (başa sarmadan) en fazla `count` kare okur."""
+    from modules.frame_source import open_frame_source
+
+    frame_source = open_frame_source(source, frame_size, loop=False, buffer_count=2)
+    frames = []
+    try:
+        while len(frames) < count:
+            success, frame = frame_source.read()
+            if not success:
+                break
+            frames.append(frame.copy())
+    finally:
+        frame_source.release()
+    if not frames:
+        raise RuntimeError(f"Klipten kare okunamadı: {source}")
+    return frames
+
+
+def peak_rss_mb():
+    """Sürecin tepe bellek kullanımı (MB)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta byte
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _make_processor(options, detector=None):
+    """Sahte veya gerçek dedektörle, kanıt kaydı kapalı bir işlemci oluşturur (detector: paylaşılan dedektör)."""
+    from guardian_processor import GuardianProcessor
+    from modules.danger_zones import DangerZone
+
+    if detector is not None:
+        processor = GuardianProcessor(options["model"], yolo_detector=detector)
+    elif options["model"]:
+        processor = GuardianProcessor(options["model"], detector_options={"backend": options["backend"]})
+    else:
+        stub = StubDetector(options["persons"], options["frame_size"], options["seed"])
+        processor = GuardianProcessor(None, yolo_detector=stub)
+    processor.set_headless(options["headless"])
+    processor.set_detection_interval(options["detection_interval"])
+    if options.get("zone_cropping"):
+        processor.set_zone_cropping(True)
+    processor.zone_set.set_zones([DangerZone(z["name"], z["polygon"], z.get("severity", "KRITIK"),
+                                             z.get("required_ppe", ("Baret", "Yelek")))
+                                  for z in BENCH_ZONES])
+    return processor
+
+
+def _run_stage(stage, options):
+    """Tek bir aşamayı (ayrı süreçte) ölçer ve sonuçları sözlük olarak döndürür."""
+    from guardian_processor import process_batch
+
+    if options["source"]:
+        frames = load_frames(options["source"], options["frames"], options["frame_size"])
+    else:
+        frames = synthetic_frames(options["frames"], options["frame_size"], options["seed"])
+    processor = _make_processor(options)
+    detector = processor.yolo_detector
+    warmup = min(options["warmup"], len(frames) // 2)
+
+    # Aşama girdileri (ölçüm dışında hazırlanır)
+    processors = [processor]
+    if stage == "batch":
+        # Çoklu kamera/işçi modundaki gibi aynı dedektörü paylaşan işlemciler
+        processors += [_make_processor(options, detector) for _ in range(options.get("cameras", 4) - 1)]
+    detections = ([detector.detect_objects(frame) for frame in frames]
+                  if stage not in ("process_frame", "batch") else None)
+    if stage == "polygon_tracking":
+        processor.start_tracking(frames[0], BENCH_POLYGON)
+    if stage == "zone_test":
+        tables = [processor._match_ppe_to_person(result, frame.shape)
+                  for result, frame in zip(detections, frames)]
+
+    def run(i):
+        frame = frames[i]
+        if stage == "process_frame":
+            processor.process_frame(frame, BENCH_POLYGON)
+        elif stage == "batch":
+            process_batch(detector, processors, [frame] * len(processors), [BENCH_POLYGON] * len(processors))
+        elif stage == "ppe_matching":
+            processor._match_ppe_to_person(detections[i], frame.shape)
+        elif stage == "polygon_tracking":
+            processor._update_polygon_tracking(frame, processor._match_ppe_to_person(detections[i], frame.shape).boxes)
+        elif stage == "zone_test":
+            # Poligon her karede biraz kayar: önbelleği değil raster yeniden çizimini de ölçer
+            shift = i % 3
+            polygon = [(x + shift, y) for x, y in BENCH_POLYGON]
+            processor.zone_set.update(polygon, None, frame.shape)
+            masks = processor.zone_set.query(tables[i].feet)
+            for mask in masks:
+                processor.zone_set.zones_for(mask)
+
+    for i in range(warmup):
+        run(i)
+
+    latencies = []
+    total_start = time.perf_counter()
+    for i in range(warmup, len(frames)):
+        start = time.perf_counter()
+        run(i)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    total = time.perf_counter() - total_start
+    for stage_processor in processors:
+        stage_processor.close()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "frames": len(latencies),
+        "throughput_fps": len(latencies) / total if total > 0 else 0.0,
+        "mean_ms": float(np.mean(latencies)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_benchmarks(options, stages=STAGES, isolate=True):
+    """Aşamaları sırayla ölçer; isolate=True ise her aşama yeni bir süreçte çalışır."""
+    results = {}
+    for stage in stages:
+        print(f"⏱️ {stage} ölçülüyor...")
+        if isolate:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[stage] = executor.submit(_run_stage, stage, options).result()
+        else:
+            results[stage] = _run_stage(stage, options)
+    return results
+
+
+def print_results(results):
+    """Sonuçları tablo halinde yazdırır."""
+    print(f"\n{'Aşama':<18}{'FPS':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>10}")
+    for stage, r in results.items():
+        print(f"{stage:<18}{r['throughput_fps']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['peak_rss_mb']:>10.1f}")
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Referansa göre gerilemeleri bulur; (aşama, metrik, referans, şimdiki) listesi döndürür."""
+    regressions = []
+    for stage, current in results.items():
+        reference = baseline.get("stages", {}).get(stage)
+        if reference is None:
+            continue
+        if current["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append((stage, "p95_ms", reference["p95_ms"], current["p95_ms"]))
+        if current["throughput_fps"] < reference["throughput_fps"] * (1 - tolerance):
+            regressions.append((stage, "throughput_fps", reference["throughput_fps"], current["throughput_fps"]))
+        if current["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append((stage, "peak_rss_mb", reference["peak_rss_mb"], current["peak_rss_mb"]))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Guardian işlem hattı performans ölçümü")
+    parser.add_argument("--source", help="Kayıtlı klip (yoksa sentetik kareler)")
+    parser.add_argument("--model", help="Gerçek YOLO modeli (yoksa sahte dedektör)")
+    parser.add_argument("--backend", default="torch", choices=("torch", "onnxruntime", "openvino"),
+                        help="Gerçek model için çıkarım arka ucu")
+    parser.add_argument("--frames", type=int, default=300, help="Aşama başına kare sayısı")
+    parser.add_argument("--warmup", type=int, default=20, help="Ölçüme katılmayan ısınma karesi")
+    parser.add_argument("--persons", type=int, default=6, help="Sahte dedektördeki kişi sayısı")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--detection-interval", type=int, default=1)
+    parser.add_argument("--zone-cropping", action="store_true", help="YOLO'yu sadece bölgelerin çevresinde çalıştır")
+    parser.add_argument("--cameras", type=int, default=4, help="batch aşamasındaki kamera sayısı")
+    parser.add_argument("--headless", action="store_true", help="Çizim yapmadan ölç")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--no-isolate", action="store_true", help="Aşamaları aynı süreçte çalıştır")
+    parser.add_argument("--baseline", help="Karşılaştırılacak referans JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="İzin verilen göreli gerileme")
+    parser.add_argument("--save-baseline", help="Sonuçları referans JSON olarak kaydet")
+    parser.add_argument("--output", help="Sonuçları JSON olarak kaydet")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {
+        "source": args.source,
+        "model": args.model,
+        "backend": args.backend,
+        "frames": args.frames,
+        "warmup": args.warmup,
+        "persons": args.persons,
+        "seed": args.seed,
+        "detection_interval": args.detection_interval,
+        "zone_cropping": args.zone_cropping,
+        "cameras": args.cameras,
+        "headless": args.headless,
+        "frame_size": (854, 480),
+    }
+
+    results = run_benchmarks(options, args.stages, isolate=not args.no_isolate)
+    print_results(results)
+
+    report = {
+        "options": {k: v for k, v in options.items() if k != "frame_size"},
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor(), "opencv": cv2.__version__},
+        "stages": results,
+    }
+    for filename in (args.output, args.save_baseline):
+        if filename:
+            with open(filename, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Sonuçlar kaydedildi: {filename}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ PERFORMANS GERİLEMESİ (tolerans %{args.tolerance * 100:.0f}):")
+            for stage, metric, reference, current in regressions:
+                print(f"   {stage}.{metric}: referans {reference:.2f} -> şimdi {current:.2f}")
+            return 1
+        print(f"\n✅ Referansa göre gerileme yok (tolerans %{args.tolerance * 100:.0f}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,134 @@
 import cv2
 import numpy as np
 import os
+import time
 from datetime import datetime
 from modules.object_detector import YoloDetector
-from modules.pose_estimator import PoseEstimator
+from modules.box_tracker import BoxTracker, TrackedBoxes, TrackedResults, iou_matrix, to_numpy
+from modules.ppe_assignment import assign_ppe
+from modules.evidence_writer import EvidenceWriter
+from modules.zone_tracker import ZoneTracker
+from modules.danger_zones import ZoneSet, SEVERITY_ORDER, load_zones
+from modules.frame_buffers import FrameBuffers
+from modules.metrics import MetricsRegistry
+from modules.person_tracker import PersonTracker
+from modules.motion_gate import MotionGate
+from modules.zone_crop import zone_crop_region, tile_region
+from modules.pose_verifier import PoseVerifier
+from modules.events import EventBuilder
+from modules.frame_record import FrameRecord
+from modules.quality_controller import batch_inference_size
 
 class GuardianProcessor:
     """Tüm analiz modüllerini (YOLO, MediaPipe) yöneten orkestra şefi sınıfı."""
     
-    def __init__(self, yolo_model_path):
-        self.yolo_detector = YoloDetector(yolo_model_path)
-        self.pose_estimator = PoseEstimator()
-        self.check_landmark_id = self.pose_estimator.mp_pose.PoseLandmark.LEFT_ANKLE
-        self.yolo_class_names = self.yolo_detector.model.names
+    def __init__(self, yolo_model_path, yolo_detector=None, camera_id=None, metrics=None,
+                 detector_options=None):
+        # Modeller ilk kullanıldıklarında yüklenir (hızlı açılış, kullanılmayan modül belleğe girmez).
+        # Çoklu kamera modunda model bir kez yüklenir ve tüm işlemciler paylaşır.
+        self.yolo_model_path = yolo_model_path
+        self.detector_options = detector_options or {}
+        self._yolo_detector = yolo_detector
+        self._pose_estimator = None
+        self._class_ids = None
+        self.camera_id = camera_id
+        # Aşama süreleri (p50/p95/p99), FPS ve sayaçlar; kameralar arasında paylaşılabilir
+        self.metrics = metrics or MetricsRegistry()
+        self.ppe_assignment_mode = "greedy"  # "greedy" veya "hungarian" (scipy gerekir)
         
         # Fotoğraf kaydı için sayaç/zamanlayıcı
         self.last_save_time = 0
         if not os.path.exists("violations"):
             os.makedirs("violations")
+        # Kayıtlar arka planda yazılır, process_frame diske beklemez
+        self.evidence_writer = EvidenceWriter(jpeg_quality=90)
         
-        # --- Takip Değişkenleri (Güçlendirilmiş) ---
-        self.orb = cv2.ORB_create(nfeatures=2000)
-        self.bf_matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        self.reference_frame = None
-        self.reference_keypoints = None
-        self.reference_descriptors = None
+        # --- Takip Değişkenleri (Önbellekli homografi + optik akış) ---
+        self.zone_tracker = ZoneTracker(nfeatures=2000)
         self.original_polygon = None
         self.tracking_enabled = False
+        self.last_person_boxes = None  # Takip maskesi için son karedeki kişi kutuları
+        
+        # --- Tehlikeli Bölgeler (çizilen ana alan + dosyadan gelen isimli bölgeler) ---
+        self.zone_set = ZoneSet()
+        
+        # --- Kare Tamponları (gri/RGB dönüşümleri karede bir kez, çizim tamponu halkadan) ---
+        self.buffers = FrameBuffers()
+        self.frame_seq = 0          # Her yeni karede artar; tampon dönüşümleri bu numaraya bağlı
+        self.frame_open = False     # _needs_detection yeni kareyi başlattı, process_detections kapatacak
         
         # --- Görünüm Modu ---
         self.display_mode = "minimal"  # "minimal", "normal", "full"
+        self.headless = False  # True: kare çizilmez, sadece yapısal sonuç döner
+        
+        # --- Kare Atlama (YOLO her N karede, arada kutular takip edilir) ---
+        self.detection_interval = 1  # 1 = her karede YOLO (varsayılan)
+        self.motion_threshold = 8.0  # Ortalama piksel farkı bu değeri aşarsa YOLO zorla çalışır
+        self.box_tracker = BoxTracker()
+        self.frames_since_detection = 0
+        self.prev_motion_gray = None
+        
+        # --- Hareket Kapısı (bölgelerde hareket yoksa YOLO uyur, son sonuç kullanılır) ---
+        self.motion_gating = False
+        self.motion_gate = MotionGate()
+        self.gate_idle = False          # Bu kare kapı tarafından atlandı mı?
+        self.cached_detections = None   # Son gerçek deteksiyon (xyxy, cls, conf)
+        
+        # --- Bölge Kırpmalı Çıkarım (YOLO sadece bölgelerin kişi boyu kadar genişletilmiş kutusunda) ---
+        self.zone_cropping = False
+        self.crop_tile_size = None      # Kırpıntı bundan büyükse karolara bölünür (piksel)
+        self.inference_size = None      # YOLO giriş çözünürlüğü (None = model varsayılanı, yük kontrolcüsü düşürür)
+        
+        # --- Kişi Takibi (kalıcı ID + zaman içinde biriken KKD durumu) ---
+        self.person_tracking = True
+        self.person_tracker = PersonTracker()
+        
+        # --- Pose ile KKD Doğrulama (sadece belirsiz kişilerin kırpıntılarında, iz başına önbellekli) ---
+        self.pose_verification = False
+        self.pose_verifier = PoseVerifier(lambda: self.pose_estimator)
+        
+        # --- Olay Akışı (risk/bölge/ihlal geçişleri arka planda sink'lere yazılır) ---
+        self.event_builder = EventBuilder()
+        self.event_dispatcher = None  # publish(event) sunan nesne (EventDispatcher)
+        self.history_store = None     # append(record) sunan nesne (HistoryStore)
+        self.compact_records = False  # Geçmiş deposu yokken de raw_data["record"] üretilsin mi (süreç havuzu)
+
+    @property
+    def yolo_detector(self):
+        """YOLO dedektörü (ilk erişimde yüklenir)."""
+        if self._yolo_detector is None:
+            self._yolo_detector = YoloDetector(self.yolo_model_path, **self.detector_options)
+        return self._yolo_detector
+
+    @property
+    def yolo_class_names(self):
+        """Modelin sınıf isimleri {id: isim}."""
+        return self.yolo_detector.model.names
+
+    @property
+    def class_ids(self):
+        """Sınıf ismi -> id eşlemesi (bir kez hesaplanır)."""
+        if self._class_ids is None:
+            self._class_ids = {name: int(cls_id) for cls_id, name in self.yolo_class_names.items()}
+        return self._class_ids
+
+    @property
+    def pose_estimator(self):
+        """MediaPipe Pose (sadece gerçekten kullanıldığında içe aktarılır ve yüklenir)."""
+        if self._pose_estimator is None:
+            from modules.pose_estimator import PoseEstimator
+            # Farklı kişilerin kırpıntıları işlendiği için kareler arası takip kapalı
+            self._pose_estimator = PoseEstimator(static_image_mode=True)
+        return self._pose_estimator
+
+    @property
+    def check_landmark_id(self):
+        """Bölge kontrolünde kullanılan landmark (sol ayak bileği)."""
+        return self.pose_estimator.mp_pose.PoseLandmark.LEFT_ANKLE
+
+    def warm_up(self, frame_size=(854, 480)):
+        """Modeli boş bir karede çalıştırır; ilk gerçek kare graf/bellek hazırlığını beklemez."""
+        self.yolo_detector.warm_up(frame_size)
 
     def set_display_mode(self, mode):
         """Görünüm modunu değiştirir."""
@@ -37,123 +136,189 @@ class GuardianProcessor:
             self.display_mode = mode
             print(f"📺 Görünüm modu: {mode.upper()}")
 
-    def _calculate_iou(self, box1, box2):
-        """İki kutunun kesişim oranını hesaplar."""
-        x1_min, y1_min, x1_max, y1_max = box1
-        x2_min, y2_min, x2_max, y2_max = box2
+    def configure_evidence(self, jpeg_quality=90, clip_pre_frames=0, clip_post_frames=0, clip_fps=15):
+        """Kanıt kaydı ayarlarını değiştirir (JPEG kalitesi, ihlal öncesi/sonrası klip)."""
+        self.evidence_writer.stop()
+        self.evidence_writer = EvidenceWriter(jpeg_quality=jpeg_quality,
+                                              clip_pre_frames=clip_pre_frames,
+                                              clip_post_frames=clip_post_frames,
+                                              clip_fps=clip_fps)
+
+    def close(self):
+        """Bekleyen kanıt kayıtlarını diske yazar ve arka plan thread'ini kapatır."""
+        self.evidence_writer.stop()
+        stats = self.evidence_writer.stats()
+        if stats["dropped"] or stats["failed"]:
+            print(f"⚠️ Kanıt kaydı: {stats['dropped']} düşürüldü, {stats['failed']} başarısız.")
+
+    def load_zones(self, filename):
+        """Dosyadan isimli bölgeleri yükler (poligonlar referans kare koordinatlarında)."""
+        zones = load_zones(filename)
+        self.zone_set.set_zones(zones)
+        print(f"🗺️ {len(zones)} bölge yüklendi: {filename}")
+
+    def set_person_tracking(self, enabled):
+        """Kişi takibini (ID, KKD yumuşatma, ihlal onayı) açar/kapatır."""
+        self.person_tracking = enabled
+        self.person_tracker.reset()
+        print(f"🧍 Kişi takibi: {'AÇIK' if enabled else 'KAPALI'}")
+        # Pose doğrulama iz ID'lerine dayanır: takip kapanınca o da kapanır
+        if not enabled and self.pose_verification:
+            print("⚠️ Kişi takibi kapandığı için pose doğrulama da kapatılıyor.")
+            self.set_pose_verification(False)
+
+    def set_event_dispatcher(self, dispatcher):
+        """Durum geçişlerinden üretilen olayların gönderileceği dağıtıcıyı ayarlar (None = kapalı)."""
+        self.event_dispatcher = dispatcher
+
+    def set_history_store(self, store):
+        """Her karenin kompakt kaydının ekleneceği geçmiş deposunu ayarlar (None = kapalı)."""
+        self.history_store = store
+
+    def set_compact_records(self, enabled):
+        """Her karede kompakt kayıt (raw_data["record"]) üretir; geçmiş deposu ayarlıysa zaten üretilir."""
+        self.compact_records = enabled
+
+    def set_pose_verification(self, enabled):
+        """Bölgedeki/belirsiz kişilerde baret-baş ve yelek-gövde hizasını pose ile doğrular (iz takibi gerekir)."""
+        self.pose_verification = enabled and self.person_tracking
+        self.pose_verifier.reset()
+        print(f"🦴 Pose doğrulama: {'AÇIK' if self.pose_verification else 'KAPALI'}")
+
+    def set_detection_interval(self, interval, motion_threshold=None):
+        """YOLO'nun kaç karede bir çalışacağını ayarlar (arada takipçi kullanılır)."""
+        self.detection_interval = max(1, int(interval))
+        if motion_threshold is not None:
+            self.motion_threshold = motion_threshold
+        self.box_tracker.reset()
+        self.frames_since_detection = 0
+        print(f"⏭️ Deteksiyon aralığı: her {self.detection_interval} karede bir")
+
+    def set_headless(self, enabled):
+        """Başsız (sunucu) modu: process_frame çizim yapmaz, annotated_frame None döner."""
+        self.headless = enabled
+        print(f"🖥️ Başsız mod: {'AÇIK' if enabled else 'KAPALI'}")
+
+    def _motion_score(self, frame):
+        """Küçültülmüş gri karede bir önceki kareye göre ortalama piksel farkını döndürür."""
+        self.buffers.begin(frame, self.frame_seq)
+        small_gray = self.buffers.small_gray()
         
-        # Kesişim alanı
-        inter_xmin = max(x1_min, x2_min)
-        inter_ymin = max(y1_min, y2_min)
-        inter_xmax = min(x1_max, x2_max)
-        inter_ymax = min(y1_max, y2_max)
+        if self.prev_motion_gray is None or self.prev_motion_gray.shape != small_gray.shape:
+            score = float('inf')
+            self.prev_motion_gray = small_gray.copy()
+        else:
+            score = float(cv2.absdiff(small_gray, self.prev_motion_gray).mean())
+            np.copyto(self.prev_motion_gray, small_gray)
         
-        inter_width = max(0, inter_xmax - inter_xmin)
-        inter_height = max(0, inter_ymax - inter_ymin)
-        inter_area = inter_width * inter_height
+        return score
+
+    def set_motion_gating(self, enabled, refresh_interval=None, hold_frames=None):
+        """Boş/durağan sahnelerde YOLO'yu atlar; bölge yakınında hareket olunca veya periyodik olarak çalıştırır."""
+        self.motion_gating = enabled
+        if refresh_interval is not None:
+            self.motion_gate.refresh_interval = refresh_interval
+        if hold_frames is not None:
+            self.motion_gate.hold_frames = hold_frames
+        self.motion_gate.reset()
+        self.cached_detections = None
+        print(f"💤 Hareket kapısı: {'AÇIK' if enabled else 'KAPALI'}")
+
+    def set_zone_cropping(self, enabled, tile_size=None):
+        """YOLO'yu tam kare yerine bölgelerin etrafındaki kırpıntıda (isteğe bağlı karolarda) çalıştırır.
+
+        Bölge dışındaki kişiler tespit edilmez; bölge yoksa tam kare kullanılır.
+        """
+        self.zone_cropping = enabled
+        self.crop_tile_size = tile_size
+        print(f"✂️ Bölge kırpmalı çıkarım: {'AÇIK' if enabled else 'KAPALI'}")
+
+    def _detection_regions(self, frame):
+        """Bölge kırpma açıksa bu karede işlenecek bölgeleri döndürür (None = tam kare)."""
+        if not self.zone_cropping:
+            return None
+        region = zone_crop_region(self.zone_set.active_polygons, frame.shape)
+        if region is None:
+            return None
+        return tile_region(region, self.crop_tile_size)
+
+    def _detect(self, frame):
+        """Tek kare deteksiyonu (bölge kırpma açıksa sadece bölge çevresinde)."""
+        regions = self._detection_regions(frame)
+        if regions is None:
+            return self.yolo_detector.detect_objects(frame, self.inference_size)
+        return self.yolo_detector.detect_regions_batch([frame], [regions], self.inference_size)[0]
+
+    def _gate_allows_detection(self, frame):
+        """Hareket kapısı: bölgelerin (son karedeki konumları) yakınında hareket var mı?"""
+        if self.cached_detections is None:
+            return True
+        self.buffers.begin(frame, self.frame_seq)
+        polygons = [polygon for polygon in self.zone_set.active_polygons if len(polygon) >= 3]
+        return self.motion_gate.should_detect(self.buffers.small_gray(), polygons, frame.shape)
+
+    def _begin_frame(self):
+        """Yeni kare numarası açar (önceki karenin gri/RGB dönüşümleri kullanılmaz)."""
+        self.frame_seq += 1
+        self.frame_open = True
+
+    def _needs_detection(self, frame):
+        """Bu karede tam YOLO deteksiyonu gerekli mi? (kapı uyanıksa ve aralık dolduysa veya hareket arttıysa)"""
+        self._begin_frame()
+        self.gate_idle = False
+        if self.motion_gating and not self._gate_allows_detection(frame):
+            self.gate_idle = True
+            self.metrics.increment(self.camera_id, "frames_motion_gated")
+            return False
         
-        # Birleşim alanı
-        box1_area = (x1_max - x1_min) * (y1_max - y1_min)
-        box2_area = (x2_max - x2_min) * (y2_max - y2_min)
-        union_area = box1_area + box2_area - inter_area
+        if self.detection_interval <= 1:
+            return True
         
-        if union_area == 0:
-            return 0
+        motion = self._motion_score(frame)
+        if self.frames_since_detection + 1 >= self.detection_interval or motion > self.motion_threshold:
+            return True
         
-        return inter_area / union_area
+        self.frames_since_detection += 1
+        return False
+
+    def _remember_detections(self, yolo_results):
+        """YOLO sonuçlarını takipçiye (kare atlama) ve kapı önbelleğine (hareket kapısı) besler."""
+        boxes = yolo_results.boxes
+        if self.motion_gating:
+            self.cached_detections = (to_numpy(boxes.xyxy).copy(), to_numpy(boxes.cls).copy(),
+                                      to_numpy(boxes.conf).copy())
+        if self.detection_interval <= 1:
+            return
+        
+        self.box_tracker.update(boxes.xyxy, boxes.cls, boxes.conf)
+        self.frames_since_detection = 0
+
+    def _tracked_results(self, frame):
+        """YOLO çalışmayan karede kutuları döndürür (durağan sahnede son deteksiyon, yoksa takipçi tahmini)."""
+        if self.gate_idle and self.cached_detections is not None:
+            xyxy, cls, conf = self.cached_detections
+        else:
+            xyxy, cls, conf = self.box_tracker.predict()
+        return TrackedResults(TrackedBoxes(xyxy, cls, conf), self.yolo_class_names, frame)
+
+    def _calculate_iou(self, box1, box2):
+        """İki kutunun kesişim oranını hesaplar."""
+        return float(iou_matrix([box1], [box2])[0, 0])
 
     def _match_ppe_to_person(self, yolo_results, frame_shape):
-        """Her Person için yakınındaki KKD'leri eşleştirir (Bölge tabanlı)."""
-        persons = []
-        ppe_items = []
-        
-        # Deteksiyonları ayır
-        for box, cls_id, conf in zip(yolo_results.boxes.xyxy, 
-                                      yolo_results.boxes.cls, 
-                                      yolo_results.boxes.conf):
-            class_name = self.yolo_class_names[int(cls_id)]
-            x1, y1, x2, y2 = map(int, box)
-            
-            if class_name == "Person":
-                persons.append({
-                    'box': (x1, y1, x2, y2),
-                    'center': ((x1+x2)//2, (y1+y2)//2),
-                    'foot': ((x1+x2)//2, y2),
-                    'has_helmet': False,
-                    'has_vest': False,
-                    'helmet_conf': 0.0,
-                    'vest_conf': 0.0
-                })
-            elif class_name in ["Hardhat", "Safety Vest"]:
-                ppe_items.append({
-                    'type': class_name,
-                    'box': (x1, y1, x2, y2),
-                    'center': ((x1+x2)//2, (y1+y2)//2),
-                    'conf': float(conf),
-                    'assigned': False  # KKD zaten atandı mı?
-                })
-        
-        # Her KKD için en yakın Person'ı bul (çakışmayı önlemek için)
-        for ppe in ppe_items:
-            if ppe['assigned']:
-                continue
-                
-            ppx, ppy = ppe['center']
-            min_distance = float('inf')
-            closest_person = None
-            
-            for person in persons:
-                px1, py1, px2, py2 = person['box']
-                person_width = px2 - px1
-                person_height = py2 - py1
-                
-                # Genişletilmiş arama alanı
-                search_area = (
-                    px1 - person_width * 1.2,
-                    py1 - person_height * 0.7,
-                    px2 + person_width * 1.2,
-                    py2 + person_height * 0.3
-                )
-                
-                # KKD bu alanda mı?
-                if (search_area[0] <= ppx <= search_area[2] and 
-                    search_area[1] <= ppy <= search_area[3]):
-                    
-                    # Mesafeyi hesapla
-                    person_center_x = (px1 + px2) / 2
-                    person_center_y = (py1 + py2) / 2
-                    distance = ((ppx - person_center_x)**2 + (ppy - person_center_y)**2)**0.5
-                    
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_person = person
-            
-            # En yakın Person'a KKD'yi ata
-            if closest_person:
-                if ppe['type'] == "Hardhat":
-                    person_mid_y = (closest_person['box'][1] + closest_person['box'][3]) / 2
-                    if ppy < person_mid_y:
-                        # Daha yüksek confidence varsa değiştir
-                        if ppe['conf'] > closest_person['helmet_conf']:
-                            closest_person['has_helmet'] = True
-                            closest_person['helmet_conf'] = ppe['conf']
-                            ppe['assigned'] = True
-                        
-                elif ppe['type'] == "Safety Vest":
-                    # Daha yüksek confidence varsa değiştir
-                    if ppe['conf'] > closest_person['vest_conf']:
-                        closest_person['has_vest'] = True
-                        closest_person['vest_conf'] = ppe['conf']
-                        ppe['assigned'] = True
-        
-        return persons
+        """Her Person için yakınındaki KKD'leri eşleştirir (Bölge tabanlı, vektörel)."""
+        boxes = yolo_results.boxes
+        return assign_ppe(boxes.xyxy, boxes.cls, boxes.conf,
+                          self.class_ids.get("Person"),
+                          self.class_ids.get("Hardhat"),
+                          self.class_ids.get("Safety Vest"),
+                          mode=self.ppe_assignment_mode)
 
     def _analyze_ppe_status(self, yolo_results):
         """YOLO sonuçlarından KKD eksikliğini tespit eder."""
-        has_no_helmet = any(self.yolo_class_names[int(cls_id)] == 'NO-Hardhat' 
-                           for cls_id in yolo_results.boxes.cls)
-        has_no_vest = any(self.yolo_class_names[int(cls_id)] == 'NO-Safety Vest' 
-                         for cls_id in yolo_results.boxes.cls)
+        cls = to_numpy(yolo_results.boxes.cls).astype(np.int32)
+        has_no_helmet = bool(np.any(cls == self.class_ids.get('NO-Hardhat', -1)))
+        has_no_vest = bool(np.any(cls == self.class_ids.get('NO-Safety Vest', -1)))
         return has_no_helmet, has_no_vest
 
     def _run_rule_engine(self, ppe_status, is_inside_zone):
@@ -182,14 +347,16 @@ class GuardianProcessor:
             print("⚠️ Takip için en az 3 nokta gerekli!")
             return False
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        self.reference_keypoints, self.reference_descriptors = self.orb.detectAndCompute(gray, None)
+        # Kare akış dışından gelebilir (tuş/önizleme komutu): dönüşümler yeniden hesaplanır
+        if not self.frame_open:
+            self.frame_seq += 1
+        self.buffers.begin(frame, self.frame_seq)
+        gray = self.buffers.gray()
         
-        if self.reference_descriptors is not None and len(self.reference_keypoints) > 20:
-            self.reference_frame = gray.copy()
+        if self.zone_tracker.start(gray, polygon_points, self.last_person_boxes):
             self.original_polygon = list(polygon_points)  # Kopyasını al
             self.tracking_enabled = True
-            print(f"✅ Referans alındı ve takip kilitlendi. ({len(self.reference_keypoints)} özellik noktası)")
+            print(f"✅ Referans alındı ve takip kilitlendi. ({self.zone_tracker.feature_count()} özellik noktası)")
             return True
         else:
             print("❌ Yetersiz görüntü özelliği, takip başlatılamadı.")
@@ -198,75 +365,112 @@ class GuardianProcessor:
     def stop_tracking(self):
         """Takibi durdurur ve çizim moduna döner."""
         self.tracking_enabled = False
-        self.reference_frame = None
-        self.reference_descriptors = None
+        self.zone_tracker.reset()
         self.original_polygon = None
         print("🛑 Takip durduruldu. Çizim moduna geçildi.")
 
-    def _update_polygon_tracking(self, frame):
-        """Kamera hareketine göre poligonu kaydırır (Homography)."""
-        if not self.tracking_enabled or self.reference_descriptors is None:
+    def _update_polygon_tracking(self, frame, person_boxes=None):
+        """Kamera hareketine göre poligonu kaydırır (Homography, gerekmedikçe önbellekten)."""
+        if not self.tracking_enabled:
             return []
         
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        current_keypoints, current_descriptors = self.orb.detectAndCompute(gray, None)
-        
-        if current_descriptors is None or len(current_keypoints) < 10:
-            return self.original_polygon
-        
-        try:
-            matches = self.bf_matcher.match(self.reference_descriptors, current_descriptors)
-            matches = sorted(matches, key=lambda x: x.distance)
-            
-            # En iyi %30 eşleşmeyi al (Gürültüyü azaltır)
-            keep_percent = 0.3
-            keep_count = int(len(matches) * keep_percent)
-            good_matches = matches[:max(keep_count, 10)]
-            
-            if len(good_matches) < 10:
-                return self.original_polygon
-            
-            src_pts = np.float32([self.reference_keypoints[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-            dst_pts = np.float32([current_keypoints[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-            
-            M, mask = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
-            
-            if M is not None:
-                pts = np.float32(self.original_polygon).reshape(-1, 1, 2)
-                dst = cv2.perspectiveTransform(pts, M)
-                return [(int(x), int(y)) for x, y in dst.reshape(-1, 2)]
-                
-        except Exception as e:
-            print(f"⚠️ Takip hatası: {e}")
-        
-        return self.original_polygon
+        self.buffers.begin(frame, self.frame_seq)
+        return self.zone_tracker.update(self.buffers.gray(), person_boxes, self.buffers.small_gray())
 
     def process_frame(self, frame, current_draw_points):
         """Tek bir video karesini alır ve tüm analiz adımlarını uygular."""
+        start = time.perf_counter()
+        if self._needs_detection(frame):
+            detect_start = time.perf_counter()
+            yolo_results = self._detect(frame)
+            self.metrics.observe(self.camera_id, "yolo", detect_start, time.perf_counter())
+            self._remember_detections(yolo_results)
+        else:
+            yolo_results = self._tracked_results(frame)
+            self.metrics.increment(self.camera_id, "frames_skipped_detection")
+        self.metrics.observe(self.camera_id, "detect_or_track", start, time.perf_counter())
+        return self.process_detections(frame, yolo_results, current_draw_points)
+
+    def prepare_batch(self, frame):
+        """Batch modunda yeni kareyi açar: (deteksiyon gerekli mi, bölgeler) döndürür (bölgeler None = tam kare)."""
+        if not self._needs_detection(frame):
+            return False, None
+        return True, self._detection_regions(frame)
+
+    def finish_batch(self, frame, detections, current_draw_points):
+        """Batch'ten gelen YOLO sonucuyla kareyi tamamlar (detections None = bu karede YOLO çalışmadı)."""
+        if detections is None:
+            detections = self._tracked_results(frame)
+        else:
+            self._remember_detections(detections)
+        return self.process_detections(frame, detections, current_draw_points)
+
+    def process_detections(self, frame, yolo_results, current_draw_points):
+        """Hazır YOLO sonuçlarıyla KKD eşleştirme, bölge ve risk analizini yapar."""
+        if not self.frame_open:
+            self._begin_frame()
+        self.frame_open = False
+        self.buffers.begin(frame, self.frame_seq)
+        cam = self.camera_id
+        frame_start = time.perf_counter()
         
-        # 1. Adım: Hangi poligonu kullanacağız?
+        # Kişi-KKD eşleştirmesi yap (TÜM kişiler için)
+        person_table = self._match_ppe_to_person(yolo_results, frame.shape)
+        self.last_person_boxes = person_table.boxes
+        t_matched = time.perf_counter()
+        self.metrics.observe(cam, "ppe_matching", frame_start, t_matched)
+        
+        # 1. Adım: Hangi poligonu kullanacağız? (kişiler ORB maskesinden çıkarılır)
         if self.tracking_enabled:
-            active_polygon = self._update_polygon_tracking(frame)
+            active_polygon = self._update_polygon_tracking(frame, person_table.boxes)
         else:
             active_polygon = current_draw_points
+        t_tracked = time.perf_counter()
+        self.metrics.observe(cam, "zone_tracking", t_matched, t_tracked)
         
         # --- Ham Veri Toplama ---
-        frame_height, frame_width, _ = frame.shape
-        yolo_results = self.yolo_detector.detect_objects(frame)
+        persons = person_table.to_dicts()
+        if self.person_tracking:
+            persons = self.person_tracker.update(persons)
+        t_persons = time.perf_counter()
+        self.metrics.observe(cam, "person_tracking", t_tracked, t_persons)
         
-        # Kişi-KKD eşleştirmesi yap (TÜM kişiler için)
-        persons = self._match_ppe_to_person(yolo_results, frame.shape)
+        # Tehlikeli bölgedeki kişileri bul (raster üzerinde tek vektörel sorgu)
+        homography = self.zone_tracker.homography if self.tracking_enabled else None
+        self.zone_set.update(active_polygon, homography, frame.shape)
+        feet = np.array([person['foot'] for person in persons], dtype=np.int64).reshape(-1, 2)
+        zone_hits = self.zone_set.query(feet)
+        
+        if self.pose_verification:
+            verify_start = time.perf_counter()
+            self.pose_verifier.verify(self.buffers.rgb(), persons, zone_hits != 0, self.person_tracker.tracks)
+            self.metrics.observe(cam, "pose_verification", verify_start, time.perf_counter())
         
-        # Tehlikeli bölgedeki kişileri bul
         persons_in_danger = []
-        if len(active_polygon) >= 3:
-            polygon_np = np.array(active_polygon, np.int32)
+        for person, hit in zip(persons, zone_hits):
+            zones = self.zone_set.zones_for(hit)
+            required = set()
+            for zone in zones:
+                required.update(zone.required_ppe)
+            
+            person['zones'] = [zone.name for zone in zones]
+            person['severity'] = max((zone.severity for zone in zones),
+                                     key=lambda level: SEVERITY_ORDER.get(level, 0), default=None)
+            person['missing_ppe'] = []
+            if "Baret" in required and not person['has_helmet']:
+                person['missing_ppe'].append("Baret")
+            if "Yelek" in required and not person['has_vest']:
+                person['missing_ppe'].append("Yelek")
             
-            for person in persons:
-                foot_x, foot_y = person['foot']
-                result = cv2.pointPolygonTest(polygon_np, (foot_x, foot_y), False)
-                if result >= 0:
-                    persons_in_danger.append(person)
+            if zones:
+                persons_in_danger.append(person)
+        
+        t_zones = time.perf_counter()
+        self.metrics.observe(cam, "zone_test", t_persons, t_zones)
+        
+        # İz başına ihlal onayı (birkaç kare sürmeyen ihlaller KRITIK sayılmaz)
+        if self.person_tracking:
+            self.person_tracker.confirm_violations(persons, persons_in_danger)
         
         # Risk değerlendirmesi (sadece bölgedeki kişiler için)
         risk_level = "GUVENDE"
@@ -275,27 +479,120 @@ class GuardianProcessor:
         
         if len(persons_in_danger) > 0:
             missing_ppe = []
+            violation_severity = None
+            pending_check = False
             for person in persons_in_danger:
-                if not person['has_helmet']:
-                    missing_ppe.append("Baret")
-                if not person['has_vest']:
-                    missing_ppe.append("Yelek")
+                if self.person_tracking and not person['violation_confirmed']:
+                    pending_check = pending_check or bool(person['missing_ppe'])
+                    continue
+                if person['missing_ppe']:
+                    missing_ppe.extend(person['missing_ppe'])
+                    if SEVERITY_ORDER.get(person['severity'], 0) > SEVERITY_ORDER.get(violation_severity, 0):
+                        violation_severity = person['severity']
             
-            if missing_ppe:
+            if missing_ppe and violation_severity == "KRITIK":
                 risk_level = "KRITIK"
                 alert_msg = f"KRITIK IHLAL: {', '.join(set(missing_ppe))} EKSIK!"
                 alert_color = (0, 0, 255)
+            elif missing_ppe:
+                risk_level = "ORTA"
+                alert_msg = f"UYARI: {', '.join(set(missing_ppe))} EKSIK"
+                alert_color = (0, 165, 255)
+            elif pending_check:
+                risk_level = "DUSUK"
+                alert_msg = "DIKKAT: TEHLIKELI BOLGE (KKD kontrol ediliyor)"
+                alert_color = (0, 255, 255)
             else:
                 risk_level = "DUSUK"
                 alert_msg = "DIKKAT: TEHLIKELI BOLGEYE GIRIS (KKD Tamam)"
                 alert_color = (0, 255, 255)
                     
-        # --- Görselleştirme (Mod'a göre) ---
-        annotated_frame = frame.copy()
+        raw_data = {
+            "yolo_results": yolo_results,
+            "persons": persons,
+            "persons_in_danger": persons_in_danger,
+            "risk_level": risk_level,
+            "alert_message": alert_msg,
+            "alert_color": alert_color,
+            "active_polygon": active_polygon,
+            "zone_polygons": self.zone_set.extra_polygons(),
+            "tracking_active": self.tracking_enabled,
+            "camera_id": self.camera_id,
+            "record": None
+        }
+        # Saklanacak/süreçler arası gönderilecek kompakt sonuç (Results nesnesi ve dict'ler olmadan)
+        if self.compact_records or self.history_store is not None:
+            raw_data["record"] = FrameRecord.from_persons(self.camera_id, time.time(), risk_level, persons, zone_hits,
+                                                          [zone.name for zone in self.zone_set.active_zones])
+        
+        # Başsız modda kare sadece kanıt kaydı gerektiğinde çizilir
+        t_draw = time.perf_counter()
+        annotated_frame = None if self.headless else self.annotate(frame, raw_data)
+        t_drawn = time.perf_counter()
+        self.metrics.observe(cam, "drawing", t_draw, t_drawn)
+
+        # --- KRİTİK İHLAL KAYDI (Sadece takip modundayken) ---
+        # Kişi takibi açıkken sadece yeni onaylanan ihlallerde kayıt yapılır
+        new_violation = (not self.person_tracking or
+                         any(person['violation_new'] for person in persons_in_danger))
+        if risk_level == "KRITIK" and self.tracking_enabled and new_violation:
+            current_time = datetime.now().timestamp()
+            if current_time - self.last_save_time > 2:
+                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+                if self.camera_id is not None:
+                    save_path = f"violations/ihlal_{self.camera_id}_{timestamp_str}.jpg"
+                else:
+                    save_path = f"violations/ihlal_{timestamp_str}.jpg"
+                clip_path = save_path.replace(".jpg", ".mp4")
+                if annotated_frame is None:
+                    evidence_frame = self.annotate(frame, raw_data, pooled=False)
+                else:
+                    # Kopya: çağıran taraf (main.py) kareye yazı eklemeye devam ediyor
+                    evidence_frame = annotated_frame.copy()
+                self.evidence_writer.submit(save_path, evidence_frame, clip_path)
+                self.last_save_time = current_time
+                print(f"📸 KRİTİK İHLAL KAYDA ALINDI: {save_path}")
+
+        # Klip halka belleği (başsız modda çizimsiz ham kare). Kareler tampon halkasından
+        # geldiği için klip açıksa kopyası saklanır.
+        if self.evidence_writer.clips_enabled():
+            self.evidence_writer.add_frame((frame if annotated_frame is None else annotated_frame).copy())
+        
+        if self.event_dispatcher is not None:
+            for event in self.event_builder.update(raw_data):
+                self.event_dispatcher.publish(event)
+        if self.history_store is not None:
+            self.history_store.append(raw_data["record"])
+        
+        t_end = time.perf_counter()
+        self.metrics.observe(cam, "evidence", t_drawn, t_end)
+        self.metrics.observe(cam, "analysis_total", frame_start, t_end)
+        self.metrics.frame_done(cam)
+        
+        return annotated_frame, raw_data
+
+    def annotate(self, frame, raw_data, pooled=True):
+        """Analiz sonucunu (raw_data) kare üzerine çizer. Görüntüleyici veya kanıt kaydı ister.
+
+        pooled=True iken çizim tamponu halkadan gelir ve birkaç kare sonra
+        yeniden kullanılır; uzun süre saklanacak kareler için pooled=False verilmelidir.
+        """
+        persons_in_danger = raw_data["persons_in_danger"]
+        risk_level = raw_data["risk_level"]
+        alert_msg = raw_data["alert_message"]
+        alert_color = raw_data["alert_color"]
+        active_polygon = raw_data["active_polygon"]
+        tracking_active = raw_data["tracking_active"]
+        frame_width = frame.shape[1]
         
         # 1. YOLO Deteksiyonları (Sadece normal/full modda)
+        # results.plot() zaten yeni bir kare döndürür, ayrıca kopya almaya gerek yok
         if self.display_mode in ["normal", "full"]:
-            annotated_frame = self.yolo_detector.draw_detections(annotated_frame, yolo_results)
+            annotated_frame = self.yolo_detector.draw_detections(frame, raw_data["yolo_results"])
+        elif pooled:
+            annotated_frame = self.buffers.annotated_copy(frame)
+        else:
+            annotated_frame = frame.copy()
         
         # 2. Tehlikeli bölgedeki kişileri vurgula
         for person in persons_in_danger:
@@ -341,16 +638,17 @@ class GuardianProcessor:
                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, helmet_color, 1)
                 cv2.putText(annotated_frame, f"Yelek: {vest_status}", (x1 + 5, text_y + 25),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, vest_color, 1)
+                if 'track_id' in person:
+                    cv2.putText(annotated_frame, f"#{person['track_id']}", (x1 + 150, text_y + 10),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
         
         # 3. Poligon Çizimi
         if len(active_polygon) > 0:
             poly_np = np.array(active_polygon, np.int32)
             
-            if self.tracking_enabled:
-                # Takip modunda: Şeffaf alan + çizgi
-                overlay = annotated_frame.copy()
-                cv2.fillPoly(overlay, [poly_np], alert_color)
-                cv2.addWeighted(overlay, 0.3, annotated_frame, 0.7, 0, annotated_frame)
+            if tracking_active:
+                # Takip modunda: Şeffaf alan + çizgi (karışım sadece poligonun çevreleyen kutusunda)
+                self._blend_polygon(annotated_frame, poly_np, alert_color, 0.3)
                 cv2.polylines(annotated_frame, [poly_np], True, alert_color, 3)
             else:
                 # Çizim modunda
@@ -362,6 +660,14 @@ class GuardianProcessor:
                         cv2.putText(annotated_frame, str(i+1), (pt[0] + 15, pt[1] - 10),
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
+        # Dosyadan gelen isimli bölgeler (ince çizgi + isim)
+        for zone_name, zone_polygon in raw_data.get("zone_polygons", []):
+            zone_np = np.array(zone_polygon, np.int32)
+            cv2.polylines(annotated_frame, [zone_np], True, (0, 200, 255), 2)
+            if self.display_mode != "minimal":
+                cv2.putText(annotated_frame, zone_name, tuple(zone_np[0]),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 200, 255), 1)
+
         # 4. Üst bilgi paneli (Minimal modda küçük)
         if self.display_mode == "minimal":
             # Sadece kritik uyarı ve mod
@@ -376,8 +682,8 @@ class GuardianProcessor:
                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, alert_color, 3)
         
         # 5. Mod göstergesi (Sağ üst köşe - her zaman)
-        mode_text = "LOCKED" if self.tracking_enabled else "DRAWING"
-        mode_color = (0, 255, 0) if self.tracking_enabled else (0, 165, 255)
+        mode_text = "LOCKED" if tracking_active else "DRAWING"
+        mode_color = (0, 255, 0) if tracking_active else (0, 165, 255)
         cv2.putText(annotated_frame, mode_text, (frame_width - 130, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, mode_color, 2)
         
@@ -391,21 +697,45 @@ class GuardianProcessor:
             cv2.putText(annotated_frame, f"Display: {self.display_mode.upper()}", 
                        (20, 140), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
 
-        # --- KRİTİK İHLAL KAYDI (Sadece takip modundayken) ---
-        if risk_level == "KRITIK" and self.tracking_enabled:
-            current_time = datetime.now().timestamp()
-            if current_time - self.last_save_time > 2:
-                timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-                save_path = f"violations/ihlal_{timestamp_str}.jpg"
-                cv2.imwrite(save_path, annotated_frame)
-                self.last_save_time = current_time
-                print(f"📸 KRİTİK İHLAL KAYDEDİLDİ: {save_path}")
+        return annotated_frame
 
-        raw_data = {
-            "yolo_results": yolo_results,
-            "persons_in_danger": persons_in_danger,
-            "risk_level": risk_level,
-            "tracking_active": self.tracking_enabled
-        }
+    def _blend_polygon(self, image, poly_np, color, alpha):
+        """Poligon içini yarı saydam boyar; tam kare yerine sadece çevreleyen kutu kopyalanır."""
+        height, width = image.shape[:2]
+        x, y, w, h = cv2.boundingRect(poly_np)
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + w, width), min(y + h, height)
+        if x2 <= x1 or y2 <= y1:
+            return
         
-        return annotated_frame, raw_data
\ No newline at end of file
+        roi = image[y1:y2, x1:x2]
+        overlay = roi.copy()
+        cv2.fillPoly(overlay, [poly_np - np.array([x1, y1], np.int32)], color)
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
+
+
+def process_batch(detector, processors, frames, polygons, metrics=None):
+    """Birden fazla kamerayı ortak dedektörle tek batch'te işler (çoklu kamera ve işçi süreç modları).
+
+    Kare atlama/hareket kapısı nedeniyle deteksiyon gerekmeyen kameralar
+    batch'e girmez; bölge kırpma açık kameralar sadece kırpıntılarıyla girer.
+    Girdi sırasıyla [(annotated_frame, data)] döndürür.
+    """
+    requests = [processor.prepare_batch(frame) for processor, frame in zip(processors, frames)]
+    detect = [i for i, (needed, _) in enumerate(requests) if needed]
+    detections = [None] * len(frames)
+    if detect:
+        start = time.perf_counter()
+        detect_frames = [frames[i] for i in detect]
+        regions = [requests[i][1] for i in detect]
+        imgsz = batch_inference_size([processors[i] for i in detect])
+        if any(region is not None for region in regions):
+            results = detector.detect_regions_batch(detect_frames, regions, imgsz)
+        else:
+            results = detector.detect_objects_batch(detect_frames, imgsz)
+        for i, result in zip(detect, results):
+            detections[i] = result
+        if metrics is not None:
+            metrics.observe("batch", "yolo_batch", start, time.perf_counter())
+    return [processor.finish_batch(frame, result, polygon)
+            for processor, frame, result, polygon in zip(processors, frames, detections, polygons)]
@@ -0,0 +1,78 @@
+"""Sonuç geçmişinden (GECMIS_KLASORU) çıkarım çalıştırmadan sorgu.
+
+Örnekler:
+    python history_query.py history cam0 --risk KRITIK --start "2026-10-17 08:00" --end "2026-10-17 18:00"
+    python history_query.py history cam0 --violations --zone "Pres Alani"
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from modules.frame_record import MISSING_BITS, RISK_LEVELS
+from modules.history_store import HistoryStore
+
+
+def _parse_time(value):
+    """'YYYY-mm-dd HH:MM[:SS]' (yerel saat) veya epoch saniyesi."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Geçersiz zaman: {value}")
+
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Kayıtlı sonuç geçmişinde aralık ve ihlal sorguları")
+    parser.add_argument("directory", help="Geçmiş klasörü")
+    parser.add_argument("camera", nargs="?", help="Kamera (boşsa kameralar listelenir)")
+    parser.add_argument("--start", type=_parse_time)
+    parser.add_argument("--end", type=_parse_time)
+    parser.add_argument("--risk", default="KRITIK", choices=RISK_LEVELS, help="Aralıkları listelenecek risk seviyesi")
+    parser.add_argument("--max-gap", type=float, default=2.0, help="Bu kadar saniyelik boşluk aralığı böler")
+    parser.add_argument("--violations", action="store_true", help="Aralık yerine ihlal eden kişi satırları")
+    parser.add_argument("--zone", help="Sadece bu bölgedeki kişiler (--violations ile)")
+    parser.add_argument("--track", type=int, help="Sadece bu iz (--violations ile)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = HistoryStore(args.directory)
+    if args.camera is None:
+        for camera_id in store.cameras():
+            print(camera_id)
+        return 0
+
+    if args.violations:
+        rows = store.persons(args.camera, args.start, args.end, track_id=args.track, zone=args.zone,
+                             violations_only=True)
+        for row in rows:
+            missing = [name for name, bit in MISSING_BITS.items() if row["missing"] & bit]
+            print(f"{_format_time(row['timestamp'])}  iz {row['track_id']}  kutu {row['box'].tolist()}  "
+                  f"eksik {', '.join(missing)}")
+        print(f"\n{len(rows)} satır")
+        return 0
+
+    intervals = store.intervals(args.camera, args.risk, args.start, args.end, args.max_gap)
+    total = 0.0
+    for start, end in intervals:
+        total += end - start
+        print(f"{_format_time(start)} → {_format_time(end)}  ({end - start:.1f} sn)")
+    print(f"\n{len(intervals)} {args.risk} aralığı, toplam {total / 60:.1f} dk")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
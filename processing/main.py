@@ -1,7 +1,14 @@
 import cv2
 import json
 import os
+import time
 from guardian_processor import GuardianProcessor
+from modules.frame_source import open_frame_source
+from modules.metrics import MetricsRegistry, MetricsServer
+from modules.events import EventDispatcher, HttpPushSink, JsonlSink, SqliteSink
+from modules.quality_controller import QualityController
+from modules.history_store import HistoryStore
+from modules.preview_server import PreviewServer
 
 # --- Global Ayarlar ---
 YOLO_MODEL_PATH = "best.pt"  # processing klasöründe olduğu için sadece dosya adı yeterli
@@ -9,6 +16,91 @@ YOLO_MODEL_PATH = "best.pt"  # processing klasöründe olduğu için sadece dosy
 KAYNAK = "test1.mp4"  # Kamera için: 0
 WINDOW_NAME = "Guardian AI - Workplace Safety"
 POLYGON_FILE = "danger_zone.json"  # Poligon kayıt dosyası
+ZONES_FILE = "zones.json"  # İsimli ek bölgeler (önem seviyesi + zorunlu KKD), isteğe bağlı
+
+# Çoklu kamera modu: birden fazla kaynak yazılırsa model tek sefer yüklenir
+# ve tüm kameralar tek batch YOLO çağrısıyla işlenir.
+# Her kameranın poligonu danger_zone_cam<i>.json dosyasından okunur.
+KAYNAKLAR = []  # Örnek: ["rtsp://kamera1/stream", "rtsp://kamera2/stream"]
+# Başsız (sunucu) mod: pencere açılmaz, kareler çizilmez; sadece risk sonuçları üretilir.
+# İhlal kanıtı gerektiğinde ilgili kare yine çizilip kaydedilir. Çıkış: Ctrl+C
+BASSIZ_MOD = False
+
+# Süreç havuzu modu: kameralar N işçi sürece bölünür (GIL yerine tüm çekirdekler kullanılır).
+# Kareler paylaşımlı bellek halkalarıyla aktarılır; çöken işçi otomatik yeniden başlatılır.
+# 0 = kapalı. KAYNAKLAR listesi (boşsa KAYNAK) kullanılır.
+ISCI_SURECI_SAYISI = 0
+
+# Pipeline modu: yakalama, çıkarım ve gösterim ayrı thread'lerde çalışır.
+# Kuyruklar sınırlıdır ve her zaman en güncel kare işlenir (eski kareler düşer).
+PIPELINE_MODU = False
+
+# Kare atlama: YOLO her N karede bir çalışır, arada kutular takipçi ile taşınır.
+# Sahnede ani hareket olursa YOLO aralık dolmadan çalıştırılır. 1 = her kare.
+DETEKSIYON_ARALIGI = 1
+# Hareket kapısı: tehlikeli bölgelerin yakınında hareket yoksa (boş saha, gece vardiyası) YOLO çalışmaz,
+# son sonuç kullanılır. Durağan sahnede bile en geç HAREKET_YENILEME karede bir tam deteksiyon yapılır.
+HAREKET_KAPISI = False
+HAREKET_YENILEME = 150
+
+# Pose ile KKD doğrulama: tehlikeli bölgedeki veya KKD güveni belirsiz kişilerin kırpıntılarında
+# MediaPipe çalışır; baret başta, yelek gövdede değilse yok sayılır. Sonuç iz başına önbelleklenir.
+POZ_DOGRULAMA = False
+
+# Olay akışı: risk değişimi, bölgeye giriş/çıkış ve onaylanan ihlaller kompakt kayıtlar olarak
+# arka planda toplu yazılır. None = kapalı.
+OLAY_JSONL_KLASORU = None   # Örnek: "events" (boyuta göre döndürülen JSONL dosyaları)
+OLAY_SQLITE = None          # Örnek: "events.db" (WAL modu, toplu ekleme)
+OLAY_HTTP_URL = None        # Örnek: "http://127.0.0.1:8080/events" (JSON dizisi POST)
+
+# Sonuç geçmişi: her karenin kompakt kaydı kamera-saat segmentlerinde sütun dosyalarına eklenir;
+# "kamera X'te şu saatler arası KRITIK aralıklar" gibi sorgular çıkarım yeniden çalıştırılmadan yapılır.
+GECMIS_KLASORU = None       # Örnek: "history"
+
+# Bölge kırpmalı çıkarım: YOLO tam kare yerine tehlikeli bölgelerin kişi boyu kadar genişletilmiş
+# kutusunda çalışır (geniş açılı kamera + küçük bölge = daha az piksel, uzaktaki kişiler daha büyük).
+# Bölge dışındaki kişiler tespit edilmez. Karo boyutu verilirse büyük kırpıntılar karolara bölünür.
+BOLGE_KIRPMA = False
+KIRPMA_KARO_BOYUTU = None   # Örnek: 416
+
+# Yük kontrolü: kamera başına yakalamadan sonuca gecikmenin p95'i hedefi aşarsa kalite kademeli düşürülür
+# (çıkarım çözünürlüğü, deteksiyon aralığı, ORB özellik sayısı, çizim detayı); pay oluşunca geri verilir.
+# Önce önceliği düşük kameralar düşürülür. None = kapalı.
+GECIKME_HEDEFI_MS = None   # Örnek: 200
+KAMERA_ONCELIKLERI = {}    # Örnek: {"cam0": 2, "cam1": 1} (büyük = önemli, varsayılan 0)
+
+# İhlal kanıt kaydı (arka planda yazılır). Klip için ihlal öncesi/sonrası kare sayısı.
+JPEG_KALITESI = 90
+KLIP_ONCESI_KARE = 0   # Örnek: 45 (15 fps'de 3 saniye)
+KLIP_SONRASI_KARE = 0
+
+# Video okuma: "opencv" (cv2.VideoCapture) veya "ffmpeg" (çok thread'li decode,
+# decoder tarafında ölçekleme ve FPS düşürme). RTSP koparsa artan beklemeyle yeniden bağlanır.
+VIDEO_BACKEND = "opencv"
+FFMPEG_THREADS = 0          # 0 = otomatik
+HEDEF_FPS = None            # Örnek: 10 (kaynak daha hızlıysa kareler decoder'da düşürülür)
+DONANIM_HIZLANDIRMA = False # Mümkünse GPU/donanım decode
+FRAME_SIZE = (854, 480)
+
+# Çıkarım arka ucu: "torch" (ultralytics/PyTorch), "onnxruntime" veya "openvino".
+# ONNX arka uçları best.pt'yi ilk çalıştırmada best.onnx'e dönüştürür (GPU'suz cihazlar için).
+YOLO_BACKEND = "torch"
+YOLO_THREADS = 0        # CPU thread sayısı, 0 = otomatik
+YOLO_INT8 = False       # ONNX Runtime için INT8 ağırlık kuantizasyonu
+# Açılışta modeli boş karede çalıştır: ilk gerçek kare graf hazırlığını beklemez.
+MODEL_ISINMA = True
+
+# Performans metrikleri: aşama süreleri (p50/p95/p99), FPS ve düşen kare sayaçları.
+# Port verilirse http://127.0.0.1:<port>/metrics adresinde Prometheus formatında sunulur.
+# Trace dosyası verilirse çıkışta chrome://tracing / Perfetto ile açılabilen JSON yazılır.
+METRIK_PORTU = None      # Örnek: 9108
+TRACE_DOSYASI = None     # Örnek: "guardian_trace.json"
+
+# Canlı önizleme: cv2 penceresi yerine http://127.0.0.1:<port>/ adresinden MJPEG yayın.
+# Kareler sadece izleyicisi olan kameralar için, izleyicinin seçtiği fps/genişlikte çizilip kodlanır.
+# Poligon çizme/kilitleme/kaydetme tarayıcıdan (POST /api/cameras/<kamera>/<komut>) yapılır.
+# Masaüstü gerekmez; çıkış: Ctrl+C. None = cv2.imshow penceresi.
+ONIZLEME_PORTU = None    # Örnek: 8090
 
 # --- Global Değişkenler ---
 polygon_points = []
@@ -61,29 +153,69 @@ def mouse_callback(event, x, y, flags, param):
             removed = polygon_points.pop()
             print(f"⬅️ Son nokta silindi: {removed}")
 
-def main():
-    global polygon_points, is_locked
-    
+def source_options():
+    """Global ayarlardaki video okuma seçeneklerini döndürür."""
+    options = {"backend": VIDEO_BACKEND, "target_fps": HEDEF_FPS, "hw_accel": DONANIM_HIZLANDIRMA}
+    if VIDEO_BACKEND == "ffmpeg":
+        options["threads"] = FFMPEG_THREADS
+    return options
+
+def detector_options():
+    """Global ayarlardaki YOLO arka uç seçeneklerini döndürür."""
+    if YOLO_BACKEND == "torch":
+        return {}
+    return {"backend": YOLO_BACKEND, "threads": YOLO_THREADS, "int8": YOLO_INT8}
+
+def open_source(source):
+    """Kaynağı seçili arka uçla açar; açılamazsa None döndürür."""
     try:
-        processor = GuardianProcessor(YOLO_MODEL_PATH)
+        frame_source = open_frame_source(source, FRAME_SIZE, **source_options())
     except Exception as e:
-        print(f"❌ HATA: Guardian Processor başlatılamadı. {e}")
-        return
+        print(f"❌ Video kaynağı açılamadı: {source} ({e})")
+        return None
+    if not frame_source.isOpened():
+        print(f"❌ Video kaynağı açılamadı: {source}")
+        return None
+    return frame_source
 
-    cap = cv2.VideoCapture(KAYNAK)
-    if not cap.isOpened():
-        print(f"❌ Video kaynağı açılamadı: {KAYNAK}")
-        return
-        
-    cv2.namedWindow(WINDOW_NAME)
-    cv2.setMouseCallback(WINDOW_NAME, mouse_callback)
+def configure_processor(processor):
+    """Global ayarlardaki performans/kayıt seçeneklerini işlemciye uygular."""
+    if DETEKSIYON_ARALIGI > 1:
+        processor.set_detection_interval(DETEKSIYON_ARALIGI)
+    if HAREKET_KAPISI:
+        processor.set_motion_gating(True, refresh_interval=HAREKET_YENILEME)
+    if os.path.exists(ZONES_FILE):
+        processor.load_zones(ZONES_FILE)
+    if BOLGE_KIRPMA:
+        processor.set_zone_cropping(True, KIRPMA_KARO_BOYUTU)
+    if POZ_DOGRULAMA:
+        processor.set_pose_verification(True)
+    if JPEG_KALITESI != 90 or KLIP_ONCESI_KARE > 0 or KLIP_SONRASI_KARE > 0:
+        processor.configure_evidence(jpeg_quality=JPEG_KALITESI,
+                                     clip_pre_frames=KLIP_ONCESI_KARE,
+                                     clip_post_frames=KLIP_SONRASI_KARE)
+    if MODEL_ISINMA:
+        processor.warm_up(FRAME_SIZE)
 
-    # Kaydedilmiş poligonu yükle (ama kilitleme)
-    if os.path.exists(POLYGON_FILE):
-        with open(POLYGON_FILE, 'r') as f:
-            polygon_points = json.load(f)
-        print(f"📂 Alan yüklendi ({len(polygon_points)} nokta). Takip için 'L' tuşuna basın.")
+def quality_options():
+    """Yük kontrolü açıksa QualityController argümanlarını döndürür (kapalıysa None)."""
+    if not GECIKME_HEDEFI_MS:
+        return None
+    return {"slo_ms": GECIKME_HEDEFI_MS, "priorities": dict(KAMERA_ONCELIKLERI)}
+
+def start_quality_controller(processors):
+    """Yük kontrolü açıksa işlemcileri kaydeden kontrolcüyü oluşturur (kapalıysa None)."""
+    options = quality_options()
+    if options is None:
+        return None
+    controller = QualityController(**options)
+    for processor in processors:
+        controller.register(processor)
+    print(f"🎚️ Yük kontrolü: p95 gecikme hedefi {GECIKME_HEDEFI_MS} ms")
+    return controller
 
+def print_controls():
+    """Klavye ve fare kontrollerini konsola yazdırır."""
     print("\n" + "="*60)
     print("🎯 GUARDIAN AI - İŞ GÜVENLİĞİ SİSTEMİ")
     print("="*60)
@@ -99,79 +231,279 @@ def main():
     print("  Sağ Tık   - Tüm noktaları sil")
     print("  Orta Tık  - Son noktayı sil")
     print("="*60 + "\n")
+
+def draw_hints(annotated_frame, processor, frame_count):
+    """Kare sayacı ve çizim ipucu gibi arayüz yazılarını ekler."""
+    # Frame sayacı (Sadece full modda)
+    if processor.display_mode == "full":
+        cv2.putText(annotated_frame, f"Frame: {frame_count}", 
+                   (annotated_frame.shape[1] - 150, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+    
+    # Kullanıcı ipucu (çizim modundayken ve minimal değilse)
+    if not is_locked and processor.display_mode != "minimal":
+        hint_text = "Cizim yapin ve 'L' tusuna basin (Kilitle)"
+        cv2.putText(annotated_frame, hint_text, (20, annotated_frame.shape[0] - 20), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+def start_metrics():
+    """Metrik kaydını oluşturur; port ayarlıysa /metrics sunucusunu başlatır."""
+    metrics = MetricsRegistry(trace=bool(TRACE_DOSYASI))
+    server = None
+    if METRIK_PORTU:
+        try:
+            server = MetricsServer(metrics, port=METRIK_PORTU)
+            server.start()
+        except OSError as e:
+            print(f"⚠️ Metrik sunucusu başlatılamadı: {e}")
+    return metrics, server
+
+def stop_metrics(metrics, server):
+    """Metrik sunucusunu kapatır ve istenmişse trace dosyasını yazar."""
+    if server is not None:
+        server.stop()
+    if TRACE_DOSYASI:
+        metrics.dump_trace(TRACE_DOSYASI)
+
+def start_events():
+    """Ayarlı olay çıkışları için dağıtıcı oluşturur (hiçbiri ayarlı değilse None)."""
+    sinks = []
+    try:
+        if OLAY_JSONL_KLASORU:
+            sinks.append(JsonlSink(OLAY_JSONL_KLASORU))
+        if OLAY_SQLITE:
+            sinks.append(SqliteSink(OLAY_SQLITE))
+        if OLAY_HTTP_URL:
+            sinks.append(HttpPushSink(OLAY_HTTP_URL))
+    except Exception as e:
+        print(f"⚠️ Olay çıkışı açılamadı: {e}")
+    if not sinks:
+        return None
+    print(f"📨 Olay akışı: {', '.join(type(sink).__name__ for sink in sinks)}")
+    return EventDispatcher(sinks)
+
+def stop_events(dispatcher):
+    """Bekleyen olayları yazar ve düşen olay varsa bildirir."""
+    if dispatcher is None:
+        return
+    dispatcher.stop()
+    stats = dispatcher.stats()
+    if stats["dropped"]:
+        print(f"⚠️ Olay akışı: {stats['dropped']} olay düşürüldü.")
+
+def start_history():
+    """Geçmiş klasörü ayarlıysa sonuç deposunu açar (değilse None)."""
+    if not GECMIS_KLASORU:
+        return None
+    print(f"🗄️ Sonuç geçmişi: {GECMIS_KLASORU}")
+    return HistoryStore(GECMIS_KLASORU)
+
+def stop_history(history):
+    """Tampondaki kayıtları diske yazar."""
+    if history is not None:
+        history.close()
+        stats = history.stats()
+        if stats["dropped"] or stats["failed"]:
+            print(f"⚠️ Sonuç geçmişi: {stats['dropped']} kare düşürüldü, {stats['failed']} kare yazılamadı.")
+
+def start_preview(camera_ids):
+    """Önizleme portu ayarlıysa MJPEG sunucusunu başlatır (değilse None)."""
+    if not ONIZLEME_PORTU:
+        return None
+    try:
+        preview = PreviewServer(camera_ids, port=ONIZLEME_PORTU)
+    except OSError as e:
+        print(f"⚠️ Önizleme sunucusu başlatılamadı: {e}")
+        return None
+    preview.start()
+    return preview
+
+def apply_preview_command(command, processor, frame, polygon, polygon_file):
+    """Önizleme API'sinden gelen poligon komutunu uygular (klavye/fare kontrollerinin karşılığı)."""
+    action = command["action"]
+    payload = command["payload"]
+    reply = command["reply"]
+
+    if frame is None:
+        reply(False, "Kameradan henüz kare gelmedi")
+    elif action == "polygon":
+        if processor.tracking_enabled:
+            reply(False, "Takip aktif, önce kilidi açın")
+            return
+        try:
+            polygon[:] = [(int(x), int(y)) for x, y in payload.get("points", [])]
+        except (TypeError, ValueError):
+            reply(False, "Noktalar [[x, y], ...] biçiminde olmalı")
+            return
+        reply(True, f"{len(polygon)} nokta")
+    elif action == "lock":
+        if len(polygon) < 3:
+            reply(False, "En az 3 nokta gerekli")
+        elif processor.start_tracking(frame, polygon):
+            reply(True, "Takip başlatıldı")
+        else:
+            reply(False, "Takip başlatılamadı")
+    elif action == "unlock":
+        processor.stop_tracking()
+        polygon.clear()
+        reply(True, "Takip durduruldu")
+    elif action == "save":
+        if len(polygon) < 3:
+            reply(False, "En az 3 nokta kaydetmelisiniz")
+            return
+        with open(polygon_file, 'w') as f:
+            json.dump(polygon, f)
+        reply(True, f"Alan kaydedildi ({len(polygon)} nokta)")
+    elif action == "clear":
+        if os.path.exists(polygon_file):
+            os.remove(polygon_file)
+        processor.stop_tracking()
+        polygon.clear()
+        reply(True, "Alan silindi")
+    elif action == "display_mode":
+        if payload.get("mode") not in ("minimal", "normal", "full"):
+            reply(False, "Görünüm modu: minimal, normal veya full")
+            return
+        processor.set_display_mode(payload["mode"])
+        reply(True, payload["mode"])
+    else:
+        reply(False, f"Bilinmeyen komut: {action}")
+
+def publish_preview(preview, processor, frame, annotated_frame, data, polygon):
+    """Kareyi önizlemeye bırakır; izleyici varsa ve kare çizilmemişse burada çizilir."""
+    camera_id = processor.camera_id or "default"
+    state = {"polygon": [list(p) for p in polygon], "tracking": processor.tracking_enabled,
+             "risk_level": data["risk_level"], "frame_size": [frame.shape[1], frame.shape[0]]}
+    if preview.wants_frame(camera_id):
+        if annotated_frame is None:
+            annotated_frame = processor.annotate(frame, data, pooled=False)
+        preview.publish(camera_id, annotated_frame, state)
+    else:
+        preview.publish(camera_id, None, state)
+
+def handle_key(key, processor, frame):
+    """Klavye komutlarını uygular. Çıkış istendiyse False döndürür."""
+    global is_locked
+    
+    if key == ord('q') or key == 27:  # Q veya ESC
+        return False
+        
+    elif key == ord('l') or key == ord('L'):  # LOCK
+        if len(polygon_points) >= 3:
+            success = processor.start_tracking(frame, polygon_points)
+            if success:
+                is_locked = True
+                print("🔒 Takip başlatıldı!")
+        else:
+            print("⚠️ En az 3 nokta gerekli!")
+            
+    elif key == ord('r') or key == ord('R'):  # RESET
+        processor.stop_tracking()
+        is_locked = False
+        polygon_points.clear()
+        print("🔓 Takip durduruldu.")
+        
+    elif key == ord('m') or key == ord('M'):  # MODE SWITCH
+        modes = ["minimal", "normal", "full"]
+        current_idx = modes.index(processor.display_mode)
+        next_mode = modes[(current_idx + 1) % len(modes)]
+        processor.set_display_mode(next_mode)
+        
+    elif key == ord('s') or key == ord('S'):  # SAVE
+        if len(polygon_points) >= 3:
+            with open(POLYGON_FILE, 'w') as f:
+                json.dump(polygon_points, f)
+            print(f"💾 Alan kaydedildi ({len(polygon_points)} nokta).")
+        else:
+            print("⚠️ En az 3 nokta kaydetmelisiniz!")
+            
+    elif key == ord('c') or key == ord('C'):  # CLEAR
+        if os.path.exists(POLYGON_FILE):
+            os.remove(POLYGON_FILE)
+            print("🗑️ Kaydedilmiş alan silindi.")
+        processor.stop_tracking()
+        is_locked = False
+        polygon_points.clear()
+    
+    return True
+
+def main():
+    global polygon_points
+    
+    metrics, metrics_server = start_metrics()
+    try:
+        processor = GuardianProcessor(YOLO_MODEL_PATH, metrics=metrics, detector_options=detector_options())
+        # Model ilk kullanımda (ısınmada) yüklenir: bozuk/eksik model burada ortaya çıkar
+        configure_processor(processor)
+    except Exception as e:
+        print(f"❌ HATA: Guardian Processor başlatılamadı. {e}")
+        stop_metrics(metrics, metrics_server)
+        return
+
+    # Kaynak, arka plan servislerinden (olay/geçmiş thread'leri) önce açılır
+    cap = open_source(KAYNAK)
+    if cap is None:
+        processor.close()
+        stop_metrics(metrics, metrics_server)
+        return
+
+    events = start_events()
+    processor.set_event_dispatcher(events)
+    history = start_history()
+    processor.set_history_store(history)
+    quality = start_quality_controller([processor])
+        
+    preview = start_preview(["default"])
+    if preview is not None:
+        # Kareler sadece izleyici varken çizilir
+        processor.set_headless(True)
+    else:
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, mouse_callback)
+
+    # Kaydedilmiş poligonu yükle (ama kilitleme)
+    if os.path.exists(POLYGON_FILE):
+        with open(POLYGON_FILE, 'r') as f:
+            polygon_points = json.load(f)
+        print(f"📂 Alan yüklendi ({len(polygon_points)} nokta). Takip için 'L' tuşuna basın.")
+
+    if preview is None:
+        print_controls()
     
     frame_count = 0
     
     try:
         while True:
+            # Kaynak kareyi hedef boyutta verir; dosya sonunda başa sarar
             success, frame = cap.read()
             if not success:
-                if isinstance(KAYNAK, str):
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    continue
                 break
+            # Gecikme diğer modlardaki gibi yakalamadan sonuca ölçülür
+            captured_at = time.perf_counter()
             
             frame_count += 1
-            frame = cv2.resize(frame, (854, 480))
+            
+            # Önizleme API'sinden gelen poligon komutları kare aralarında uygulanır
+            if preview is not None:
+                for command in preview.commands():
+                    apply_preview_command(command, processor, frame, polygon_points, POLYGON_FILE)
             
             # Process frame
             annotated_frame, data = processor.process_frame(frame, polygon_points)
+            if quality is not None:
+                quality.observe(processor.camera_id, (time.perf_counter() - captured_at) * 1000)
+                quality.update()
             
-            # Frame sayacı (Sadece full modda)
-            if processor.display_mode == "full":
-                cv2.putText(annotated_frame, f"Frame: {frame_count}", 
-                           (annotated_frame.shape[1] - 150, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Kullanıcı ipucu (çizim modundayken ve minimal değilse)
-            if not is_locked and processor.display_mode != "minimal":
-                hint_text = "Cizim yapin ve 'L' tusuna basin (Kilitle)"
-                cv2.putText(annotated_frame, hint_text, (20, annotated_frame.shape[0] - 20), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+            if preview is not None:
+                publish_preview(preview, processor, frame, annotated_frame, data, polygon_points)
+                continue
             
+            draw_hints(annotated_frame, processor, frame_count)
             cv2.imshow(WINDOW_NAME, annotated_frame)
             
             key = cv2.waitKey(1) & 0xFF
-            
-            if key == ord('q') or key == 27:  # Q veya ESC
+            if not handle_key(key, processor, frame):
                 break
-                
-            elif key == ord('l') or key == ord('L'):  # LOCK
-                if len(polygon_points) >= 3:
-                    success = processor.start_tracking(frame, polygon_points)
-                    if success:
-                        is_locked = True
-                        print("🔒 Takip başlatıldı!")
-                else:
-                    print("⚠️ En az 3 nokta gerekli!")
-                    
-            elif key == ord('r') or key == ord('R'):  # RESET
-                processor.stop_tracking()
-                is_locked = False
-                polygon_points.clear()
-                print("🔓 Takip durduruldu.")
-                
-            elif key == ord('m') or key == ord('M'):  # MODE SWITCH
-                modes = ["minimal", "normal", "full"]
-                current_idx = modes.index(processor.display_mode)
-                next_mode = modes[(current_idx + 1) % len(modes)]
-                processor.set_display_mode(next_mode)
-                
-            elif key == ord('s') or key == ord('S'):  # SAVE
-                if len(polygon_points) >= 3:
-                    with open(POLYGON_FILE, 'w') as f:
-                        json.dump(polygon_points, f)
-                    print(f"💾 Alan kaydedildi ({len(polygon_points)} nokta).")
-                else:
-                    print("⚠️ En az 3 nokta kaydetmelisiniz!")
-                    
-            elif key == ord('c') or key == ord('C'):  # CLEAR
-                if os.path.exists(POLYGON_FILE):
-                    os.remove(POLYGON_FILE)
-                    print("🗑️ Kaydedilmiş alan silindi.")
-                processor.stop_tracking()
-                is_locked = False
-                polygon_points.clear()
             
             # Pencere kapatma kontrolü
             if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
@@ -183,10 +515,278 @@ def main():
         print(f"\n❌ Hata: {e}")
     finally:
         print("\n✓ Program kapatılıyor...")
+        if preview is not None:
+            preview.stop()
         cap.release()
+        processor.close()
+        stop_events(events)
+        stop_history(history)
+        stop_metrics(metrics, metrics_server)
+        cv2.destroyAllWindows()
+        cv2.waitKey(1)
+        print("✓ Kaynaklar temizlendi.")
+
+def main_pipeline():
+    """Pipeline modu: yakalama/çıkarım/gösterim aşamaları ayrı thread'lerde çalışır."""
+    global polygon_points
+    from pipeline import FramePipeline
+
+    metrics, metrics_server = start_metrics()
+    try:
+        processor = GuardianProcessor(YOLO_MODEL_PATH, metrics=metrics, detector_options=detector_options())
+        # Model ilk kullanımda (ısınmada) yüklenir: bozuk/eksik model burada ortaya çıkar
+        configure_processor(processor)
+    except Exception as e:
+        print(f"❌ HATA: Guardian Processor başlatılamadı. {e}")
+        stop_metrics(metrics, metrics_server)
+        return
+
+    # Kaynak, arka plan servislerinden (olay/geçmiş thread'leri) önce açılır
+    frame_source = open_source(KAYNAK)
+    if frame_source is None:
+        processor.close()
+        stop_metrics(metrics, metrics_server)
+        return
+
+    events = start_events()
+    processor.set_event_dispatcher(events)
+    history = start_history()
+    processor.set_history_store(history)
+    pipeline = FramePipeline(processor, frame_source, lambda: list(polygon_points),
+                             quality_controller=start_quality_controller([processor]))
+
+    preview = start_preview(["default"])
+    if preview is not None:
+        processor.set_headless(True)
+    else:
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, mouse_callback)
+
+    if os.path.exists(POLYGON_FILE):
+        with open(POLYGON_FILE, 'r') as f:
+            polygon_points = json.load(f)
+        print(f"📂 Alan yüklendi ({len(polygon_points)} nokta). Takip için 'L' tuşuna basın.")
+
+    if preview is None:
+        print_controls()
+    pipeline.start()
+    last_report = time.time()
+
+    try:
+        while pipeline.running:
+            item = pipeline.get_output()
+            if item is None:
+                continue
+
+            frame_count, frame, annotated_frame, data = item
+            if preview is not None:
+                # Komutlar ve isteğe bağlı çizim çıkarım thread'i ile çakışmasın
+                with pipeline.processor_lock:
+                    for command in preview.commands():
+                        apply_preview_command(command, processor, frame, polygon_points, POLYGON_FILE)
+                    publish_preview(preview, processor, frame, annotated_frame, data, polygon_points)
+                if time.time() - last_report > 5:
+                    print(f"📊 {pipeline.report()}")
+                    last_report = time.time()
+                continue
+
+            draw_hints(annotated_frame, processor, frame_count)
+            cv2.imshow(WINDOW_NAME, annotated_frame)
+
+            key = cv2.waitKey(1) & 0xFF
+            # Tuş komutları işlemciyi değiştirir, çıkarım thread'i ile çakışmasın
+            with pipeline.processor_lock:
+                keep_running = handle_key(key, processor, frame)
+            if not keep_running:
+                break
+
+            if time.time() - last_report > 5:
+                print(f"📊 {pipeline.report()}")
+                last_report = time.time()
+
+            if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                break
+
+    except KeyboardInterrupt:
+        print("\n⚠️ Kullanıcı tarafından durduruldu (Ctrl+C)")
+    finally:
+        print("\n✓ Program kapatılıyor...")
+        if preview is not None:
+            preview.stop()
+        pipeline.stop()
+        processor.close()
+        stop_events(events)
+        stop_history(history)
+        stop_metrics(metrics, metrics_server)
+        cv2.destroyAllWindows()
+        cv2.waitKey(1)
+        print("✓ Kaynaklar temizlendi.")
+
+def main_multi():
+    """Çoklu kamera modu: tüm kaynakları tek modelle batch halinde işler."""
+    from multi_stream import MultiStreamProcessor
+
+    sources = KAYNAKLAR or [KAYNAK]
+    polygon_files = [f"danger_zone_cam{i}.json" for i in range(len(sources))]
+    metrics, metrics_server = start_metrics()
+    try:
+        multi = MultiStreamProcessor(YOLO_MODEL_PATH, sources, FRAME_SIZE, polygon_files,
+                                     source_options=source_options(), headless=BASSIZ_MOD,
+                                     metrics=metrics, detector_options=detector_options())
+    except Exception as e:
+        print(f"❌ HATA: Çoklu kamera modu başlatılamadı. {e}")
+        stop_metrics(metrics, metrics_server)
+        return
+
+    try:
+        for processor in multi.processors:
+            configure_processor(processor)
+    except Exception as e:
+        print(f"❌ HATA: Çoklu kamera modu başlatılamadı. {e}")
+        multi.release()
+        stop_metrics(metrics, metrics_server)
+        return
+
+    events = start_events()
+    history = start_history()
+    for processor in multi.processors:
+        processor.set_event_dispatcher(events)
+        processor.set_history_store(history)
+    multi.quality_controller = start_quality_controller(multi.processors)
+
+    camera_index = {processor.camera_id: i for i, processor in enumerate(multi.processors)}
+    preview = start_preview(list(camera_index))
+    if preview is not None:
+        for processor in multi.processors:
+            processor.set_headless(True)
+    exit_hint = "Ctrl+C" if BASSIZ_MOD or preview is not None else "'Q' veya ESC"
+    print(f"🎥 Çoklu kamera modu: {len(sources)} kaynak. Çıkış için {exit_hint}.")
+    last_report = time.time()
+
+    try:
+        while multi.is_running():
+            outputs = multi.step()
+            if not outputs:
+                time.sleep(0.001)
+
+            if preview is not None:
+                for command in preview.commands():
+                    i = camera_index[command["camera_id"]]
+                    apply_preview_command(command, multi.processors[i], multi.latest_frames.get(command["camera_id"]),
+                                          multi.polygons[i], polygon_files[i])
+                for camera_id, annotated_frame, data in outputs:
+                    i = camera_index[camera_id]
+                    publish_preview(preview, multi.processors[i], multi.latest_frames[camera_id],
+                                    annotated_frame, data, multi.polygons[i])
+            elif not BASSIZ_MOD:
+                for camera_id, annotated_frame, data in outputs:
+                    cv2.imshow(f"{WINDOW_NAME} - {camera_id}", annotated_frame)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+
+            if time.time() - last_report > 5:
+                print(f"📊 Toplam FPS: {multi.aggregate_fps():.1f}")
+                last_report = time.time()
+
+    except KeyboardInterrupt:
+        print("\n⚠️ Kullanıcı tarafından durduruldu (Ctrl+C)")
+    finally:
+        print("\n✓ Program kapatılıyor...")
+        if preview is not None:
+            preview.stop()
+        multi.release()
+        stop_events(events)
+        stop_history(history)
+        stop_metrics(metrics, metrics_server)
+        cv2.destroyAllWindows()
+        cv2.waitKey(1)
+        print("✓ Kaynaklar temizlendi.")
+
+def main_sharded():
+    """Süreç havuzu modu: kameralar işçi süreçlere bölünür, olaylar tek akışta toplanır."""
+    from sharded import ShardedSupervisor
+
+    sources = KAYNAKLAR or [KAYNAK]
+    polygon_files = [f"danger_zone_cam{i}.json" for i in range(len(sources))]
+    try:
+        supervisor = ShardedSupervisor(YOLO_MODEL_PATH, sources, FRAME_SIZE, ISCI_SURECI_SAYISI, polygon_files,
+                                       source_options=source_options(), detector_options=detector_options(),
+                                       headless=BASSIZ_MOD, configure=configure_processor,
+                                       quality_options=quality_options())
+    except Exception as e:
+        print(f"❌ HATA: Süreç havuzu modu başlatılamadı. {e}")
+        return
+
+    events = start_events()
+    # İşçiler kayıtları olay kuyruğuyla gönderir, depoya tek yazıcı (ana süreç) ekler
+    history = start_history()
+    # Önizleme sadece izleme içindir (çizilmiş kareler işçilerden halka ile gelir, başsız modda yok)
+    preview = None if BASSIZ_MOD else start_preview([f"cam{i}" for i in range(len(sources))])
+    exit_hint = "Ctrl+C" if BASSIZ_MOD or preview is not None else "'Q' veya ESC"
+    print(f"🧩 Süreç havuzu modu: {len(sources)} kaynak, {len(supervisor.processes)} işçi. Çıkış için {exit_hint}.")
+    last_report = time.time()
+    last_risk = {}
+
+    try:
+        while supervisor.is_running():
+            supervisor.monitor()
+            for event in supervisor.events():
+                if event["type"] != "frame":
+                    if events is not None:
+                        events.publish(event)
+                    continue
+                if history is not None:
+                    history.append(event["record"])
+                # Risk seviyesi değişen kameraları konsola yaz
+                if last_risk.get(event["camera_id"]) != event["risk_level"]:
+                    last_risk[event["camera_id"]] = event["risk_level"]
+                    print(f"🚨 {event['camera_id']}: {event['risk_level']} - {event['alert_message']}")
+
+            if preview is not None:
+                for command in preview.commands():
+                    command["reply"](False, "Süreç havuzu modunda poligonlar danger_zone_cam<i>.json dosyalarından okunur")
+                for i in range(len(sources)):
+                    camera_id = f"cam{i}"
+                    if preview.wants_frame(camera_id):
+                        preview.publish(camera_id, supervisor.latest_annotated(i))
+            elif not BASSIZ_MOD:
+                for i in range(len(sources)):
+                    annotated_frame = supervisor.latest_annotated(i)
+                    if annotated_frame is not None:
+                        cv2.imshow(f"{WINDOW_NAME} - cam{i}", annotated_frame)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('q') or key == 27:
+                    break
+
+            if time.time() - last_report > 5:
+                dropped = supervisor.dropped_counts()
+                dropped_text = (f" | düşen olay {dropped['events']}, düşen özet {dropped['frames']}"
+                                if dropped["events"] or dropped["frames"] else "")
+                print(f"📊 Toplam FPS: {supervisor.aggregate_fps():.1f}{dropped_text}")
+                last_report = time.time()
+
+    except KeyboardInterrupt:
+        print("\n⚠️ Kullanıcı tarafından durduruldu (Ctrl+C)")
+    finally:
+        print("\n✓ Program kapatılıyor...")
+        if preview is not None:
+            preview.stop()
+        supervisor.release()
+        stop_events(events)
+        stop_history(history)
         cv2.destroyAllWindows()
         cv2.waitKey(1)
         print("✓ Kaynaklar temizlendi.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if ISCI_SURECI_SAYISI > 0:
+        main_sharded()
+    elif len(KAYNAKLAR) > 1 or BASSIZ_MOD:
+        main_multi()
+    elif PIPELINE_MODU:
+        main_pipeline()
+    else:
+        main()
\ No newline at end of file
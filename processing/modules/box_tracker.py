@@ -0,0 +1,157 @@
+import cv2
+import numpy as np
+
+def to_numpy(values):
+    """Torch tensörünü veya listeyi NumPy dizisine çevirir."""
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+def iou_matrix(boxes_a, boxes_b):
+    """İki kutu kümesi (N,4) ve (M,4) arasındaki IoU matrisini (N,M) hesaplar."""
+    boxes_a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    boxes_b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    inter_x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    inter_y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    inter_x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    inter_y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    inter_area = np.clip(inter_x2 - inter_x1, 0, None) * np.clip(inter_y2 - inter_y1, 0, None)
+
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union_area = area_a[:, None] + area_b[None, :] - inter_area
+
+    return np.where(union_area > 0, inter_area / np.maximum(union_area, 1e-6), 0.0)
+
+
+def greedy_match(ious, threshold):
+    """IoU matrisinde en yüksek değerden başlayarak bire bir eşleşmeleri (satır, sütun) döndürür."""
+    pairs = []
+    if ious.size == 0:
+        return pairs
+    
+    used_rows = set()
+    used_cols = set()
+    for flat_idx in np.argsort(-ious, axis=None):
+        row, col = np.unravel_index(flat_idx, ious.shape)
+        if ious[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((int(row), int(col)))
+    return pairs
+
+
+class TrackedBoxes:
+    """YOLO `boxes` nesnesinin xyxy/cls/conf alanlarını taklit eden hafif sınıf."""
+
+    def __init__(self, xyxy, cls, conf):
+        self.xyxy = xyxy
+        self.cls = cls
+        self.conf = conf
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class TrackedResults:
+    """Takipçinin tahmin ettiği kutuları YOLO sonucu gibi sunan sınıf."""
+
+    def __init__(self, boxes, names, orig_img):
+        self.boxes = boxes
+        self.names = names
+        self.orig_img = orig_img
+
+    def plot(self):
+        """Tahmin edilen kutuları karenin bir kopyası üzerine çizer."""
+        annotated_frame = self.orig_img.copy()
+        for box, cls_id, conf in zip(self.boxes.xyxy, self.boxes.cls, self.boxes.conf):
+            x1, y1, x2, y2 = map(int, box)
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (255, 128, 0), 2)
+            cv2.putText(annotated_frame, f"{self.names[int(cls_id)]} {conf:.2f}", (x1, y1 - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 128, 0), 1)
+        return annotated_frame
+
+
+class BoxTracker:
+    """YOLO çalışmayan karelerde kutuları sabit hız modeliyle ileri taşıyan IoU takipçisi.
+
+    Her iz (track) için kutu ve hız alpha-beta filtresi ile güncellenir;
+    bu, tam bir Kalman filtresinin sabit kazançlı hafif bir versiyonudur.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=2, alpha=0.6, beta=0.2):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        """Tüm izleri siler."""
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.velocities = np.zeros((0, 4), dtype=np.float32)
+        self.cls = np.zeros((0,), dtype=np.float32)
+        self.conf = np.zeros((0,), dtype=np.float32)
+        self.missed = np.zeros((0,), dtype=np.int32)
+        self.steps_since_update = 0
+
+    def update(self, xyxy, cls, conf):
+        """Yeni YOLO deteksiyonlarıyla izleri eşleştirir ve günceller."""
+        xyxy = to_numpy(xyxy).astype(np.float32).reshape(-1, 4)
+        cls = to_numpy(cls).astype(np.float32).reshape(-1)
+        conf = to_numpy(conf).astype(np.float32).reshape(-1)
+
+        # Önce mevcut izleri bu kareye taşı
+        predicted = self.boxes + self.velocities
+        # Artık hata son güncellemeden bu yana geçen kare sayısına bölünerek hıza eklenir
+        steps = self.steps_since_update + 1
+        self.steps_since_update = 0
+
+        matched_tracks = np.zeros(len(predicted), dtype=bool)
+        matched_dets = np.zeros(len(xyxy), dtype=bool)
+
+        if len(predicted) and len(xyxy):
+            ious = iou_matrix(predicted, xyxy)
+            # Sadece aynı sınıftaki kutular eşleşebilir
+            ious[self.cls[:, None] != cls[None, :]] = 0.0
+
+            for t, d in greedy_match(ious, self.iou_threshold):
+                matched_tracks[t] = True
+                matched_dets[d] = True
+
+                residual = xyxy[d] - predicted[t]
+                predicted[t] = predicted[t] + self.alpha * residual
+                self.velocities[t] = self.velocities[t] + self.beta * residual / steps
+                self.conf[t] = conf[d]
+                self.missed[t] = 0
+
+        self.boxes = predicted
+        self.missed[~matched_tracks] += 1
+
+        # Uzun süre görülmeyen izleri sil
+        keep = self.missed <= self.max_missed
+        self.boxes = self.boxes[keep]
+        self.velocities = self.velocities[keep]
+        self.cls = self.cls[keep]
+        self.conf = self.conf[keep]
+        self.missed = self.missed[keep]
+
+        # Eşleşmeyen deteksiyonlar yeni iz olur
+        new = ~matched_dets
+        if np.any(new):
+            self.boxes = np.vstack([self.boxes, xyxy[new]])
+            self.velocities = np.vstack([self.velocities, np.zeros((int(new.sum()), 4), dtype=np.float32)])
+            self.cls = np.concatenate([self.cls, cls[new]])
+            self.conf = np.concatenate([self.conf, conf[new]])
+            self.missed = np.concatenate([self.missed, np.zeros(int(new.sum()), dtype=np.int32)])
+
+    def predict(self):
+        """İzleri bir kare ileri taşır ve (xyxy, cls, conf) döndürür."""
+        self.boxes = self.boxes + self.velocities
+        self.steps_since_update += 1
+        visible = self.missed == 0
+        return self.boxes[visible], self.cls[visible], self.conf[visible]
@@ -0,0 +1,137 @@
+import cv2
+import json
+import numpy as np
+
+SEVERITY_ORDER = {"DUSUK": 1, "ORTA": 2, "KRITIK": 3}
+MAX_ZONES = 64  # Raster her bölge için bir bit tutar (uint64)
+_ASCII = str.maketrans("İŞĞÜÖÇ", "ISGUOC")
+
+
+def normalize_severity(severity):
+    """Önem seviyesini SEVERITY_ORDER anahtarına çevirir ("kritik", "KRİTİK" -> "KRITIK").
+
+    Bilinmeyen değer ValueError verir: yazım hatası bölgeyi sessizce düşük önemli yapmasın.
+    """
+    key = str(severity).strip().upper().translate(_ASCII)
+    if key not in SEVERITY_ORDER:
+        raise ValueError(f"Geçersiz önem seviyesi: {severity!r} (geçerli: {', '.join(SEVERITY_ORDER)})")
+    return key
+
+
+class DangerZone:
+    """İsimli tehlikeli alan: poligon (referans karede), önem seviyesi ve zorunlu KKD listesi."""
+
+    def __init__(self, name, polygon, severity="KRITIK", required_ppe=("Baret", "Yelek")):
+        self.name = name
+        self.polygon = [tuple(p) for p in polygon]
+        self.severity = normalize_severity(severity)
+        self.required_ppe = tuple(required_ppe)
+
+
+def load_zones(filename):
+    """Bölge dosyasını yükler.
+
+    Format: {"zones": [{"name": "Pres", "polygon": [[x, y], ...],
+    "severity": "KRITIK", "required_ppe": ["Baret", "Yelek"]}, ...]}
+    """
+    with open(filename, 'r') as f:
+        data = json.load(f)
+
+    zones = []
+    for i, item in enumerate(data.get("zones", [])):
+        name = item.get("name", f"alan{i + 1}")
+        try:
+            zones.append(DangerZone(name,
+                                    item["polygon"],
+                                    item.get("severity", "KRITIK"),
+                                    item.get("required_ppe", ("Baret", "Yelek"))))
+        except ValueError as e:
+            raise ValueError(f"{filename}: '{name}' bölgesi: {e}") from None
+    return zones
+
+
+class ZoneSet:
+    """Birden fazla bölgeyi bit-maskeli etiket rasterı ile indeksleyen sınıf.
+
+    Raster sadece poligonlar (homografi) değişince yeniden çizilir; kişi ayak
+    noktaları tek bir vektörel dizi indekslemesi ile O(1) bölgelere çözülür.
+    """
+
+    def __init__(self, zones=None, frame_size=(854, 480)):
+        self.zones = list(zones or [])[:MAX_ZONES - 1]
+        self.frame_size = frame_size
+        self.primary_zone = DangerZone("Tehlikeli Alan", [])
+        self.active_zones = []
+        self.active_polygons = []
+        self.raster = None
+        self.cache_key = None
+
+    def set_zones(self, zones):
+        """Yapılandırılmış bölge listesini değiştirir."""
+        self.zones = list(zones)[:MAX_ZONES - 1]
+        self.cache_key = None
+
+    def update(self, primary_polygon, homography=None, frame_shape=None):
+        """Bölgeleri bu kareye taşır ve gerekirse rasterı yeniden çizer. Taşınmış poligonları döndürür."""
+        if frame_shape is not None:
+            self.frame_size = (frame_shape[1], frame_shape[0])
+        key = (tuple(map(tuple, primary_polygon)) if primary_polygon else (),
+               None if homography is None else homography.tobytes(),
+               self.frame_size)
+        if key == self.cache_key:
+            return self.active_polygons
+
+        self.cache_key = key
+        self.active_zones = []
+        self.active_polygons = []
+
+        # Çizilen/takip edilen ana poligon zaten bu karenin koordinatlarında
+        if primary_polygon and len(primary_polygon) >= 3:
+            self.primary_zone.polygon = list(primary_polygon)
+            self.active_zones.append(self.primary_zone)
+            self.active_polygons.append(list(primary_polygon))
+
+        for zone in self.zones:
+            polygon = zone.polygon
+            if homography is not None:
+                pts = np.float32(polygon).reshape(-1, 1, 2)
+                polygon = [(int(x), int(y)) for x, y in cv2.perspectiveTransform(pts, homography).reshape(-1, 2)]
+            self.active_zones.append(zone)
+            self.active_polygons.append(polygon)
+
+        self._build_raster()
+        return self.active_polygons
+
+    def _build_raster(self):
+        """Her bölgeyi kendi bitiyle etiket rasterına çizer."""
+        width, height = self.frame_size
+        self.raster = np.zeros((height, width), dtype=np.uint64)
+        layer = np.zeros((height, width), dtype=np.uint8)
+        for bit, polygon in enumerate(self.active_polygons):
+            layer[:] = 0
+            cv2.fillPoly(layer, [np.array(polygon, np.int32)], 1)
+            self.raster[layer > 0] |= np.uint64(1 << bit)
+
+    def query(self, points):
+        """(N,2) nokta dizisi için bölge bit maskelerini (N,) döndürür."""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        if self.raster is None or len(points) == 0:
+            return np.zeros(len(points), dtype=np.uint64)
+
+        height, width = self.raster.shape
+        xs = points[:, 0]
+        ys = points[:, 1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        hits = np.zeros(len(points), dtype=np.uint64)
+        hits[inside] = self.raster[ys[inside], xs[inside]]
+        return hits
+
+    def zones_for(self, mask):
+        """Bit maskesindeki bölgeleri liste olarak döndürür."""
+        mask = int(mask)
+        return [zone for bit, zone in enumerate(self.active_zones) if mask & (1 << bit)]
+
+    def extra_polygons(self):
+        """Ana poligon dışındaki (dosyadan gelen) bölgeler: [(isim, poligon)]."""
+        return [(zone.name, polygon) for zone, polygon in zip(self.active_zones, self.active_polygons)
+                if zone is not self.primary_zone]
@@ -0,0 +1,214 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import urllib.request
+
+class EventBuilder:
+    """Kare sonuçlarındaki (raw_data) durum geçişlerini kompakt olay kayıtlarına çevirir.
+
+    Her karede değil, sadece değişimde olay üretir: kamera risk seviyesi
+    değişimi, kişinin bölgeye girişi/çıkışı ve onaylanan yeni ihlal.
+    """
+
+    def __init__(self):
+        self.last_risk = {}   # kamera -> risk seviyesi
+        self.last_zones = {}  # (kamera, track_id) -> bölge isimleri
+
+    @staticmethod
+    def _record(event_type, camera_id, timestamp, person=None, **extra):
+        record = {"type": event_type, "camera_id": camera_id, "timestamp": timestamp}
+        if person is not None:
+            record.update({
+                "track_id": person.get("track_id"),
+                "zones": person.get("zones", []),
+                "missing_ppe": person.get("missing_ppe", []),
+                "severity": person.get("severity"),
+                "box": list(person["box"]),
+            })
+        record.update(extra)
+        return record
+
+    def update(self, raw_data, timestamp=None):
+        """Bu karenin sonucundan üretilen olay listesini döndürür."""
+        timestamp = time.time() if timestamp is None else timestamp
+        camera_id = raw_data.get("camera_id") or "default"
+        events = []
+
+        risk_level = raw_data["risk_level"]
+        previous = self.last_risk.get(camera_id)
+        if risk_level != previous:
+            self.last_risk[camera_id] = risk_level
+            events.append(self._record("risk_change", camera_id, timestamp, risk_level=risk_level,
+                                       previous_risk=previous, message=raw_data["alert_message"]))
+
+        seen = set()
+        for person in raw_data["persons"]:
+            track_id = person.get("track_id")
+            if track_id is None:
+                continue
+            key = (camera_id, track_id)
+            seen.add(key)
+            zones = tuple(person.get("zones", ()))
+            previous_zones = self.last_zones.get(key, ())
+            if zones != previous_zones:
+                if set(zones) - set(previous_zones):
+                    events.append(self._record("zone_enter", camera_id, timestamp, person))
+                if set(previous_zones) - set(zones):
+                    events.append(self._record("zone_exit", camera_id, timestamp, person,
+                                               left_zones=sorted(set(previous_zones) - set(zones))))
+                self.last_zones[key] = zones
+            if person.get("violation_new"):
+                events.append(self._record("violation", camera_id, timestamp, person, risk_level=risk_level))
+
+        # Kaybolan izler
+        for key in [k for k in self.last_zones if k[0] == camera_id and k not in seen]:
+            del self.last_zones[key]
+        return events
+
+
+class JsonlSink:
+    """Olayları boyuta göre döndürülen JSONL dosyalarına yazar (events.jsonl, events.1.jsonl, ...)."""
+
+    def __init__(self, directory="events", filename="events.jsonl", max_bytes=50 * 1024 * 1024, max_files=10):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, filename)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self.file.close()
+        base, ext = os.path.splitext(self.path)
+        for i in range(self.max_files - 1, 0, -1):
+            src = self.path if i == 1 else f"{base}.{i - 1}{ext}"
+            if os.path.exists(src):
+                os.replace(src, f"{base}.{i}{ext}")
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def write_batch(self, events):
+        self.file.write("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events))
+        self.file.flush()
+        if self.file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        self.file.close()
+
+
+class SqliteSink:
+    """Olayları WAL modundaki SQLite veritabanına toplu (executemany) ekler."""
+
+    def __init__(self, path="events.db"):
+        # Bağlantı yazıcı thread'inde kullanılır
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL, camera_id TEXT, type TEXT, "
+            "track_id INTEGER, zones TEXT, missing_ppe TEXT, severity TEXT, box TEXT, payload TEXT)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS events_time ON events (camera_id, timestamp)")
+        self.connection.commit()
+
+    def write_batch(self, events):
+        rows = [(e["timestamp"], e["camera_id"], e["type"], e.get("track_id"),
+                 json.dumps(e.get("zones", []), ensure_ascii=False),
+                 json.dumps(e.get("missing_ppe", []), ensure_ascii=False),
+                 e.get("severity"), json.dumps(e.get("box")), json.dumps(e, ensure_ascii=False))
+                for e in events]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO events (timestamp, camera_id, type, track_id, zones, missing_ppe, severity, box, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        self.connection.close()
+
+
+class HttpPushSink:
+    """Olay gruplarını JSON dizisi olarak bir HTTP uç noktasına POST eder."""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def write_batch(self, events):
+        body = json.dumps(events, ensure_ascii=False).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def close(self):
+        pass
+
+
+class EventDispatcher:
+    """Olayları sınırlı kuyruktan alıp gruplar halinde sink'lere yazan arka plan thread'i.
+
+    `publish` asla beklemez: kuyruk doluysa olay düşürülür ve sayılır. Bir
+    sink'in hatası diğerlerini ve kare döngüsünü etkilemez.
+    """
+
+    def __init__(self, sinks, max_queue=10000, batch_size=200, flush_interval=0.5):
+        self.sinks = list(sinks)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.published = 0
+        self.dropped = 0
+        self.failed = {type(sink).__name__: 0 for sink in self.sinks}
+        self.running = True
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def publish(self, event):
+        """Olayı kuyruğa koyar (bloklamaz)."""
+        try:
+            self.queue.put_nowait(event)
+            self.published += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        while self.running or not self.queue.empty():
+            batch = []
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+            except Exception as e:
+                name = type(sink).__name__
+                self.failed[name] += 1
+                if self.failed[name] in (1, 10, 100) or self.failed[name] % 1000 == 0:
+                    print(f"⚠️ Olay çıkışı hatası ({name}): {e}")
+
+    def stats(self):
+        """Yayınlanan, düşürülen ve sink başına başarısız grup sayıları."""
+        return {"published": self.published, "dropped": self.dropped, "queued": self.queue.qsize(),
+                "failed": dict(self.failed)}
+
+    def stop(self):
+        """Kalan olayları yazar ve sink'leri kapatır."""
+        self.running = False
+        self.thread.join(timeout=5.0)
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
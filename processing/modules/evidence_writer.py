@@ -0,0 +1,126 @@
+import cv2
+import queue
+import threading
+from collections import deque
+
+class EvidenceWriter:
+    """İhlal fotoğraflarını ve kısa video kliplerini arka plan thread'inde diske yazan sınıf.
+
+    `submit` ve `add_frame` asla beklemez; kuyruk doluysa kayıt düşürülür
+    ve `dropped` sayacı artar.
+    """
+
+    def __init__(self, jpeg_quality=90, max_queue=32, clip_pre_frames=0, clip_post_frames=0, clip_fps=15):
+        self.jpeg_quality = jpeg_quality
+        self.clip_pre_frames = clip_pre_frames
+        self.clip_post_frames = clip_post_frames
+        self.clip_fps = clip_fps
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.ring_buffer = deque(maxlen=max(clip_pre_frames, 1))
+        self.pending_clips = []  # [(kayıt yolu, kare listesi, kalan post kare sayısı)]
+
+        # Metrikler
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def clips_enabled(self):
+        """Klip kaydı açık mı?"""
+        return self.clip_pre_frames > 0 or self.clip_post_frames > 0
+
+    def _enqueue(self, item):
+        """Kuyruğa beklemeden ekler, doluysa kaydı düşürür."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def submit(self, save_path, frame, clip_path=None):
+        """İhlal karesini kayıt için kuyruğa ekler; istenirse klip kaydını da başlatır."""
+        queued = self._enqueue(("image", save_path, frame))
+
+        if clip_path and self.clips_enabled():
+            frames = list(self.ring_buffer)
+            self.pending_clips.append([clip_path, frames, self.clip_post_frames])
+            self._flush_ready_clips()
+        return queued
+
+    def add_frame(self, frame):
+        """Halka belleğe son kareyi ekler ve bekleyen kliplerin sonrası karelerini toplar."""
+        if not self.clips_enabled():
+            return
+
+        self.ring_buffer.append(frame)
+        for clip in self.pending_clips:
+            if clip[2] > 0:
+                clip[1].append(frame)
+                clip[2] -= 1
+        self._flush_ready_clips()
+
+    def _flush_ready_clips(self):
+        """Sonrası kareleri tamamlanan klipleri yazma kuyruğuna taşır."""
+        ready = [clip for clip in self.pending_clips if clip[2] <= 0]
+        self.pending_clips = [clip for clip in self.pending_clips if clip[2] > 0]
+        for clip_path, frames, _ in ready:
+            self._enqueue(("clip", clip_path, frames))
+
+    def _writer_loop(self):
+        """Kuyruktaki kayıtları sırayla JPEG/MP4 olarak diske yazar."""
+        while self.running or not self.queue.empty():
+            try:
+                kind, path, payload = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            try:
+                if kind == "image":
+                    ok = cv2.imwrite(path, payload, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                else:
+                    ok = self._write_clip(path, payload)
+                if ok:
+                    self.written += 1
+                else:
+                    self.failed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️ Kanıt kaydı yazılamadı ({path}): {e}")
+
+    def _write_clip(self, path, frames):
+        """Kare listesini MP4 klip olarak yazar."""
+        if not frames:
+            return False
+        height, width = frames[0].shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.clip_fps, (width, height))
+        for frame in frames:
+            writer.write(frame)
+        writer.release()
+        return True
+
+    def queued(self):
+        """Yazılmayı bekleyen kayıt sayısı."""
+        return self.queue.qsize()
+
+    def stats(self):
+        """Yazıcı metriklerini sözlük olarak döndürür."""
+        return {
+            "queued": self.queued(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending_clips": len(self.pending_clips)
+        }
+
+    def stop(self):
+        """Bekleyen kliplerin eldeki karelerini de kuyruğa alıp thread'i kapatır."""
+        for clip_path, frames, _ in self.pending_clips:
+            self._enqueue(("clip", clip_path, frames))
+        self.pending_clips = []
+        self.running = False
+        self.thread.join(timeout=5.0)
@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+
+class BufferRing:
+    """Sabit sayıda önceden ayrılmış diziyi sırayla yeniden kullanan halka.
+
+    Bir tampon, halka bir tur dönene kadar (count - 1 sonraki çağrı) geçerli
+    kalır; kuyruklarda bekleyen kare sayısından büyük seçilmelidir.
+    """
+
+    def __init__(self, count):
+        self.count = count
+        self.buffers = [None] * count
+        self.index = 0
+
+    def next(self, shape, dtype=np.uint8):
+        """Sıradaki tamponu döndürür (boyut değiştiyse yeniden ayırır)."""
+        buffer = self.buffers[self.index]
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[self.index] = buffer
+        self.index = (self.index + 1) % self.count
+        return buffer
+
+
+class FrameBuffers:
+    """Kamera başına kare tamponları: gri/RGB dönüşümleri karede bir kez yapılır ve paylaşılır.
+
+    `begin(frame, seq)` her karenin başında çağrılır; `gray()`, `rgb()` ve
+    `small_gray()` ilk istendiklerinde `dst=` ile hazır tampona hesaplanır.
+    Gri/RGB tamponları bir sonraki karede üzerine yazılır; saklanacaksa kopyalanmalıdır.
+    """
+
+    def __init__(self, annotated_count=4, small_size=(160, 90)):
+        self.small_size = small_size
+        self.annotated_ring = BufferRing(annotated_count)
+        self.frame = None
+        self.seq = None
+        self._gray = None
+        self._rgb = None
+        self._small_gray = None
+        self._valid = set()
+
+    def begin(self, frame, seq):
+        """`seq` numaralı kareye geçer; önceki karenin dönüşümleri geçersiz olur.
+
+        Aynı kare numarasıyla tekrar çağrılırsa (aynı karedeki sonraki aşamalar)
+        hesaplanmış dönüşümler korunur. Kaynaklar tamponları yeniden kullandığı
+        için nesne kimliğine güvenilmez: farklı kareler aynı dizi nesnesi olabilir.
+        """
+        if seq == self.seq and frame is self.frame:
+            return
+        self.frame = frame
+        self.seq = seq
+        self._valid.clear()
+
+    def _ensure(self, buffer, shape):
+        """Tampon yoksa veya boyutu değiştiyse yeniden ayırır."""
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def gray(self):
+        """Karenin gri tonlama hali (karede bir kez hesaplanır)."""
+        if "gray" not in self._valid:
+            self._gray = self._ensure(self._gray, self.frame.shape[:2])
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+            self._valid.add("gray")
+        return self._gray
+
+    def rgb(self):
+        """Karenin RGB hali (MediaPipe için, karede bir kez hesaplanır)."""
+        if "rgb" not in self._valid:
+            self._rgb = self._ensure(self._rgb, self.frame.shape)
+            cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            self._valid.add("rgb")
+        return self._rgb
+
+    def small_gray(self):
+        """Hareket kontrolleri için küçültülmüş gri kare."""
+        if "small_gray" not in self._valid:
+            width, height = self.small_size
+            self._small_gray = self._ensure(self._small_gray, (height, width))
+            cv2.resize(self.gray(), self.small_size, dst=self._small_gray, interpolation=cv2.INTER_AREA)
+            self._valid.add("small_gray")
+        return self._small_gray
+
+    def annotated_copy(self, frame):
+        """Çizim için karenin kopyasını halkadaki hazır tampona alır."""
+        buffer = self.annotated_ring.next(frame.shape, frame.dtype)
+        np.copyto(buffer, frame)
+        return buffer
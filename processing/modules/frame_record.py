@@ -0,0 +1,91 @@
+import numpy as np
+
+# Risk seviyeleri küçük tamsayı kodlarıyla saklanır (sıra önemli: büyük = daha riskli)
+RISK_LEVELS = ("GUVENDE", "DUSUK", "ORTA", "KRITIK")
+RISK_CODES = {level: code for code, level in enumerate(RISK_LEVELS)}
+SEVERITY_LEVELS = (None, "DUSUK", "ORTA", "KRITIK")
+SEVERITY_CODES = {level: code for code, level in enumerate(SEVERITY_LEVELS)}  # Bilinmeyen seviye = 0
+
+# Eksik KKD bitleri
+MISSING_BITS = {"Baret": 1, "Yelek": 2}
+
+# Kişi bayrakları
+HAS_HELMET = 1
+HAS_VEST = 2
+IN_DANGER = 4
+VIOLATION_CONFIRMED = 8
+VIOLATION_NEW = 16
+
+# Kişi başına sabit boyutlu kayıt (47 bayt). `zones` bölge bit maskesidir,
+# bit sırası kaydın `zone_names` listesine göredir.
+PERSON_DTYPE = np.dtype([
+    ("track_id", np.int32),      # -1 = iz yok
+    ("box", np.int32, (4,)),
+    ("foot", np.int32, (2,)),
+    ("helmet_conf", np.float32),
+    ("vest_conf", np.float32),
+    ("zones", np.uint64),
+    ("missing", np.uint8),
+    ("severity", np.int8),
+    ("flags", np.uint8),
+])
+
+
+class FrameRecord:
+    """Bir karenin sonucunun kompakt hali: risk kodu + kişi başına yapılandırılmış dizi satırı.
+
+    `raw_data` (ultralytics Results nesnesi ve dict listeleri) yerine saklamak,
+    kopyalamak ve süreçler arası göndermek için kullanılır.
+    """
+
+    __slots__ = ("camera_id", "timestamp", "risk", "persons", "zone_names")
+
+    def __init__(self, camera_id, timestamp, risk, persons, zone_names=()):
+        self.camera_id = camera_id
+        self.timestamp = timestamp
+        self.risk = risk                    # RISK_LEVELS indeksi
+        self.persons = persons              # PERSON_DTYPE dizisi
+        self.zone_names = tuple(zone_names)
+
+    @classmethod
+    def from_persons(cls, camera_id, timestamp, risk_level, persons, zone_hits, zone_names):
+        """process_detections'taki kişi dict'lerinden ve bölge bit maskelerinden kayıt oluşturur."""
+        table = np.zeros(len(persons), dtype=PERSON_DTYPE)
+        if persons:
+            table["track_id"] = [-1 if p.get("track_id") is None else p["track_id"] for p in persons]
+            table["box"] = [p["box"] for p in persons]
+            table["foot"] = [p["foot"] for p in persons]
+            table["helmet_conf"] = [p["helmet_conf"] for p in persons]
+            table["vest_conf"] = [p["vest_conf"] for p in persons]
+            table["zones"] = zone_hits
+            table["missing"] = [sum(MISSING_BITS.get(name, 0) for name in p.get("missing_ppe", ()))
+                                for p in persons]
+            table["severity"] = [SEVERITY_CODES.get(p.get("severity"), 0) for p in persons]
+            table["flags"] = [(HAS_HELMET if p["has_helmet"] else 0) | (HAS_VEST if p["has_vest"] else 0) |
+                              (VIOLATION_CONFIRMED if p.get("violation_confirmed") else 0) |
+                              (VIOLATION_NEW if p.get("violation_new") else 0)
+                              for p in persons]
+            table["flags"][table["zones"] != 0] |= IN_DANGER
+        return cls(camera_id, timestamp, RISK_CODES[risk_level], table, zone_names)
+
+    @property
+    def risk_level(self):
+        return RISK_LEVELS[self.risk]
+
+    def in_danger(self):
+        """Tehlikeli bölgedeki kişilerin satırları."""
+        return self.persons[(self.persons["flags"] & IN_DANGER) != 0]
+
+    def violations(self, new_only=False):
+        """Eksik KKD'si olan bölgedeki kişiler (new_only: bu karede onaylanan ihlaller)."""
+        flag = VIOLATION_NEW if new_only else IN_DANGER
+        return self.persons[((self.persons["flags"] & flag) != 0) & (self.persons["missing"] != 0)]
+
+    def zones_of(self, row):
+        """Bir kişi satırının bulunduğu bölgelerin isimleri."""
+        mask = int(row["zones"])
+        return [name for bit, name in enumerate(self.zone_names) if mask & (1 << bit)]
+
+    def nbytes(self):
+        """Kişi tablosunun bellekteki boyutu (bayt)."""
+        return self.persons.nbytes
@@ -0,0 +1,225 @@
+import cv2
+import numpy as np
+import shutil
+import subprocess
+import time
+from modules.frame_buffers import BufferRing
+
+def is_network_source(source):
+    """Kaynak ağ üzerinden canlı yayın mı? (rtsp/http adresi; koparsa yeniden bağlanılır)"""
+    if isinstance(source, int):
+        return False
+    return str(source).lower().startswith(("rtsp://", "rtmp://", "http://", "https://"))
+
+
+class OpenCVFrameSource:
+    """cv2.VideoCapture tabanlı kaynak: kareleri hedef boyutta ve hızda döndürür.
+
+    Decode ve resize çıktıları önceden ayrılmış tamponlara yazılır; dönen kare
+    `buffer_count - 1` okuma boyunca geçerlidir. İşlemeden bağımsız okuyan
+    thread'ler kareyi kopyalayarak devretmelidir.
+    """
+
+    def __init__(self, source, frame_size=(854, 480), target_fps=None, loop=True,
+                 hw_accel=False, reconnect_delay=1.0, max_reconnect_delay=30.0, buffer_count=6):
+        self.source = source
+        self.frame_size = frame_size
+        self.target_fps = target_fps
+        self.loop = loop
+        self.hw_accel = hw_accel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.skip = 0
+        self.cap = None
+        self.closed = False
+        self.frames = BufferRing(buffer_count)
+        self.raw_frame = None  # Tam çözünürlüklü decode tamponu (her okumada yeniden kullanılır)
+        self._open()
+
+    def _open(self):
+        """VideoCapture'ı (mümkünse donanım hızlandırmalı) açar."""
+        # Donanım hızlandırma FFmpeg arka ucu ister; webcam indeksleri bu arka uçla açılamaz
+        if self.hw_accel and not isinstance(self.source, int):
+            self.cap = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG,
+                                        [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+        else:
+            self.cap = cv2.VideoCapture(self.source)
+
+        # Kaynak FPS'i hedeften yüksekse aradaki kareler grab() ile atlanır (decode edilir ama işlenmez)
+        self.skip = 0
+        source_fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap.isOpened() else 0
+        if self.target_fps and source_fps and source_fps > self.target_fps:
+            self.skip = int(round(source_fps / self.target_fps)) - 1
+
+    def isOpened(self):
+        """Kaynak açık mı?"""
+        return self.cap is not None and self.cap.isOpened()
+
+    def _reconnect(self):
+        """Canlı yayın koptuğunda artan bekleme süresiyle, kare gelene veya kaynak kapatılana kadar yeniden bağlanır."""
+        delay = self.reconnect_delay
+        while not self.closed:
+            print(f"🔄 Kaynağa yeniden bağlanılıyor: {self.source} ({delay:.0f} sn)")
+            self.cap.release()
+            time.sleep(delay)
+            if self.closed:
+                break
+            self._open()
+            if self.isOpened():
+                success, frame = self._read_raw()
+                if success:
+                    return True, frame
+            delay = min(delay * 2, self.max_reconnect_delay)
+        return False, None
+
+    def _read_raw(self):
+        """Decode edilmiş kareyi yeniden kullanılan tampona okur."""
+        success, frame = self.cap.read(self.raw_frame)
+        if success:
+            self.raw_frame = frame
+        return success, frame
+
+    def read(self):
+        """(success, frame) döndürür; frame hedef boyuttadır."""
+        for _ in range(self.skip):
+            self.cap.grab()
+
+        success, frame = self._read_raw()
+        if not success:
+            # Dosya sonu: başa sar / Ağ yayını koptu: yeniden bağlan / Kamera: dur
+            if is_network_source(self.source):
+                success, frame = self._reconnect()
+            elif self.loop and not isinstance(self.source, int):
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                success, frame = self._read_raw()
+            if not success:
+                return False, None
+
+        width, height = self.frame_size
+        output = self.frames.next((height, width, 3))
+        if (frame.shape[1], frame.shape[0]) != (width, height):
+            cv2.resize(frame, self.frame_size, dst=output)
+        else:
+            np.copyto(output, frame)
+        return True, output
+
+    def release(self):
+        """Kaynağı serbest bırakır (süren yeniden bağlanma denemesi de biter)."""
+        self.closed = True
+        if self.cap is not None:
+            self.cap.release()
+
+
+class FFmpegFrameSource:
+    """FFmpeg alt süreci ile decode: çok thread'li decode, decoder tarafında ölçekleme ve FPS düşürme.
+
+    Kareler doğrudan hedef boyutta BGR24 olarak stdout'tan okunur; Python
+    tarafında tam çözünürlüklü kare ve ayrı bir resize adımı oluşmaz.
+    """
+
+    def __init__(self, source, frame_size=(854, 480), target_fps=None, loop=True, threads=0,
+                 hw_accel=False, reconnect_delay=1.0, max_reconnect_delay=30.0, buffer_count=6):
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg bulunamadı (PATH içinde olmalı)")
+
+        self.source = source
+        self.frame_size = frame_size
+        self.target_fps = target_fps
+        self.loop = loop
+        self.threads = threads
+        self.hw_accel = hw_accel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.frame_bytes = frame_size[0] * frame_size[1] * 3
+        self.frames = BufferRing(buffer_count)
+        self.process = None
+        self.closed = False
+        self._open()
+
+    def _command(self):
+        """FFmpeg komut satırını oluşturur."""
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.hw_accel:
+            cmd += ["-hwaccel", "auto"]
+        cmd += ["-threads", str(self.threads)]
+        if str(self.source).lower().startswith("rtsp://"):
+            cmd += ["-rtsp_transport", "tcp"]
+        if isinstance(self.source, int):
+            cmd += ["-f", "v4l2", "-i", f"/dev/video{self.source}"]
+        else:
+            cmd += ["-i", str(self.source)]
+
+        filters = []
+        if self.target_fps:
+            filters.append(f"fps={self.target_fps}")
+        filters.append(f"scale={self.frame_size[0]}:{self.frame_size[1]}")
+        cmd += ["-vf", ",".join(filters), "-an", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+        return cmd
+
+    def _open(self):
+        """FFmpeg sürecini başlatır."""
+        self.process = subprocess.Popen(self._command(), stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, bufsize=self.frame_bytes * 2)
+
+    def isOpened(self):
+        """FFmpeg süreci çalışıyor mu?"""
+        return self.process is not None and self.process.poll() is None
+
+    def _close(self):
+        """FFmpeg sürecini sonlandırır."""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def _read_raw(self):
+        """Bir karelik ham byte'ı doğrudan halkadaki kare tamponuna okur (eksikse None)."""
+        frame = self.frames.next((self.frame_size[1], self.frame_size[0], 3))
+        view = memoryview(frame.reshape(-1))
+        filled = 0
+        while filled < self.frame_bytes:
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return None
+            filled += count
+        return frame
+
+    def read(self):
+        """(success, frame) döndürür; frame hedef boyuttadır."""
+        frame = self._read_raw()
+        if frame is not None:
+            return True, frame
+
+        if is_network_source(self.source):
+            delay = self.reconnect_delay
+            while frame is None and not self.closed:
+                print(f"🔄 Kaynağa yeniden bağlanılıyor: {self.source} ({delay:.0f} sn)")
+                self._close()
+                time.sleep(delay)
+                if self.closed:
+                    break
+                self._open()
+                frame = self._read_raw()
+                delay = min(delay * 2, self.max_reconnect_delay)
+            return (True, frame) if frame is not None else (False, None)
+
+        if self.loop and not isinstance(self.source, int):
+            self._close()
+            self._open()
+            frame = self._read_raw()
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        """FFmpeg sürecini kapatır (süren yeniden bağlanma denemesi de biter)."""
+        self.closed = True
+        self._close()
+
+
+def open_frame_source(source, frame_size=(854, 480), backend="opencv", **kwargs):
+    """Seçilen arka uçla kare kaynağı oluşturur ("opencv" veya "ffmpeg")."""
+    if backend == "ffmpeg":
+        return FFmpegFrameSource(source, frame_size, **kwargs)
+    kwargs.pop("threads", None)
+    return OpenCVFrameSource(source, frame_size, **kwargs)
@@ -0,0 +1,288 @@
+import calendar
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from modules.frame_record import PERSON_DTYPE, RISK_CODES
+
+# Kare satırı: zaman + risk kodu + sayaçlar
+FRAME_DTYPE = np.dtype([
+    ("timestamp", np.float64),
+    ("risk", np.int8),
+    ("persons", np.uint16),
+    ("in_danger", np.uint16),
+    ("violations", np.uint16),
+])
+
+# Kişi satırı: kaydın kişi alanları + kare zamanı (bölge maskesi kamera geneli isim listesine göre)
+PERSON_ROW_DTYPE = np.dtype([("timestamp", np.float64)] + PERSON_DTYPE.descr)
+
+SEGMENT_FORMAT = "%Y%m%d%H"  # Kamera-saat segmentleri (UTC)
+
+
+def _segment_key(timestamp):
+    return time.strftime(SEGMENT_FORMAT, time.gmtime(timestamp))
+
+
+def _segment_start(key):
+    return calendar.timegm(time.strptime(key, SEGMENT_FORMAT))
+
+
+class HistoryStore:
+    """Kare kayıtlarını kamera-saat segmentlerinde sütun dosyalarına ekleyen geçmiş deposu.
+
+    Düzen: `<klasör>/<kamera>/<YYYYmmddHH>/{frames,persons}.<alan>.bin`. Her
+    alan ayrı bir ham dizi dosyasıdır; yazma sadece sona eklemedir, okuma
+    np.memmap ile yapılır (yarım kalan son satır yok sayılır). Çıkarım
+    yeniden çalıştırılmadan zaman aralığı ve risk seviyesi sorguları yapılır.
+
+    `append` sadece tamponlar; dolan tamponlar arka plan thread'inde diske
+    yazılır. Yazma kuyruğu doluysa tampon düşürülür ve `dropped` sayacı artar.
+    """
+
+    def __init__(self, directory="history", flush_rows=256, max_queue=64):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.lock = threading.Lock()
+        self.pending = {}      # kamera -> {"segment", "frames": [], "persons": []}
+        self.zone_names = {}   # kamera -> bölge isimleri (bit sırası, sadece büyür)
+        os.makedirs(directory, exist_ok=True)
+
+        # Metrikler (satır sayısı)
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        # Yazıcı thread ilk yazmada başlar (sadece okuma yapan sorgularda açılmaz)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.running = True
+        self.thread = None
+
+    # --- Yazma ---
+
+    def append(self, record):
+        """FrameRecord'u tampona ekler; tampon dolunca veya saat değişince diske yazar."""
+        camera_id = record.camera_id or "default"
+        segment = _segment_key(record.timestamp)
+        persons = record.persons
+        frame_row = (record.timestamp, record.risk, len(persons),
+                     int(np.count_nonzero(persons["zones"])), len(record.violations()))
+
+        with self.lock:
+            buffer = self.pending.get(camera_id)
+            if buffer is not None and buffer["segment"] != segment:
+                self._flush_camera(camera_id, block=False)
+                buffer = None
+            if buffer is None:
+                buffer = self.pending[camera_id] = {"segment": segment, "frames": [], "persons": []}
+
+            buffer["frames"].append(frame_row)
+            if len(persons):
+                rows = np.empty(len(persons), dtype=PERSON_ROW_DTYPE)
+                for name in PERSON_DTYPE.names:
+                    rows[name] = persons[name]
+                rows["timestamp"] = record.timestamp
+                rows["zones"] = self._remap_zones(camera_id, persons["zones"], record.zone_names)
+                buffer["persons"].append(rows)
+
+            if len(buffer["frames"]) >= self.flush_rows:
+                self._flush_camera(camera_id, block=False)
+
+    def _camera_zone_names(self, camera_id):
+        if camera_id not in self.zone_names:
+            path = os.path.join(self.directory, camera_id, "zones.json")
+            names = []
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    names = json.load(f)
+            self.zone_names[camera_id] = names
+        return self.zone_names[camera_id]
+
+    def _remap_zones(self, camera_id, masks, record_names):
+        """Kaydın bölge bitlerini kameranın kalıcı isim listesindeki bitlere çevirir."""
+        if not record_names or not masks.any():
+            return masks
+        names = self._camera_zone_names(camera_id)
+        remapped = np.zeros_like(masks)
+        changed = False
+        for bit, name in enumerate(record_names):
+            hits = (masks >> np.uint64(bit)) & np.uint64(1)
+            if not hits.any():
+                continue
+            if name not in names:
+                if len(names) >= 64:
+                    continue
+                names.append(name)
+                changed = True
+            remapped |= hits << np.uint64(names.index(name))
+        if changed:
+            self._write_zone_names(camera_id, names)
+        return remapped
+
+    def _write_zone_names(self, camera_id, names):
+        folder = os.path.join(self.directory, camera_id)
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = os.path.join(folder, "zones.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(names, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(folder, "zones.json"))
+
+    def _flush_camera(self, camera_id, block=True):
+        """Kameranın tamponunu yazıcı kuyruğuna taşır (block=False: kuyruk doluysa düşürür)."""
+        buffer = self.pending.pop(camera_id, None)
+        if buffer is None or not buffer["frames"]:
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self.thread.start()
+        job = (camera_id, buffer)
+        if block:
+            self.queue.put(job)
+            return
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.dropped += len(buffer["frames"])
+
+    def _writer_loop(self):
+        """Kuyruktaki tamponları sırayla sütun dosyalarına ekler."""
+        while self.running or not self.queue.empty():
+            try:
+                camera_id, buffer = self.queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            try:
+                self._write_buffer(camera_id, buffer)
+                self.written += len(buffer["frames"])
+            except Exception as e:
+                self.failed += len(buffer["frames"])
+                print(f"⚠️ Geçmiş kaydı yazılamadı ({camera_id}): {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write_buffer(self, camera_id, buffer):
+        folder = os.path.join(self.directory, camera_id, buffer["segment"])
+        os.makedirs(folder, exist_ok=True)
+        self._append_columns(folder, "frames", np.array(buffer["frames"], dtype=FRAME_DTYPE))
+        if buffer["persons"]:
+            self._append_columns(folder, "persons", np.concatenate(buffer["persons"]))
+
+    @staticmethod
+    def _append_columns(folder, table, rows):
+        for name in rows.dtype.names:
+            with open(os.path.join(folder, f"{table}.{name}.bin"), 'ab') as f:
+                np.ascontiguousarray(rows[name]).tofile(f)
+
+    def flush(self):
+        """Tüm tamponları kuyruğa alır ve diske yazılmalarını bekler."""
+        with self.lock:
+            for camera_id in list(self.pending):
+                self._flush_camera(camera_id)
+        self.queue.join()
+
+    def stats(self):
+        """Yazıcı metriklerini sözlük olarak döndürür."""
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed
+        }
+
+    def close(self):
+        """Kalan tamponları yazar ve yazıcı thread'i kapatır."""
+        self.flush()
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=5.0)
+
+    # --- Okuma ---
+
+    def _segments(self, camera_id, start, end):
+        """[start, end] aralığıyla kesişen segment klasörleri (zaman sırasıyla)."""
+        folder = os.path.join(self.directory, camera_id)
+        if not os.path.isdir(folder):
+            return []
+        segments = []
+        for key in sorted(os.listdir(folder)):
+            if not (len(key) == 10 and key.isdigit()):
+                continue
+            segment_start = _segment_start(key)
+            if (end is None or segment_start <= end) and (start is None or segment_start + 3600 > start):
+                segments.append(os.path.join(folder, key))
+        return segments
+
+    @staticmethod
+    def _read_table(folder, table, dtype):
+        """Sütun dosyalarını memmap ile okuyup yapılandırılmış diziye birleştirir."""
+        columns = {}
+        for name in dtype.names:
+            path = os.path.join(folder, f"{table}.{name}.bin")
+            field = dtype.fields[name][0]
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            count = size // field.itemsize
+            columns[name] = (np.memmap(path, dtype=field.base, mode='r', shape=(count,) + field.shape)
+                             if count else np.empty((0,) + field.shape, dtype=field.base))
+        # Çökme sonrası sütunlar farklı uzunlukta kalabilir: ortak uzunluk kullanılır
+        count = min(len(column) for column in columns.values())
+        rows = np.empty(count, dtype=dtype)
+        for name, column in columns.items():
+            rows[name] = column[:count]
+        return rows
+
+    def _query(self, camera_id, table, dtype, start, end):
+        self.flush()
+        parts = []
+        for folder in self._segments(camera_id, start, end):
+            rows = self._read_table(folder, table, dtype)
+            mask = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                mask &= rows["timestamp"] >= start
+            if end is not None:
+                mask &= rows["timestamp"] <= end
+            parts.append(rows[mask])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def frames(self, camera_id, start=None, end=None):
+        """Aralıktaki kare satırları (FRAME_DTYPE)."""
+        return self._query(camera_id, "frames", FRAME_DTYPE, start, end)
+
+    def persons(self, camera_id, start=None, end=None, track_id=None, zone=None, violations_only=False):
+        """Aralıktaki kişi satırları (PERSON_ROW_DTYPE); iz, bölge ismi veya ihlale göre süzülebilir."""
+        rows = self._query(camera_id, "persons", PERSON_ROW_DTYPE, start, end)
+        if track_id is not None:
+            rows = rows[rows["track_id"] == track_id]
+        if zone is not None:
+            names = self._camera_zone_names(camera_id)
+            if zone not in names:
+                return rows[:0]
+            rows = rows[(rows["zones"] & np.uint64(1 << names.index(zone))) != 0]
+        if violations_only:
+            rows = rows[(rows["zones"] != 0) & (rows["missing"] != 0)]
+        return rows
+
+    def intervals(self, camera_id, risk_level="KRITIK", start=None, end=None, max_gap=2.0):
+        """Risk seviyesinin kesintisiz sürdüğü aralıklar: [(başlangıç, bitiş)].
+
+        Arada başka seviyede kare varsa veya iki kare arası `max_gap` saniyeyi
+        aşıyorsa (kayıt yok) aralık bölünür.
+        """
+        frames = self.frames(camera_id, start, end)
+        index = np.flatnonzero(frames["risk"] == RISK_CODES[risk_level])
+        if len(index) == 0:
+            return []
+        timestamps = frames["timestamp"][index]
+        breaks = (np.diff(index) != 1) | (np.diff(timestamps) > max_gap)
+        starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+        ends = np.concatenate((np.flatnonzero(breaks), [len(index) - 1]))
+        return [(float(timestamps[s]), float(timestamps[e])) for s, e in zip(starts, ends)]
+
+    def cameras(self):
+        """Depoda kaydı olan kameralar."""
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
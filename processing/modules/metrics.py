@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+class MetricsRegistry:
+    """Kamera ve aşama bazında süre histogramları, sayaçlar ve isteğe bağlı Chrome trace kaydı."""
+
+    def __init__(self, window=1000, trace=False, max_trace_events=200000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.durations = {}   # (kamera, aşama) -> deque[ms]
+        self.counters = {}    # (kamera, sayaç) -> int
+        self.frame_times = {} # kamera -> deque[zaman damgası]
+        self.trace_enabled = trace
+        self.trace_events = deque(maxlen=max_trace_events)
+        self.start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, camera, name):
+        """`with metrics.stage(kamera, "yolo"):` bloğunun süresini ölçer."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(camera, name, start, time.perf_counter())
+
+    def observe(self, camera, name, start, end):
+        """Bir aşamanın başlangıç/bitiş zamanını (perf_counter) kaydeder."""
+        camera = camera or "default"
+        with self.lock:
+            key = (camera, name)
+            if key not in self.durations:
+                self.durations[key] = deque(maxlen=self.window)
+            self.durations[key].append((end - start) * 1000.0)
+
+            if self.trace_enabled:
+                self.trace_events.append({
+                    "name": name, "ph": "X", "pid": os.getpid(), "tid": camera,
+                    "ts": (start - self.start_time) * 1e6, "dur": (end - start) * 1e6
+                })
+
+    def increment(self, camera, name, amount=1):
+        """Sayaç artırır (ör. işlenen/düşen kare)."""
+        camera = camera or "default"
+        with self.lock:
+            key = (camera, name)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def frame_done(self, camera):
+        """Bir karenin işlendiğini kaydeder (FPS hesabı için)."""
+        camera = camera or "default"
+        now = time.perf_counter()
+        with self.lock:
+            if camera not in self.frame_times:
+                self.frame_times[camera] = deque(maxlen=120)
+            self.frame_times[camera].append(now)
+            key = (camera, "frames_total")
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def fps(self, camera):
+        """Son karelere göre FPS."""
+        times = self.frame_times.get(camera or "default")
+        if not times or len(times) < 2 or times[-1] == times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def percentiles(self, camera, name):
+        """(p50, p95, p99) ms değerlerini döndürür."""
+        with self.lock:
+            values = list(self.durations.get((camera or "default", name), ()))
+        if not values:
+            return 0.0, 0.0, 0.0
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return float(p50), float(p95), float(p99)
+
+    def summary(self):
+        """Tüm kamera/aşamalar için {kamera: {aşama: {p50, p95, p99, count}}} özeti."""
+        with self.lock:
+            snapshot = {key: list(values) for key, values in self.durations.items()}
+        result = {}
+        for (camera, name), values in snapshot.items():
+            if not values:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            result.setdefault(camera, {})[name] = {
+                "p50": float(p50), "p95": float(p95), "p99": float(p99), "count": len(values)
+            }
+        return result
+
+    def render_prometheus(self):
+        """Prometheus metin formatında çıktı üretir."""
+        lines = [
+            "# TYPE guardian_stage_latency_ms summary",
+        ]
+        for camera, stages in self.summary().items():
+            for name, stats in stages.items():
+                for quantile in ("p50", "p95", "p99"):
+                    q = {"p50": "0.5", "p95": "0.95", "p99": "0.99"}[quantile]
+                    lines.append(f'guardian_stage_latency_ms{{camera="{camera}",stage="{name}",quantile="{q}"}} '
+                                 f'{stats[quantile]:.3f}')
+                lines.append(f'guardian_stage_latency_ms_count{{camera="{camera}",stage="{name}"}} {stats["count"]}')
+
+        lines.append("# TYPE guardian_fps gauge")
+        for camera in list(self.frame_times.keys()):
+            lines.append(f'guardian_fps{{camera="{camera}"}} {self.fps(camera):.2f}')
+
+        # Her sayaç kendi ailesidir: guardian_<isim>_total (sonek bir kez eklenir)
+        with self.lock:
+            counters = list(self.counters.items())
+        families = {}
+        for (camera, name), value in counters:
+            family = f"guardian_{name}" if name.endswith("_total") else f"guardian_{name}_total"
+            families.setdefault(family, []).append((camera, value))
+        for family, samples in sorted(families.items()):
+            lines.append(f"# TYPE {family} counter")
+            for camera, value in samples:
+                lines.append(f'{family}{{camera="{camera}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def dump_trace(self, filename):
+        """Kaydedilen olayları Chrome trace (chrome://tracing, Perfetto) JSON dosyasına yazar."""
+        with self.lock:
+            events = list(self.trace_events)
+        with open(filename, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"🧵 Trace kaydedildi: {filename} ({len(events)} olay)")
+
+
+class MetricsServer:
+    """Yerel HTTP thread'inde /metrics uç noktasını (Prometheus formatı) sunar."""
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        self.registry = registry
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry_ref.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Her istekte konsola yazma
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        """Sunucuyu arka planda başlatır."""
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"📈 Metrikler: http://{host}:{port}/metrics")
+
+    def stop(self):
+        """Sunucuyu kapatır."""
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+
+class MotionGate:
+    """Düşük çözünürlükte arka plan çıkarımı ile YOLO'yu boş/durağan sahnelerde uyutan kapı.
+
+    Hareket sadece tehlikeli bölgelerin (kenar payıyla genişletilmiş) içinde
+    veya yakınında aranır. Hareket görülünce `hold_frames` kare boyunca
+    uyanık kalınır; durağan dönemde son deteksiyon sonucu kullanılır ve en
+    geç `refresh_interval` karede bir tam deteksiyon zorlanır.
+    """
+
+    def __init__(self, learning_rate=0.05, diff_threshold=25, min_motion_ratio=0.004,
+                 zone_margin=0.04, hold_frames=30, refresh_interval=150):
+        self.learning_rate = learning_rate
+        self.diff_threshold = diff_threshold
+        self.min_motion_ratio = min_motion_ratio
+        self.zone_margin = zone_margin          # Kare genişliğine oranla bölge genişletme payı
+        self.hold_frames = hold_frames
+        self.refresh_interval = refresh_interval
+        self.reset()
+
+    def reset(self):
+        """Arka plan modelini ve sayaçları sıfırlar."""
+        self.background = None
+        self.diff = None
+        self.zone_mask = None
+        self.zone_key = None
+        self.awake_frames = 0
+        self.frames_since_refresh = 0
+        self.last_motion = 0.0
+
+    def _zone_mask(self, polygons, frame_shape, small_shape):
+        """Bölgeleri küçük çözünürlükte (genişletilmiş) maskeye çizer; poligonlar değişmedikçe önbellekten."""
+        key = (tuple(tuple(map(tuple, polygon)) for polygon in polygons), frame_shape[:2], small_shape)
+        if key == self.zone_key:
+            return self.zone_mask
+
+        self.zone_key = key
+        if not polygons:
+            self.zone_mask = None  # Bölge yoksa tüm kare izlenir
+            return None
+
+        height, width = small_shape
+        scale = np.array([width / frame_shape[1], height / frame_shape[0]], dtype=np.float32)
+        mask = np.zeros(small_shape, dtype=np.uint8)
+        for polygon in polygons:
+            if len(polygon) >= 3:
+                cv2.fillPoly(mask, [np.round(np.array(polygon, np.float32) * scale).astype(np.int32)], 255)
+        margin = max(1, int(round(width * self.zone_margin)))
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * margin + 1, 2 * margin + 1))
+        self.zone_mask = cv2.dilate(mask, kernel)
+        return self.zone_mask
+
+    def should_detect(self, small_gray, polygons, frame_shape):
+        """Bu karede tam deteksiyon gerekli mi? (bölge yakınında hareket, uyanıklık süresi veya yenileme)"""
+        if self.background is None or self.background.shape != small_gray.shape:
+            self.background = small_gray.astype(np.float32)
+            self.diff = np.empty_like(small_gray)
+            self.awake_frames = self.hold_frames
+            self.frames_since_refresh = 0
+            return True
+
+        # Arka plan farkı (arka plan yavaşça güncellenir, duran nesneler zamanla arka plana karışır)
+        cv2.absdiff(small_gray, self.background.astype(np.uint8), dst=self.diff)
+        cv2.accumulateWeighted(small_gray, self.background, self.learning_rate)
+        moving = self.diff > self.diff_threshold
+
+        zone_mask = self._zone_mask(polygons, frame_shape, small_gray.shape)
+        if zone_mask is not None:
+            area = np.count_nonzero(zone_mask)
+            self.last_motion = np.count_nonzero(moving & (zone_mask > 0)) / max(area, 1)
+        else:
+            self.last_motion = np.count_nonzero(moving) / moving.size
+
+        self.frames_since_refresh += 1
+        if self.last_motion >= self.min_motion_ratio:
+            self.awake_frames = self.hold_frames
+        elif self.awake_frames > 0:
+            self.awake_frames -= 1
+
+        if self.awake_frames > 0 or self.frames_since_refresh >= self.refresh_interval:
+            self.frames_since_refresh = 0
+            return True
+        return False
@@ -1,29 +1,310 @@
+import ast
+import json
+import os
+import time
 import cv2
-from ultralytics import YOLO
+import numpy as np
+from modules.box_tracker import TrackedBoxes, TrackedResults, to_numpy
+
+# Tüm arka uçlarda aynı deteksiyon eşikleri
+CONF_THRESHOLD = 0.4   # Minimum güven skoru (0.3'ten artırıldı)
+IOU_THRESHOLD = 0.3    # Daha agresif NMS (overlap azaltıldı)
+MAX_DET = 30           # Maksimum deteksiyon sayısı
+MAX_WH = 7680          # Sınıf bazlı NMS için kutu kaydırma miktarı (ultralytics ile aynı)
+
+
+def export_onnx(model_path, imgsz=640, int8=False):
+    """`best.pt` modelini ONNX'e (isteğe bağlı INT8 ağırlıklı) dönüştürür ve dosya yolunu döndürür.
+
+    Dönüştürülmüş dosya .pt dosyasından yeniyse tekrar dönüştürülmez. Sınıf
+    isimleri yanına `<model>.names.json` olarak yazılır.
+    """
+    base = os.path.splitext(model_path)[0]
+    onnx_path = base + ".onnx"
+    output_path = base + "_int8.onnx" if int8 else onnx_path
+
+    if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(model_path):
+        return output_path
+
+    if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(model_path):
+        from ultralytics import YOLO
+
+        print(f"YOLO Detector: ONNX'e dönüştürülüyor... ({model_path})")
+        model = YOLO(model_path)
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if os.path.abspath(exported) != os.path.abspath(onnx_path):
+            os.replace(exported, onnx_path)
+        with open(_names_path(onnx_path), 'w') as f:
+            json.dump({str(k): v for k, v in model.names.items()}, f)
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"YOLO Detector: INT8 ağırlık kuantizasyonu... ({output_path})")
+        quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QUInt8)
+        if os.path.exists(_names_path(onnx_path)):
+            with open(_names_path(onnx_path), 'r') as src, open(_names_path(output_path), 'w') as dst:
+                dst.write(src.read())
+    return output_path
+
+
+def _names_path(onnx_path):
+    return os.path.splitext(onnx_path)[0] + ".names.json"
+
+
+def _load_names(onnx_path, session=None):
+    """Sınıf isimlerini yan dosyadan veya ONNX metadata'sından okur."""
+    names_file = _names_path(onnx_path)
+    if os.path.exists(names_file):
+        with open(names_file, 'r') as f:
+            return {int(k): v for k, v in json.load(f).items()}
+    if session is not None:
+        metadata = session.get_modelmeta().custom_metadata_map
+        if "names" in metadata:
+            return {int(k): v for k, v in ast.literal_eval(metadata["names"]).items()}
+    raise RuntimeError(f"Sınıf isimleri bulunamadı: {names_file}")
+
+
+def letterbox(frame, imgsz=640):
+    """Kareyi oranı koruyarak imgsz x imgsz tuvale yerleştirir; (görüntü, ölçek, (pad_x, pad_y)) döndürür."""
+    height, width = frame.shape[:2]
+    gain = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * gain)), int(round(height * gain))
+    pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, gain, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Açgözlü NMS; tutulan indeksleri skor sırasıyla döndürür."""
+    order = np.argsort(-scores)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-6)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess(prediction, gain, pad, frame_shape, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD, max_det=MAX_DET):
+    """YOLOv8 ham çıktısını (4+nc, N) kare koordinatlarında (xyxy, cls, conf) dizilerine çevirir."""
+    prediction = prediction.T  # (N, 4+nc)
+    class_scores = prediction[:, 4:]
+    cls = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(cls)), cls]
+    keep = scores > conf
+    if not np.any(keep):
+        return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.float32))
+
+    cxcywh = prediction[keep, :4]
+    cls, scores = cls[keep], scores[keep]
+    xyxy = np.empty_like(cxcywh)
+    xyxy[:, 0:2] = cxcywh[:, 0:2] - cxcywh[:, 2:4] / 2
+    xyxy[:, 2:4] = cxcywh[:, 0:2] + cxcywh[:, 2:4] / 2
+
+    # Sınıf bazlı NMS: her sınıfın kutuları ayrı bölgeye kaydırılır
+    kept = nms(xyxy + cls[:, None] * MAX_WH, scores, iou)[:max_det]
+    xyxy, cls, scores = xyxy[kept], cls[kept], scores[kept]
+
+    # Letterbox'tan kare koordinatlarına
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= gain
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, frame_shape[1])
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, frame_shape[0])
+    return xyxy.astype(np.float32), cls.astype(np.float32), scores.astype(np.float32)
+
+
+class OnnxRuntimeBackend:
+    """ONNX Runtime CPU oturumu."""
+
+    def __init__(self, onnx_path, threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+        self.names = _load_names(onnx_path, self.session)
+
+    def infer(self, batch):
+        """(B,3,H,W) float32 girdiden (B, 4+nc, N) çıktı döndürür."""
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend:
+    """OpenVINO CPU derlenmiş modeli (ONNX dosyasını doğrudan okur)."""
+
+    def __init__(self, onnx_path, threads=0):
+        import openvino as ov
+
+        core = ov.Core()
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        model = core.read_model(onnx_path)
+        batch_dim = model.input(0).get_partial_shape()[0]
+        self.fixed_batch = batch_dim.get_length() if batch_dim.is_static else None
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+        self.names = _load_names(onnx_path)
+
+    def infer(self, batch):
+        """(B,3,H,W) float32 girdiden (B, 4+nc, N) çıktı döndürür."""
+        return self.compiled(batch)[self.output]
+
+
+class ExportedModel:
+    """Dışa aktarılmış modelin YOLO `model` nesnesi gibi `names` alanı sunan sarmalayıcısı."""
+
+    def __init__(self, runtime, imgsz):
+        self.runtime = runtime
+        self.names = runtime.names
+        self.imgsz = imgsz
+
 
 class YoloDetector:
-    """YOLOv8 modelini yüklemek ve nesne tespiti yapmak için wrapper sınıf."""
-    
-    def __init__(self, model_path):
-        print(f"YOLO Detector: Model yükleniyor... ({model_path})")
+    """YOLOv8 modelini yüklemek ve nesne tespiti yapmak için wrapper sınıf.
+
+    backend="torch" ultralytics/PyTorch ile çalışır. "onnxruntime" ve
+    "openvino" arka uçları `best.pt`'yi bir kez ONNX'e dönüştürür, CPU'da
+    çalıştırır ve NMS'i NumPy ile aynı eşiklerle yapar; sonuç nesnesi
+    `boxes.xyxy/cls/conf`, `names` ve `plot()` sunar.
+    """
+
+    def __init__(self, model_path, backend="torch", threads=0, int8=False, imgsz=640):
+        self.backend = backend
+        self.warmed_up = False
+        print(f"YOLO Detector: Model yükleniyor... ({model_path}, {backend})")
         try:
-            self.model = YOLO(model_path)
+            if backend == "torch":
+                from ultralytics import YOLO
+                self.model = YOLO(model_path)
+            elif backend in ("onnxruntime", "openvino"):
+                onnx_path = model_path if model_path.endswith(".onnx") else export_onnx(model_path, imgsz, int8)
+                runtime_cls = OnnxRuntimeBackend if backend == "onnxruntime" else OpenVINOBackend
+                self.model = ExportedModel(runtime_cls(onnx_path, threads), imgsz)
+            else:
+                raise ValueError(f"Bilinmeyen arka uç: {backend}")
             print("YOLO Detector: Model başarıyla yüklendi.")
         except Exception as e:
             print(f"HATA: YOLO modeli yüklenemedi! Hata: {e}")
             raise e
 
-    def detect_objects(self, frame):
-        """YOLO modelini kullanarak nesneleri algılar."""
+    def warm_up(self, frame_size=(854, 480), runs=2):
+        """Boş karelerle çıkarım yapıp çalışma zamanını hazırlar (paylaşılan dedektörde bir kez)."""
+        if self.warmed_up:
+            return
+        start = time.time()
+        dummy = np.zeros((frame_size[1], frame_size[0], 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.detect_objects(dummy)
+        self.warmed_up = True
+        print(f"YOLO Detector: Isınma tamamlandı ({time.time() - start:.2f} sn).")
+
+    def _size_options(self, imgsz):
+        """Çıkarım çözünürlüğü verildiyse ultralytics çağrısına eklenecek argüman."""
+        return {} if imgsz is None else {"imgsz": imgsz}
+
+    def detect_objects(self, frame, imgsz=None):
+        """YOLO modelini kullanarak nesneleri algılar. imgsz verilirse çıkarım o çözünürlükte yapılır."""
+        if self.backend != "torch":
+            return self._detect_exported([frame], imgsz)[0]
         results = self.model(
-            frame, 
-            conf=0.4,      # Minimum güven skoru (0.3'ten artırıldı)
-            iou=0.3,       # Daha agresif NMS (overlap azaltıldı)
-            max_det=30     # Maksimum deteksiyon sayısı
+            frame,
+            conf=CONF_THRESHOLD,
+            iou=IOU_THRESHOLD,
+            max_det=MAX_DET,
+            **self._size_options(imgsz)
         )
         return results[0]
 
+    def detect_objects_batch(self, frames, imgsz=None):
+        """Birden fazla kareyi tek bir YOLO çağrısında (batch) işler."""
+        if not frames:
+            return []
+        if self.backend != "torch":
+            return self._detect_exported(frames, imgsz)
+        results = self.model(
+            list(frames),
+            conf=CONF_THRESHOLD,
+            iou=IOU_THRESHOLD,
+            max_det=MAX_DET,
+            **self._size_options(imgsz)
+        )
+        return list(results)
+
+    def detect_regions_batch(self, frames, regions, imgsz=None):
+        """Her kare için sadece verilen bölgelerde (kırpıntı/karo) deteksiyon yapar, kutuları kareye taşır.
+
+        regions[i] None ise i. kare tamamen işlenir. Tüm kırpıntılar tek batch'te
+        çalışır; karolar arası tekrarlar sınıf bazlı NMS ile birleştirilir.
+        """
+        crops, owners = [], []
+        for i, (frame, frame_regions) in enumerate(zip(frames, regions)):
+            height, width = frame.shape[:2]
+            for x1, y1, x2, y2 in frame_regions or [(0, 0, width, height)]:
+                crops.append(frame[y1:y2, x1:x2])
+                owners.append((i, x1, y1))
+
+        per_frame = [[] for _ in frames]
+        for (i, x1, y1), result in zip(owners, self.detect_objects_batch(crops, imgsz)):
+            boxes = result.boxes
+            xyxy = to_numpy(boxes.xyxy).astype(np.float32).reshape(-1, 4) + np.float32([x1, y1, x1, y1])
+            per_frame[i].append((xyxy, to_numpy(boxes.cls).astype(np.float32).reshape(-1),
+                                 to_numpy(boxes.conf).astype(np.float32).reshape(-1)))
+
+        results = []
+        for frame, parts in zip(frames, per_frame):
+            xyxy = np.concatenate([p[0] for p in parts])
+            cls = np.concatenate([p[1] for p in parts])
+            conf = np.concatenate([p[2] for p in parts])
+            if len(parts) > 1 and len(xyxy):
+                kept = nms(xyxy + cls[:, None] * MAX_WH, conf, IOU_THRESHOLD)[:MAX_DET]
+                xyxy, cls, conf = xyxy[kept], cls[kept], conf[kept]
+            results.append(TrackedResults(TrackedBoxes(xyxy, cls, conf), self.model.names, frame))
+        return results
+
+    def _detect_exported(self, frames, imgsz=None):
+        """ONNX/OpenVINO arka ucunda ön işleme, çıkarım ve NumPy NMS (dinamik girişli modelde imgsz seçilebilir)."""
+        runtime = self.model.runtime
+        imgsz = imgsz or self.model.imgsz
+        batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+        letterboxes = []
+        for i, frame in enumerate(frames):
+            image, gain, pad = letterbox(frame, imgsz)
+            # BGR->RGB, HWC->CHW, 0-1 aralığı
+            batch[i] = image[:, :, ::-1].transpose(2, 0, 1)
+            letterboxes.append((gain, pad))
+        batch *= 1.0 / 255.0
+
+        # Sabit batch boyutlu modellerde kareler tek tek çalıştırılır
+        if runtime.fixed_batch == 1 and len(frames) > 1:
+            predictions = np.concatenate([runtime.infer(batch[i:i + 1]) for i in range(len(frames))])
+        else:
+            predictions = runtime.infer(batch)
+
+        results = []
+        for frame, prediction, (gain, pad) in zip(frames, predictions, letterboxes):
+            xyxy, cls, conf = postprocess(prediction, gain, pad, frame.shape)
+            results.append(TrackedResults(TrackedBoxes(xyxy, cls, conf), self.model.names, frame))
+        return results
+
     def draw_detections(self, frame, results):
         """Tespit sonuçlarını kare üzerine çizer."""
         annotated_frame = results.plot()
-        return annotated_frame
\ No newline at end of file
+        return annotated_frame
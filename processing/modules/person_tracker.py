@@ -0,0 +1,111 @@
+from modules.box_tracker import iou_matrix, greedy_match
+
+class PersonTracker:
+    """Her Person'a kalıcı bir takip ID'si veren ve KKD durumunu zaman içinde biriktiren sınıf.
+
+    KKD güveni üstel hareketli ortalama ile tutulur; tek karelik deteksiyon
+    kaybı baret/yelek durumunu hemen değiştirmez. İhlaller iz başına
+    art arda `confirm_frames` kare sürerse onaylanır.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=15, smoothing=0.3,
+                 ppe_threshold=0.25, confirm_frames=3):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+        self.ppe_threshold = ppe_threshold
+        self.confirm_frames = confirm_frames
+        self.tracks = {}
+        self.next_id = 1
+
+    def reset(self):
+        """Tüm izleri siler."""
+        self.tracks = {}
+        self.next_id = 1
+
+    def _new_track(self, person):
+        """Yeni bir iz oluşturur, ilk KKD skorlarını bu karenin güveninden alır."""
+        track = {
+            'track_id': self.next_id,
+            'box': person['box'],
+            'helmet_score': person['helmet_conf'],
+            'vest_score': person['vest_conf'],
+            'missed': 0,
+            'violation_streak': 0,
+            'violation_reported': False
+        }
+        self.tracks[self.next_id] = track
+        self.next_id += 1
+        return track
+
+    def _smooth(self, score, observed):
+        """Üstel hareketli ortalama (gözlem yoksa skor azalır)."""
+        return (1 - self.smoothing) * score + self.smoothing * observed
+
+    def update(self, persons):
+        """Bu karenin kişilerini izlerle eşleştirir, ID ve yumuşatılmış KKD durumu ekler."""
+        track_ids = list(self.tracks.keys())
+        matched_tracks = set()
+        matched_persons = set()
+
+        if track_ids and persons:
+            track_boxes = [self.tracks[tid]['box'] for tid in track_ids]
+            person_boxes = [person['box'] for person in persons]
+            ious = iou_matrix(track_boxes, person_boxes)
+
+            for t, p in greedy_match(ious, self.iou_threshold):
+                track = self.tracks[track_ids[t]]
+                person = persons[p]
+                track['box'] = person['box']
+                track['helmet_score'] = self._smooth(track['helmet_score'], person['helmet_conf'])
+                track['vest_score'] = self._smooth(track['vest_score'], person['vest_conf'])
+                track['missed'] = 0
+                person['_track'] = track
+                matched_tracks.add(track_ids[t])
+                matched_persons.add(p)
+
+        for p, person in enumerate(persons):
+            if p not in matched_persons:
+                person['_track'] = self._new_track(person)
+
+        # Görülmeyen izleri yaşlandır, çok eskiyenleri sil
+        for tid in track_ids:
+            if tid in matched_tracks:
+                continue
+            track = self.tracks[tid]
+            track['missed'] += 1
+            if track['missed'] > self.max_missed:
+                del self.tracks[tid]
+
+        # Kişi sözlüklerini iz durumuyla güncelle
+        for person in persons:
+            track = person.pop('_track')
+            person['track_id'] = track['track_id']
+            person['helmet_conf'] = track['helmet_score']
+            person['vest_conf'] = track['vest_score']
+            person['has_helmet'] = track['helmet_score'] >= self.ppe_threshold
+            person['has_vest'] = track['vest_score'] >= self.ppe_threshold
+
+        return persons
+
+    def confirm_violations(self, persons, persons_in_danger):
+        """İz başına ihlal sayacını günceller; onaylanan ve yeni başlayan ihlalleri işaretler."""
+        danger_ids = {person['track_id'] for person in persons_in_danger}
+
+        for person in persons:
+            track = self.tracks.get(person['track_id'])
+            if track is None:
+                continue
+
+            missing = bool(person.get('missing_ppe'))
+            if person['track_id'] in danger_ids and missing:
+                track['violation_streak'] += 1
+            else:
+                track['violation_streak'] = 0
+                track['violation_reported'] = False
+
+            confirmed = track['violation_streak'] >= self.confirm_frames
+            person['violation_confirmed'] = confirmed
+            person['violation_new'] = confirmed and not track['violation_reported']
+            if confirmed:
+                track['violation_reported'] = True
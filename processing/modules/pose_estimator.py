@@ -4,19 +4,21 @@ import mediapipe as mp
 class PoseEstimator:
     """MediaPipe Pose modelini yüklemek ve duruş tespiti yapmak için wrapper sınıf."""
     
-    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, static_image_mode=False):
         print("Pose Estimator: Model yükleniyor...")
         self.mp_pose = mp.solutions.pose
         self.pose = self.mp_pose.Pose(
+            static_image_mode=static_image_mode,  # True: her görüntü bağımsız (farklı kişilerin kırpıntıları)
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
         self.mp_drawing = mp.solutions.drawing_utils
         print("Pose Estimator: Model başarıyla yüklendi.")
 
-    def estimate_pose(self, frame):
-        """Verilen bir kare üzerinde duruş analizi yapar."""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def estimate_pose(self, frame, rgb_frame=None):
+        """Verilen bir kare üzerinde duruş analizi yapar. Hazır RGB kare verilirse dönüşüm atlanır."""
+        if rgb_frame is None:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         rgb_frame.flags.writeable = False
         results = self.pose.process(rgb_frame)
         rgb_frame.flags.writeable = True
@@ -0,0 +1,134 @@
+import numpy as np
+
+class PoseVerifier:
+    """Belirsiz kişilerin kırpıntılarında MediaPipe Pose çalıştırıp KKD konumunu doğrulayan sınıf.
+
+    Sadece tehlikeli bölgedeki veya KKD güveni belirsiz aralıktaki kişiler
+    kırpılır. Baret baş landmark'larının, yelek gövde landmark'larının
+    üzerinde mi diye bakılır. Sonuç iz (track_id) başına önbelleğe alınır ve
+    `recheck_frames` kare boyunca tekrar kullanılır.
+    """
+
+    def __init__(self, get_estimator, recheck_frames=30, max_per_frame=3,
+                 ambiguous_conf=(0.25, 0.6), padding=0.15, min_crop=48):
+        self.get_estimator = get_estimator  # PoseEstimator döndüren fonksiyon (ilk kullanımda yüklenir)
+        self.recheck_frames = recheck_frames
+        self.max_per_frame = max_per_frame
+        self.ambiguous_conf = ambiguous_conf
+        self.padding = padding
+        self.min_crop = min_crop
+        self.cache = {}       # track_id -> {'helmet_ok', 'vest_ok', 'frame'}
+        self.frame_index = 0
+        self.runs = 0
+
+    def reset(self):
+        """Önbelleği temizler."""
+        self.cache = {}
+
+    def _is_ambiguous(self, person):
+        """KKD güveni eşik civarında mı?"""
+        low, high = self.ambiguous_conf
+        return any(low <= person[key] < high for key in ('helmet_conf', 'vest_conf') if person[key] > 0)
+
+    def _candidates(self, persons, in_zone):
+        """Doğrulama gereken (önbelleği eski/boş) kişileri öncelik sırasıyla döndürür."""
+        candidates = []
+        for person, inside in zip(persons, in_zone):
+            track_id = person.get('track_id')
+            if track_id is None or not (inside or self._is_ambiguous(person)):
+                continue
+            cached = self.cache.get(track_id)
+            if cached is not None and self.frame_index - cached['frame'] < self.recheck_frames:
+                continue
+            # Bölgedekiler önce, sonra en eski kontrol edilen
+            age = self.frame_index - cached['frame'] if cached else self.recheck_frames * 10
+            candidates.append((not inside, -age, person))
+        candidates.sort(key=lambda item: item[:2])
+        return [person for _, _, person in candidates[:self.max_per_frame]]
+
+    def _crop(self, rgb_frame, box):
+        """Kişi kutusunu kenar payıyla kırpar; (kırpıntı, (x0, y0)) döndürür."""
+        height, width = rgb_frame.shape[:2]
+        x1, y1, x2, y2 = box
+        pad_x = int((x2 - x1) * self.padding)
+        pad_y = int((y2 - y1) * self.padding)
+        x0, y0 = max(0, x1 - pad_x), max(0, y1 - pad_y)
+        x3, y3 = min(width, x2 + pad_x), min(height, y2 + pad_y)
+        if x3 - x0 < self.min_crop or y3 - y0 < self.min_crop:
+            return None, (x0, y0)
+        return np.ascontiguousarray(rgb_frame[y0:y3, x0:x3]), (x0, y0)
+
+    def _points(self, estimator, landmarks, ids, crop, offset):
+        """Görünür landmark'ların kare koordinatlarını döndürür."""
+        height, width = crop.shape[:2]
+        points = []
+        for landmark_id in ids:
+            x, y = estimator.get_landmark_pixel(landmarks, landmark_id, width, height)
+            if x is not None:
+                points.append((x + offset[0], y + offset[1]))
+        return points
+
+    @staticmethod
+    def _near_box(points, box, margin_x, margin_y):
+        """Noktalardan biri (genişletilmiş) kutunun içinde mi?"""
+        x1, y1, x2, y2 = box
+        w, h = x2 - x1, y2 - y1
+        return any(x1 - w * margin_x <= x <= x2 + w * margin_x and
+                   y1 - h * margin_y <= y <= y2 + h * margin_y for x, y in points)
+
+    def _check(self, estimator, person, crop, offset):
+        """Tek kişi için baret/yelek hizasını kontrol eder (landmark yoksa None)."""
+        landmarks = estimator.estimate_pose(crop, rgb_frame=crop)
+        self.runs += 1
+        if not landmarks:
+            return {'helmet_ok': None, 'vest_ok': None}
+
+        lm = estimator.mp_pose.PoseLandmark
+        head = self._points(estimator, landmarks, (lm.NOSE, lm.LEFT_EAR, lm.RIGHT_EAR, lm.LEFT_EYE, lm.RIGHT_EYE),
+                            crop, offset)
+        torso = self._points(estimator, landmarks, (lm.LEFT_SHOULDER, lm.RIGHT_SHOULDER, lm.LEFT_HIP, lm.RIGHT_HIP),
+                             crop, offset)
+
+        helmet_ok = None
+        if person.get('helmet_box') is not None and head:
+            # Baret başın hemen üstünde durur: kutunun altına doğru geniş pay
+            helmet_ok = self._near_box(head, person['helmet_box'], 0.3, 0.8)
+        vest_ok = None
+        if person.get('vest_box') is not None and len(torso) >= 2:
+            center = (np.mean([p[0] for p in torso]), np.mean([p[1] for p in torso]))
+            vest_ok = self._near_box([center], person['vest_box'], 0.15, 0.15)
+        return {'helmet_ok': helmet_ok, 'vest_ok': vest_ok}
+
+    def verify(self, rgb_frame, persons, in_zone, active_track_ids=None):
+        """Gereken kişilerde pose çalıştırır ve önbellekteki sonuçları tüm kişilere uygular.
+
+        Hizası tutmayan KKD (ör. elde taşınan baret) o kişi için yok sayılır.
+        """
+        self.frame_index += 1
+        candidates = self._candidates(persons, in_zone)
+        if candidates:
+            estimator = self.get_estimator()
+            for person in candidates:
+                crop, offset = self._crop(rgb_frame, person['box'])
+                if crop is None:
+                    continue
+                result = self._check(estimator, person, crop, offset)
+                result['frame'] = self.frame_index
+                self.cache[person['track_id']] = result
+
+        for person in persons:
+            cached = self.cache.get(person.get('track_id'))
+            person['pose_checked'] = cached is not None
+            if cached is None:
+                continue
+            if cached['helmet_ok'] is False:
+                person['has_helmet'] = False
+            if cached['vest_ok'] is False:
+                person['has_vest'] = False
+
+        # Silinen izlerin önbelleğini temizle
+        if active_track_ids is not None:
+            for track_id in list(self.cache):
+                if track_id not in active_track_ids:
+                    del self.cache[track_id]
+        return len(candidates)
@@ -0,0 +1,140 @@
+import numpy as np
+from modules.box_tracker import to_numpy
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+class PersonTable:
+    """Kişileri dict listesi yerine sütun dizileri (struct-of-arrays) olarak tutan tablo."""
+
+    def __init__(self, boxes, helmet_conf, vest_conf):
+        self.boxes = boxes                                   # (N,4) int32, xyxy
+        self.centers = (boxes[:, 0:2] + boxes[:, 2:4]) // 2  # (N,2) int32
+        self.feet = np.stack([self.centers[:, 0], boxes[:, 3]], axis=1)
+        self.helmet_conf = helmet_conf                       # (N,) float32, 0 = atanmadı
+        self.vest_conf = vest_conf
+        # Atanan (en yüksek güvenli) KKD kutuları; atanmadıysa -1
+        self.helmet_boxes = np.full((len(boxes), 4), -1, dtype=np.int32)
+        self.vest_boxes = np.full((len(boxes), 4), -1, dtype=np.int32)
+        self.has_helmet = helmet_conf > 0
+        self.has_vest = vest_conf > 0
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def to_dicts(self):
+        """Çizim ve takip katmanları için eski `persons` dict listesi formatına çevirir."""
+        persons = []
+        for i in range(len(self.boxes)):
+            x1, y1, x2, y2 = (int(v) for v in self.boxes[i])
+            persons.append({
+                'box': (x1, y1, x2, y2),
+                'center': (int(self.centers[i, 0]), int(self.centers[i, 1])),
+                'foot': (int(self.feet[i, 0]), int(self.feet[i, 1])),
+                'has_helmet': bool(self.has_helmet[i]),
+                'has_vest': bool(self.has_vest[i]),
+                'helmet_conf': float(self.helmet_conf[i]),
+                'vest_conf': float(self.vest_conf[i]),
+                'helmet_box': tuple(int(v) for v in self.helmet_boxes[i]) if self.helmet_conf[i] > 0 else None,
+                'vest_box': tuple(int(v) for v in self.vest_boxes[i]) if self.vest_conf[i] > 0 else None
+            })
+        return persons
+
+
+def _distance_matrix(ppe_centers, person_boxes):
+    """KKD merkezlerinden kişi merkezlerine uzaklık matrisi (Q,P); arama alanı dışı = inf."""
+    px1, py1, px2, py2 = (person_boxes[:, i].astype(np.float32) for i in range(4))
+    width = px2 - px1
+    height = py2 - py1
+
+    # Genişletilmiş arama alanı
+    area_x1 = px1 - width * 1.2
+    area_y1 = py1 - height * 0.7
+    area_x2 = px2 + width * 1.2
+    area_y2 = py2 + height * 0.3
+
+    ppx = ppe_centers[:, 0:1].astype(np.float32)
+    ppy = ppe_centers[:, 1:2].astype(np.float32)
+    inside = ((area_x1 <= ppx) & (ppx <= area_x2) &
+              (area_y1 <= ppy) & (ppy <= area_y2))
+
+    distance = np.hypot(ppx - (px1 + px2) / 2, ppy - (py1 + py2) / 2)
+    return np.where(inside, distance, np.inf)
+
+
+def _assign_nearest(distance):
+    """Her KKD'yi arama alanındaki en yakın kişiye atar. (kişi indeksi, geçerli mi) döndürür."""
+    closest = np.argmin(distance, axis=1)
+    valid = np.isfinite(distance[np.arange(len(distance)), closest])
+    return closest, valid
+
+
+def _assign_hungarian(distance):
+    """Her kişiye en fazla bir KKD düşecek şekilde toplam mesafeyi en aza indirir."""
+    closest = np.zeros(len(distance), dtype=np.int64)
+    valid = np.zeros(len(distance), dtype=bool)
+    cost = np.where(np.isfinite(distance), distance, 1e9)
+    rows, cols = linear_sum_assignment(cost)
+    keep = np.isfinite(distance[rows, cols])
+    closest[rows[keep]] = cols[keep]
+    valid[rows[keep]] = True
+    return closest, valid
+
+
+def assign_ppe(xyxy, cls, conf, person_id, helmet_id, vest_id, mode="greedy"):
+    """YOLO kutularından kişi tablosu oluşturur ve KKD'leri kişilere atar.
+
+    mode="greedy": her KKD en yakın kişiye gider (bir kişiye birden fazla KKD
+    düşebilir, en yüksek güven kullanılır). mode="hungarian": KKD türü başına
+    bire bir optimal atama (scipy gerektirir).
+    """
+    xyxy = to_numpy(xyxy).reshape(-1, 4).astype(np.int32)
+    cls = to_numpy(cls).reshape(-1).astype(np.int32)
+    conf = to_numpy(conf).reshape(-1).astype(np.float32)
+
+    person_boxes = xyxy[cls == person_id]
+    helmet_conf = np.zeros(len(person_boxes), dtype=np.float32)
+    vest_conf = np.zeros(len(person_boxes), dtype=np.float32)
+    table = PersonTable(person_boxes, helmet_conf, vest_conf)
+
+    if len(person_boxes) == 0:
+        return table
+
+    if mode == "hungarian" and linear_sum_assignment is None:
+        print("⚠️ scipy bulunamadı, KKD ataması greedy modda yapılıyor.")
+        mode = "greedy"
+
+    person_mid_y = (person_boxes[:, 1] + person_boxes[:, 3]) / 2
+
+    for ppe_id, target, target_boxes in ((helmet_id, helmet_conf, table.helmet_boxes),
+                                         (vest_id, vest_conf, table.vest_boxes)):
+        if ppe_id is None:
+            continue
+        mask = cls == ppe_id
+        if not np.any(mask):
+            continue
+
+        ppe_boxes = xyxy[mask]
+        ppe_conf = conf[mask]
+        ppe_centers = (ppe_boxes[:, 0:2] + ppe_boxes[:, 2:4]) // 2
+        distance = _distance_matrix(ppe_centers, person_boxes)
+
+        if mode == "hungarian":
+            closest, valid = _assign_hungarian(distance)
+        else:
+            closest, valid = _assign_nearest(distance)
+
+        # Baret sadece kişinin üst yarısındaysa sayılır
+        if ppe_id == helmet_id:
+            valid &= ppe_centers[:, 1] < person_mid_y[closest]
+
+        np.maximum.at(target, closest[valid], ppe_conf[valid])
+        # Artan güven sırasıyla yazılır: her kişide en güvenli kutu kalır
+        order = np.argsort(ppe_conf[valid], kind="stable")
+        target_boxes[closest[valid][order]] = ppe_boxes[valid][order]
+
+    table.has_helmet = helmet_conf > 0
+    table.has_vest = vest_conf > 0
+    return table
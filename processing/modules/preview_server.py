@@ -0,0 +1,312 @@
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+BOUNDARY = "guardianframe"
+
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Guardian AI - Önizleme</title>
+<style>body{font-family:sans-serif;background:#222;color:#eee}.cam{display:inline-block;margin:8px}
+img{cursor:crosshair;border:1px solid #555}button{margin:2px}</style></head>
+<body><h3>Guardian AI - Canlı Önizleme</h3><div id="cams"></div>
+<script>
+let draft = {};
+function act(cam, action, body) {
+  return fetch(`/api/cameras/${cam}/${action}`, {method: "POST", body: JSON.stringify(body || {})})
+    .then(r => r.json()).then(r => { if (!r.ok) alert(r.message); return r; });
+}
+fetch("/api/cameras").then(r => r.json()).then(cams => {
+  for (const cam of cams) {
+    draft[cam.camera_id] = cam.polygon || [];
+    const div = document.createElement("div");
+    div.className = "cam";
+    div.innerHTML = `<div>${cam.camera_id}</div><img src="/stream/${cam.camera_id}?fps=5&width=640"><br>
+      <button data-a="lock">Kilitle</button><button data-a="unlock">Çöz</button>
+      <button data-a="save">Kaydet</button><button data-a="clear">Sil</button>`;
+    const img = div.querySelector("img");
+    img.onclick = e => {
+      if (!cam.frame_size) return;
+      const x = Math.round(e.offsetX * cam.frame_size[0] / img.width);
+      const y = Math.round(e.offsetY * cam.frame_size[1] / img.height);
+      draft[cam.camera_id].push([x, y]);
+      act(cam.camera_id, "polygon", {points: draft[cam.camera_id]});
+    };
+    img.oncontextmenu = e => { e.preventDefault(); draft[cam.camera_id] = []; act(cam.camera_id, "polygon", {points: []}); };
+    div.querySelectorAll("button").forEach(b => b.onclick = () =>
+      act(cam.camera_id, b.dataset.a).then(() => { if (b.dataset.a !== "lock") draft[cam.camera_id] = []; }));
+    document.getElementById("cams").appendChild(div);
+  }
+});
+</script></body></html>"""
+
+
+class PreviewStream:
+    """Bir kameranın son çizilmiş karesi ve izleyicileri arasında paylaşılan JPEG önbelleği."""
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.condition = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.state = {}
+        self.viewers = 0
+        self.viewer_fps = []      # Bağlı her izleyicinin istediği fps
+        self.wanted_until = 0.0   # Tek kare (snapshot) istekleri için kısa süreli ilgi
+        self.published_at = 0.0   # Son karenin bırakıldığı an
+        self.encoded = {}         # (genişlik, kalite) -> (seq, jpeg baytları)
+        self.encode_locks = {}
+
+    def active(self):
+        return self.viewers > 0 or time.time() < self.wanted_until
+
+    def due(self, now):
+        """Yeni kare gerekli mi? İzleyicilerin en yüksek fps'ine göre; snapshot bekleyen hemen alır."""
+        if now < self.wanted_until:
+            return True
+        if not self.viewer_fps:
+            return False
+        return now - self.published_at >= 1.0 / max(self.viewer_fps)
+
+    def jpeg(self, width, quality):
+        """Son karenin istenen boyuttaki JPEG'i; aynı kare/boyut için tek sefer kodlanır."""
+        key = (width, quality)
+        with self.condition:
+            lock = self.encode_locks.setdefault(key, threading.Lock())
+        with lock:
+            with self.condition:
+                frame, seq = self.frame, self.seq
+                cached = self.encoded.get(key)
+            if frame is None:
+                return 0, None
+            if cached is not None and cached[0] == seq:
+                return cached
+            if width and width < frame.shape[1]:
+                height = int(round(frame.shape[0] * width / frame.shape[1]))
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            success, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not success:
+                return 0, None
+            result = (seq, buffer.tobytes())
+            with self.condition:
+                self.encoded[key] = result
+            return result
+
+
+class PreviewServer:
+    """Çizilmiş kareleri yerel HTTP üzerinden MJPEG olarak sunan ve poligon düzenleme API'si açan sunucu.
+
+    İşleme döngüsü `publish` ile kare bırakır; izleyici yoksa kare kopyalanmaz.
+    `wants_frame` sadece en hızlı izleyicinin fps'ine göre yeni kare zamanı
+    geldiğinde True döner, böylece döngü her kareyi çizip kopyalamaz.
+    Kodlama döngüde değil, izleyici thread'lerinde ve izleyicinin seçtiği
+    fps/genişlikte yapılır; aynı kamera/boyuttaki izleyiciler aynı JPEG'i
+    paylaşır. Poligon komutları kuyruğa alınır ve döngü `commands()` ile
+    uygun anda (kare aralarında) uygular.
+    """
+
+    def __init__(self, camera_ids, host="127.0.0.1", port=8090, max_fps=15, default_quality=70):
+        self.streams = {camera_id: PreviewStream(camera_id) for camera_id in camera_ids}
+        self.max_fps = max_fps
+        self.default_quality = default_quality
+        self.command_queue = queue.Queue()
+        self.running = True
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    # --- İşleme döngüsü tarafı ---
+
+    def wants_frame(self, camera_id):
+        """Bu kamera için yeni kare zamanı geldi mi? (değilse kare çizilmesine/kopyalanmasına gerek yok)
+
+        İzleyiciler en fazla istedikleri fps'te kare aldığından döngü her kareyi
+        değil, en hızlı izleyicinin hızında kare çizer.
+        """
+        stream = self.streams.get(camera_id)
+        if stream is None:
+            return False
+        with stream.condition:
+            return stream.due(time.time())
+
+    def publish(self, camera_id, frame, state=None):
+        """Kamera için son çizilmiş kareyi ve durumunu bırakır (izleyici yoksa sadece durum)."""
+        stream = self.streams.get(camera_id)
+        if stream is None:
+            return
+        with stream.condition:
+            if state is not None:
+                stream.state = state
+            if frame is None or not stream.active():
+                return
+            # Kare tampon havuzundan gelebilir: izleyici varken kendi kopyamıza alınır
+            if stream.frame is None or stream.frame.shape != frame.shape:
+                stream.frame = np.empty_like(frame)
+            np.copyto(stream.frame, frame)
+            stream.seq += 1
+            stream.published_at = time.time()
+            stream.wanted_until = 0.0
+            stream.condition.notify_all()
+
+    def commands(self):
+        """Bekleyen API komutlarını döndürür (bloklamaz). Her komut `reply(ok, message)` ile yanıtlanmalı."""
+        pending = []
+        while True:
+            try:
+                pending.append(self.command_queue.get_nowait())
+            except queue.Empty:
+                return pending
+
+    # --- HTTP tarafı ---
+
+    def _submit(self, camera_id, action, payload, timeout=2.0):
+        """Komutu döngüye iletir ve yanıtını bekler."""
+        done = threading.Event()
+        command = {"camera_id": camera_id, "action": action, "payload": payload,
+                   "result": {"ok": False, "message": "İşleme döngüsü yanıt vermedi"}}
+
+        def reply(ok, message=""):
+            command["result"] = {"ok": ok, "message": message}
+            done.set()
+
+        command["reply"] = reply
+        self.command_queue.put(command)
+        done.wait(timeout)
+        return command["result"]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, data, status=200):
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _options(self, query):
+                params = parse_qs(query)
+                fps = min(float(params.get("fps", ["5"])[0]), server.max_fps)
+                width = int(params.get("width", ["0"])[0]) or None
+                quality = int(params.get("quality", [str(server.default_quality)])[0])
+                return max(fps, 0.2), width, max(10, min(quality, 95))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = [part for part in url.path.split("/") if part]
+                try:
+                    if not parts:
+                        body = INDEX_HTML.encode("utf-8")
+                        self.send_response(200)
+                        self.send_header("Content-Type", "text/html; charset=utf-8")
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+                    elif parts == ["api", "cameras"]:
+                        self._send_json([dict(stream.state, camera_id=camera_id, viewers=stream.viewers)
+                                         for camera_id, stream in server.streams.items()])
+                    elif len(parts) == 2 and parts[0] in ("stream", "snapshot") and parts[1] in server.streams:
+                        fps, width, quality = self._options(url.query)
+                        stream = server.streams[parts[1]]
+                        if parts[0] == "stream":
+                            self._stream(stream, fps, width, quality)
+                        else:
+                            self._snapshot(stream, width, quality)
+                    else:
+                        self.send_error(404)
+                except ValueError:
+                    self.send_error(400)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def do_POST(self):
+                parts = [part for part in urlparse(self.path).path.split("/") if part]
+                if len(parts) != 4 or parts[:2] != ["api", "cameras"] or parts[2] not in server.streams:
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json({"ok": False, "message": "Geçersiz JSON"}, 400)
+                    return
+                result = server._submit(parts[2], parts[3], payload)
+                self._send_json(result, 200 if result["ok"] else 409)
+
+            def _snapshot(self, stream, width, quality):
+                deadline = time.time() + 2.0
+                with stream.condition:
+                    # Taze kare iste; gelmezse eldeki son kare kullanılır
+                    stream.wanted_until = deadline
+                    seq = stream.seq
+                    while stream.seq == seq and time.time() < deadline:
+                        stream.condition.wait(0.1)
+                _, jpeg = stream.jpeg(width, quality)
+                if jpeg is None:
+                    self.send_error(503)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(jpeg)))
+                self.end_headers()
+                self.wfile.write(jpeg)
+
+            def _stream(self, stream, fps, width, quality):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with stream.condition:
+                    stream.viewers += 1
+                    stream.viewer_fps.append(fps)
+                try:
+                    last_seq = 0
+                    while server.running:
+                        started = time.time()
+                        # Yeni kare gelene kadar bekle (döngü izleyici yokken kare bırakmaz)
+                        with stream.condition:
+                            if stream.seq == last_seq:
+                                stream.condition.wait(1.0)
+                            if stream.seq == last_seq:
+                                continue
+                        last_seq, jpeg = stream.jpeg(width, quality)
+                        if jpeg is None:
+                            continue
+                        self.wfile.write((f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                          f"Content-Length: {len(jpeg)}\r\n\r\n").encode("ascii"))
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b"\r\n")
+                        # İzleyicinin seçtiği hız
+                        time.sleep(max(0.0, 1.0 / fps - (time.time() - started)))
+                finally:
+                    with stream.condition:
+                        stream.viewers -= 1
+                        stream.viewer_fps.remove(fps)
+
+            def log_message(self, format, *args):
+                pass  # Her istekte konsola yazma
+
+        return Handler
+
+    def start(self):
+        """Sunucuyu arka planda başlatır."""
+        self.thread.start()
+        host, port = self.server.server_address[:2]
+        print(f"🖥️ Canlı önizleme: http://{host}:{port}/")
+
+    def stop(self):
+        """Sunucuyu kapatır ve bekleyen komutları yanıtlar."""
+        self.running = False
+        for command in self.commands():
+            command["reply"](False, "Kapatılıyor")
+        for stream in self.streams.values():
+            with stream.condition:
+                stream.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,136 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Kademeler: her seviye bir öncekine göre kaliteyi biraz daha düşürür.
+# inference_size: YOLO giriş çözünürlüğü, interval_factor: deteksiyon aralığı çarpanı,
+# nfeatures_factor: ORB özellik sayısı çarpanı, display_mode: çizim detayı.
+QUALITY_LEVELS = [
+    {"inference_size": None, "interval_factor": 1, "nfeatures_factor": 1.0, "display_mode": None},
+    {"inference_size": None, "interval_factor": 2, "nfeatures_factor": 1.0, "display_mode": "minimal"},
+    {"inference_size": 512, "interval_factor": 2, "nfeatures_factor": 0.5, "display_mode": "minimal"},
+    {"inference_size": 416, "interval_factor": 3, "nfeatures_factor": 0.5, "display_mode": "minimal"},
+    {"inference_size": 320, "interval_factor": 4, "nfeatures_factor": 0.25, "display_mode": "minimal"},
+]
+
+
+def batch_inference_size(processors):
+    """Aynı batch'teki işlemciler için ortak çıkarım çözünürlüğü (en yüksek kaliteli olan belirler)."""
+    sizes = [processor.inference_size for processor in processors]
+    if not sizes or any(size is None for size in sizes):
+        return None
+    return max(sizes)
+
+
+class QualityController:
+    """Kamera başına işleme gecikmesini izleyip kalite kademelerini SLO'ya göre ayarlayan kontrolcü.
+
+    p95 gecikme SLO'yu aşarsa önceliği en düşük kameradan başlayarak bir
+    kademe düşürülür; tüm kameralarda yeterli pay oluşunca önceliği en
+    yüksek kameradan başlayarak kalite geri verilir. Her değişiklikten sonra
+    ölçümlerin oturması için `cooldown` saniye beklenir.
+    """
+
+    def __init__(self, slo_ms=200.0, priorities=None, window=30, cooldown=2.0,
+                 recover_ratio=0.6, recover_checks=3, levels=QUALITY_LEVELS):
+        self.slo_ms = slo_ms
+        self.priorities = priorities or {}  # kamera -> öncelik (büyük = önemli, en son düşürülür)
+        self.window = window
+        self.cooldown = cooldown
+        self.recover_ratio = recover_ratio
+        self.recover_checks = recover_checks
+        self.levels = levels
+        self.cameras = {}
+        self.last_change = 0.0
+        self.headroom_streak = 0
+
+    def register(self, processor):
+        """İşlemciyi kontrolcüye ekler; mevcut ayarları en yüksek kalite (seviye 0) kabul edilir."""
+        camera_id = processor.camera_id or "default"
+        self.cameras[camera_id] = {
+            "processor": processor,
+            "level": 0,
+            "latencies": deque(maxlen=self.window),
+            "base_interval": processor.detection_interval,
+            "base_nfeatures": processor.zone_tracker.nfeatures(),
+            "base_display": processor.display_mode,
+        }
+
+    def observe(self, camera_id, latency_ms):
+        """Bir karenin yakalamadan sonuca kadar geçen süresini kaydeder."""
+        camera = self.cameras.get(camera_id or "default")
+        if camera is not None:
+            camera["latencies"].append(latency_ms)
+
+    def _p95(self, camera):
+        if len(camera["latencies"]) < max(5, self.window // 3):
+            return None
+        return float(np.percentile(camera["latencies"], 95))
+
+    def _apply(self, camera_id, level):
+        """Seviyenin ayarlarını işlemciye uygular."""
+        camera = self.cameras[camera_id]
+        processor = camera["processor"]
+        settings = self.levels[level]
+
+        # Kullanıcının seçtiği görünüm kalite düşmeye başlarken saklanır, seviye 0'da geri gelir
+        if camera["level"] == 0 and level > 0:
+            camera["base_display"] = processor.display_mode
+        processor.display_mode = settings["display_mode"] or camera["base_display"]
+        camera["level"] = level
+
+        processor.inference_size = settings["inference_size"]
+        interval = max(1, camera["base_interval"] * settings["interval_factor"])
+        if interval != processor.detection_interval:
+            processor.set_detection_interval(interval)
+        processor.zone_tracker.set_nfeatures(max(200, int(camera["base_nfeatures"] * settings["nfeatures_factor"])))
+        print(f"🎚️ {camera_id}: kalite seviyesi {level} "
+              f"(çözünürlük {settings['inference_size'] or 'varsayılan'}, aralık {interval})")
+
+    def update(self, now=None):
+        """Gecikmeleri değerlendirir, gerekirse bir kamerayı bir kademe düşürür veya yükseltir."""
+        now = time.time() if now is None else now
+        if now - self.last_change < self.cooldown:
+            return
+
+        p95 = {camera_id: self._p95(camera) for camera_id, camera in self.cameras.items()}
+        measured = {camera_id: value for camera_id, value in p95.items() if value is not None}
+        if not measured:
+            return
+
+        overloaded = any(value > self.slo_ms for value in measured.values())
+        if overloaded:
+            self.headroom_streak = 0
+            # En düşük öncelikli (eşitse en yavaş) ve daha düşürülebilecek kamera
+            candidates = [camera_id for camera_id, camera in self.cameras.items()
+                          if camera["level"] < len(self.levels) - 1]
+            if not candidates:
+                return
+            target = min(candidates, key=lambda c: (self.priorities.get(c, 0), -(measured.get(c) or 0)))
+            self._apply(target, self.cameras[target]["level"] + 1)
+            self._reset_windows(now)
+            return
+
+        if all(value < self.slo_ms * self.recover_ratio for value in measured.values()):
+            self.headroom_streak += 1
+            if self.headroom_streak < self.recover_checks:
+                return
+            degraded = [camera_id for camera_id, camera in self.cameras.items() if camera["level"] > 0]
+            if degraded:
+                target = max(degraded, key=lambda c: self.priorities.get(c, 0))
+                self._apply(target, self.cameras[target]["level"] - 1)
+                self._reset_windows(now)
+            self.headroom_streak = 0
+        else:
+            self.headroom_streak = 0
+
+    def _reset_windows(self, now):
+        """Değişiklikten sonra eski ölçümler karar vermesin."""
+        self.last_change = now
+        for camera in self.cameras.values():
+            camera["latencies"].clear()
+
+    def levels_by_camera(self):
+        """{kamera: seviye} durumunu döndürür."""
+        return {camera_id: camera["level"] for camera_id, camera in self.cameras.items()}
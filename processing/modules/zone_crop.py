@@ -0,0 +1,47 @@
+import numpy as np
+
+def zone_crop_region(polygons, frame_shape, person_height=0.45, side_margin=0.06, bottom_margin=0.03,
+                     max_area_ratio=0.75):
+    """Tehlikeli bölgelerin sınır kutusunu kişi boyu kadar genişletir; (x1, y1, x2, y2) veya None döndürür.
+
+    Ayak noktası bölgede olan kişinin gövdesi bölgenin üstüne taşar, bu yüzden
+    yukarıya `person_height` (kare yüksekliği oranı) kadar pay bırakılır.
+    Kırpıntı karenin büyük kısmını kaplıyorsa None (tam kare) döner.
+    """
+    points = [point for polygon in polygons if len(polygon) >= 3 for point in polygon]
+    if not points:
+        return None
+
+    height, width = frame_shape[:2]
+    points = np.asarray(points, dtype=np.float32)
+    x1, y1 = points.min(axis=0)
+    x2, y2 = points.max(axis=0)
+
+    x1 = int(max(0, x1 - width * side_margin))
+    x2 = int(min(width, x2 + width * side_margin))
+    y1 = int(max(0, y1 - height * person_height))
+    y2 = int(min(height, y2 + height * bottom_margin))
+    if x2 - x1 < 32 or y2 - y1 < 32:
+        return None
+    if (x2 - x1) * (y2 - y1) > max_area_ratio * width * height:
+        return None
+    return x1, y1, x2, y2
+
+
+def tile_region(region, tile_size=None, overlap=0.25):
+    """Bölge tile_size'dan büyükse üst üste binen karolara böler; [(x1, y1, x2, y2)] döndürür."""
+    x1, y1, x2, y2 = region
+    if not tile_size or (x2 - x1 <= tile_size * 1.25 and y2 - y1 <= tile_size * 1.25):
+        return [region]
+
+    def starts(begin, end):
+        length = end - begin
+        if length <= tile_size:
+            return [begin]
+        step = int(tile_size * (1 - overlap))
+        positions = list(range(begin, end - tile_size, step))
+        positions.append(end - tile_size)
+        return positions
+
+    return [(tx, ty, min(tx + tile_size, x2), min(ty + tile_size, y2))
+            for ty in starts(y1, y2) for tx in starts(x1, x2)]
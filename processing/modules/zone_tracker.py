@@ -0,0 +1,218 @@
+import cv2
+import numpy as np
+
+class ZoneTracker:
+    """Kamera hareketine göre tehlikeli alan poligonunu taşıyan homografi takipçisi.
+
+    Her karede pahalı ORB eşleştirmesi yapmak yerine:
+    1. Küçültülmüş kare farkı ile sahne durağansa son homografi kullanılır.
+    2. Hareket varsa seyrek noktalar LK optik akış ile kareden kareye izlenir.
+    3. Periyodik olarak veya kayma (drift) tespit edilince referansa ORB ile yeniden kayıt yapılır.
+
+    ORB kaydı `registration_scale` oranında küçültülmüş karede yapılır ve
+    homografi tam çözünürlüğe ölçeklenir. Kişi kutuları ve poligon içi maske
+    ile dışarıda bırakılır; özellikler sadece durağan arka plandan gelir.
+    """
+
+    def __init__(self, nfeatures=2000, static_threshold=1.5, reregister_interval=90,
+                 min_flow_points=40, min_inlier_ratio=0.6, registration_scale=0.5):
+        self.orb = cv2.ORB_create(nfeatures=nfeatures)
+        self.registration_scale = registration_scale
+        self.bf_matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        self.static_threshold = static_threshold
+        self.reregister_interval = reregister_interval
+        self.min_flow_points = min_flow_points
+        self.min_inlier_ratio = min_inlier_ratio
+        self.reset()
+
+    def reset(self):
+        """Referansı ve önbelleklenmiş homografiyi siler."""
+        self.reference_keypoints = None
+        self.reference_descriptors = None
+        self.original_polygon = None
+        self.homography = None        # Referans → mevcut kare
+        self.cached_polygon = None
+        self.prev_gray = None
+        self.prev_small = None
+        self.flow_points = None
+        self.frames_since_registration = 0
+
+        # İstatistikler (hangi yolun ne sıklıkla kullanıldığı)
+        self.stats = {"static": 0, "flow": 0, "register": 0, "failed": 0}
+
+    def start(self, gray, polygon_points, person_boxes=None):
+        """Referans kareyi ve poligonu kaydeder. Yeterli özellik yoksa False döndürür."""
+        mask = self.build_static_mask(gray.shape, person_boxes, polygon_points)
+        keypoints, descriptors = self._detect_orb(gray, mask)
+        if descriptors is None or len(keypoints) <= 20:
+            return False
+
+        self.reset()
+        self.reference_keypoints = keypoints
+        self.reference_descriptors = descriptors
+        self.original_polygon = list(polygon_points)
+        self._set_homography(np.eye(3, dtype=np.float64))
+        self._remember_frame(gray)
+        self.flow_points = self._detect_flow_points(gray, mask)
+        return True
+
+    def build_static_mask(self, shape, person_boxes=None, polygon_points=None):
+        """Kişi kutularını ve poligon içini dışarıda bırakan arka plan maskesi (255 = kullan)."""
+        mask = np.full(shape[:2], 255, dtype=np.uint8)
+        if polygon_points is not None and len(polygon_points) >= 3:
+            cv2.fillPoly(mask, [np.array(polygon_points, np.int32)], 0)
+        if person_boxes is not None:
+            for x1, y1, x2, y2 in np.asarray(person_boxes, dtype=np.int32).reshape(-1, 4):
+                mask[max(y1, 0):max(y2, 0), max(x1, 0):max(x2, 0)] = 0
+        return mask
+
+    def _scale_matrix(self):
+        """Tam çözünürlük → kayıt ölçeği dönüşüm matrisi."""
+        return np.diag([self.registration_scale, self.registration_scale, 1.0])
+
+    def _detect_orb(self, gray, mask):
+        """ORB özelliklerini küçültülmüş karede ve maskeli bölgede çıkarır."""
+        if self.registration_scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.registration_scale, fy=self.registration_scale,
+                              interpolation=cv2.INTER_AREA)
+            mask = cv2.resize(mask, (gray.shape[1], gray.shape[0]), interpolation=cv2.INTER_NEAREST)
+        return self.orb.detectAndCompute(gray, mask)
+
+    def set_nfeatures(self, nfeatures):
+        """Yeniden kayıtta çıkarılacak en fazla ORB özellik sayısını değiştirir (referans korunur)."""
+        self.orb.setMaxFeatures(int(nfeatures))
+
+    def nfeatures(self):
+        """Geçerli ORB özellik sınırı."""
+        return self.orb.getMaxFeatures()
+
+    def feature_count(self):
+        """Referans karedeki ORB özellik sayısı."""
+        return len(self.reference_keypoints) if self.reference_keypoints is not None else 0
+
+    def _set_homography(self, homography):
+        """Homografiyi günceller ve poligonu önbelleğe alır."""
+        self.homography = homography
+        pts = np.float32(self.original_polygon).reshape(-1, 1, 2)
+        dst = cv2.perspectiveTransform(pts, homography)
+        self.cached_polygon = [(int(x), int(y)) for x, y in dst.reshape(-1, 2)]
+
+    def _small(self, gray):
+        """Hareket kontrolü için küçültülmüş kare."""
+        return cv2.resize(gray, (160, 90), interpolation=cv2.INTER_AREA)
+
+    def _remember_frame(self, gray, small=None):
+        """Bir sonraki karşılaştırma için kareyi kendi tamponlarına kopyalar (girdi tamponları paylaşımlıdır)."""
+        if small is None:
+            small = self._small(gray)
+        if self.prev_gray is None or self.prev_gray.shape != gray.shape:
+            self.prev_gray = gray.copy()
+            self.prev_small = small.copy()
+        else:
+            np.copyto(self.prev_gray, gray)
+            np.copyto(self.prev_small, small)
+
+    def _detect_flow_points(self, gray, mask=None):
+        """Optik akış için izlenecek köşe noktalarını (maskeli arka planda) bulur."""
+        return cv2.goodFeaturesToTrack(gray, maxCorners=300, qualityLevel=0.01, minDistance=8, mask=mask)
+
+    def _track_flow(self, gray):
+        """LK optik akış ile önceki kareden bu kareye homografi adımını tahmin eder."""
+        if self.flow_points is None or len(self.flow_points) < self.min_flow_points:
+            return None
+
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.flow_points, None)
+        status = status.reshape(-1).astype(bool)
+        prev_good = self.flow_points[status]
+        next_good = next_points[status]
+        if len(prev_good) < self.min_flow_points:
+            return None
+
+        step, mask = cv2.findHomography(prev_good, next_good, cv2.RANSAC, 3.0)
+        if step is None or mask is None:
+            return None
+
+        inliers = mask.reshape(-1).astype(bool)
+        # Düşük inlier oranı = sahnede çok hareketli nesne ya da kayma: yeniden kayıt gerekli
+        if inliers.mean() < self.min_inlier_ratio:
+            return None
+
+        self.flow_points = next_good[inliers].reshape(-1, 1, 2)
+        return step
+
+    def _register(self, gray, mask):
+        """Mevcut kareyi ORB ile referansa kaydeder (tam homografi hesabı)."""
+        current_keypoints, current_descriptors = self._detect_orb(gray, mask)
+        if current_descriptors is None or len(current_keypoints) < 10:
+            return None
+
+        matches = self.bf_matcher.match(self.reference_descriptors, current_descriptors)
+        matches = sorted(matches, key=lambda x: x.distance)
+
+        # En iyi %30 eşleşmeyi al (Gürültüyü azaltır)
+        keep_count = int(len(matches) * 0.3)
+        good_matches = matches[:max(keep_count, 10)]
+        if len(good_matches) < 10:
+            return None
+
+        src_pts = np.float32([self.reference_keypoints[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+        dst_pts = np.float32([current_keypoints[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+
+        M, _ = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0 * self.registration_scale)
+        if M is None:
+            return None
+
+        # Küçük ölçekte bulunan homografiyi tam çözünürlüğe taşı: S^-1 · M · S
+        scale = self._scale_matrix()
+        return np.linalg.inv(scale) @ M @ scale
+
+    def update(self, gray, person_boxes=None, small=None):
+        """Yeni kareye göre poligonu döndürür (gerekmedikçe önbellekteki sonucu kullanır)."""
+        if self.reference_descriptors is None:
+            return []
+
+        if small is None:
+            small = self._small(gray)
+        motion = float(cv2.absdiff(small, self.prev_small).mean())
+        self.frames_since_registration += 1
+
+        # 1. Sahne durağan: son homografi geçerli
+        if motion < self.static_threshold and self.frames_since_registration < self.reregister_interval:
+            self.stats["static"] += 1
+            return self.cached_polygon
+
+        # 2. Kareden kareye optik akış
+        step = None
+        if self.frames_since_registration < self.reregister_interval:
+            try:
+                step = self._track_flow(gray)
+            except cv2.error:
+                step = None
+
+        if step is not None:
+            self._set_homography(step @ self.homography)
+            self.stats["flow"] += 1
+        else:
+            # 3. Periyodik ya da kayma sonrası tam ORB kaydı
+            mask = self.build_static_mask(gray.shape, person_boxes, self.cached_polygon)
+            try:
+                M = self._register(gray, mask)
+            except cv2.error as e:
+                print(f"⚠️ Takip hatası: {e}")
+                M = None
+
+            if M is not None:
+                self._set_homography(M)
+                self.stats["register"] += 1
+            else:
+                self.stats["failed"] += 1
+            self.frames_since_registration = 0
+            self.flow_points = self._detect_flow_points(gray, mask)
+
+        # Akış noktaları azaldıysa yenile
+        if self.flow_points is None or len(self.flow_points) < self.min_flow_points:
+            mask = self.build_static_mask(gray.shape, person_boxes, self.cached_polygon)
+            self.flow_points = self._detect_flow_points(gray, mask)
+
+        self._remember_frame(gray, small)
+        return self.cached_polygon
@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+from guardian_processor import GuardianProcessor, process_batch
+from modules.object_detector import YoloDetector
+from modules.frame_source import open_frame_source
+from modules.metrics import MetricsRegistry
+
+class CameraStream:
+    """Bir video kaynağını arka planda okuyup sadece en güncel kareyi tutan sınıf."""
+
+    def __init__(self, frame_source, camera_id):
+        self.frame_source = frame_source
+        self.camera_id = camera_id
+
+        self.lock = threading.Lock()
+        self.latest_frame = None
+        self.latest_time = 0.0
+        self.frame_id = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.thread.start()
+
+    def _reader_loop(self):
+        """Kaynaktan sürekli okur, eski kareleri ezerek sadece sonuncuyu saklar."""
+        while self.running:
+            success, frame = self.frame_source.read()
+            if not success:
+                self.running = False
+                break
+
+            # Kaynak tamponları yeniden kullanır; işlenirken üzerine yazılmasın diye kopya devredilir
+            frame = frame.copy()
+            with self.lock:
+                self.latest_frame = frame
+                self.latest_time = time.perf_counter()
+                self.frame_id += 1
+
+    def read_latest(self):
+        """En güncel kareyi, kare numarasını ve yakalanma zamanını döndürür."""
+        with self.lock:
+            return self.frame_id, self.latest_frame, self.latest_time
+
+    def release(self):
+        """Okuma thread'ini durdurur ve kaynağı serbest bırakır."""
+        self.running = False
+        self.thread.join(timeout=1.0)
+        self.frame_source.release()
+
+
+class MultiStreamProcessor:
+    """Birden fazla kamerayı tek model ile batch halinde işleyen sınıf."""
+
+    def __init__(self, yolo_model_path, sources, frame_size=(854, 480), polygon_files=None,
+                 source_options=None, headless=False, metrics=None, detector_options=None,
+                 quality_controller=None):
+        # Model tek sefer yüklenir, tüm kameralar paylaşır
+        self.yolo_detector = YoloDetector(yolo_model_path, **(detector_options or {}))
+        self.metrics = metrics or MetricsRegistry()
+        self.quality_controller = quality_controller
+        self.streams = []
+        self.processors = []
+        self.polygons = []
+        self.last_frame_ids = []
+        self.tracking_attempted = []
+        self.latest_frames = {}  # kamera -> son işlenen ham kare (önizleme komutları ve isteğe bağlı çizim için)
+
+        for i, source in enumerate(sources):
+            camera_id = f"cam{i}"
+            frame_source = open_frame_source(source, frame_size, **(source_options or {}))
+            if not frame_source.isOpened():
+                raise RuntimeError(f"Video kaynağı açılamadı: {source}")
+            self.streams.append(CameraStream(frame_source, camera_id))
+            self.processors.append(GuardianProcessor(yolo_model_path,
+                                                     yolo_detector=self.yolo_detector,
+                                                     camera_id=camera_id,
+                                                     metrics=self.metrics))
+            if headless:
+                self.processors[-1].set_headless(True)
+            polygon_file = polygon_files[i] if polygon_files else None
+            self.polygons.append(self._load_polygon(polygon_file))
+            self.last_frame_ids.append(0)
+            self.tracking_attempted.append(False)
+
+        # İstatistikler
+        self.processed_frames = 0
+        self.start_time = time.time()
+
+    def _load_polygon(self, filename):
+        """Kameraya ait poligon dosyasını yükler (yoksa boş liste)."""
+        if filename and os.path.exists(filename):
+            with open(filename, 'r') as f:
+                return [tuple(p) for p in json.load(f)]
+        return []
+
+    def step(self):
+        """Her kameradan en güncel kareyi toplar, tek batch'te işler ve sonuçları döndürür."""
+        batch_indices = []
+        batch_frames = []
+        captured = {}
+
+        for i, stream in enumerate(self.streams):
+            frame_id, frame, captured_at = stream.read_latest()
+            # Yeni kare yoksa bu kamerayı atla (aynı kareyi iki kez işleme)
+            if frame is None or frame_id == self.last_frame_ids[i]:
+                continue
+            # Okuyucu thread'in ezdiği (hiç işlenmeyen) kareler
+            if frame_id - self.last_frame_ids[i] > 1:
+                self.metrics.increment(stream.camera_id, "frames_dropped_total",
+                                       frame_id - self.last_frame_ids[i] - 1)
+            self.last_frame_ids[i] = frame_id
+            batch_indices.append(i)
+            batch_frames.append(frame)
+            captured[i] = captured_at
+
+        if not batch_frames:
+            return []
+
+        processors = [self.processors[i] for i in batch_indices]
+        polygons = [self.polygons[i] for i in batch_indices]
+        # Kayıtlı poligon varsa ilk karede takibi otomatik başlat
+        for i, frame in zip(batch_indices, batch_frames):
+            if not self.tracking_attempted[i] and len(self.polygons[i]) >= 3:
+                self.processors[i].start_tracking(frame, self.polygons[i])
+                self.tracking_attempted[i] = True
+
+        results = process_batch(self.yolo_detector, processors, batch_frames, polygons, self.metrics)
+
+        outputs = []
+        for i, frame, processor, (annotated_frame, data) in zip(batch_indices, batch_frames, processors, results):
+            outputs.append((processor.camera_id, annotated_frame, data))
+            self.latest_frames[processor.camera_id] = frame
+            if self.quality_controller is not None:
+                self.quality_controller.observe(processor.camera_id, (time.perf_counter() - captured[i]) * 1000)
+
+        if self.quality_controller is not None:
+            self.quality_controller.update()
+        self.processed_frames += len(outputs)
+        return outputs
+
+    def is_running(self):
+        """En az bir kamera hâlâ kare üretiyor mu?"""
+        return any(stream.running for stream in self.streams)
+
+    def aggregate_fps(self):
+        """Tüm kameralar için toplam işlenen kare/saniye değerini döndürür."""
+        elapsed = time.time() - self.start_time
+        if elapsed <= 0:
+            return 0.0
+        return self.processed_frames / elapsed
+
+    def release(self):
+        """Tüm kamera kaynaklarını ve kanıt yazıcılarını kapatır."""
+        for stream in self.streams:
+            stream.release()
+        for processor in self.processors:
+            processor.close()
@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+
+class LatestFrameQueue:
+    """Sınırlı kuyruk: doluysa en eski kareyi atar, en yenisini koyar (latest-frame-wins)."""
+
+    def __init__(self, maxsize=1):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        """Kareyi kuyruğa koyar; yer yoksa bekleyen eski kareyi düşürür. Düşen öğe sayısını döndürür."""
+        dropped = 0
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                    dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Kuyruktan bir öğe alır, zaman aşımında None döndürür."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def depth(self):
+        """Kuyrukta bekleyen öğe sayısı."""
+        return self.queue.qsize()
+
+
+class StageStats:
+    """Bir aşamanın işlediği kare sayısını ve verimini (FPS) tutar."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.window_count = 0
+        self.window_start = time.time()
+        self.fps = 0.0
+
+    def tick(self):
+        """Aşamada bir kare işlendiğinde çağrılır."""
+        self.count += 1
+        self.window_count += 1
+        elapsed = time.time() - self.window_start
+        if elapsed >= 1.0:
+            self.fps = self.window_count / elapsed
+            self.window_count = 0
+            self.window_start = time.time()
+
+
+class FramePipeline:
+    """Yakalama, çıkarım ve çıktı aşamalarını thread'lere ayıran pipeline."""
+
+    def __init__(self, processor, frame_source, get_polygon, queue_size=1, quality_controller=None):
+        self.processor = processor
+        self.frame_source = frame_source
+        self.get_polygon = get_polygon
+        self.metrics = processor.metrics
+        self.quality_controller = quality_controller
+
+        # Aşamalar arası sınırlı kuyruklar
+        self.capture_queue = LatestFrameQueue(queue_size)
+        self.output_queue = LatestFrameQueue(queue_size)
+
+        # İşlemci hem çıkarım thread'inden hem ana thread'den (tuşlar) kullanılır
+        self.processor_lock = threading.Lock()
+
+        self.capture_stats = StageStats("capture")
+        self.inference_stats = StageStats("inference")
+        self.output_stats = StageStats("output")
+
+        self.running = False
+        self.threads = []
+
+    def start(self):
+        """Yakalama ve çıkarım thread'lerini başlatır."""
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._capture_loop, daemon=True),
+            threading.Thread(target=self._inference_loop, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Thread'leri durdurur ve kaynağı serbest bırakır."""
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.frame_source.release()
+
+    def _capture_loop(self):
+        """Kaynaktan (hedef boyutta) kare okur ve çıkarım kuyruğuna koyar."""
+        frame_count = 0
+        while self.running:
+            success, frame = self.frame_source.read()
+            if not success:
+                self.running = False
+                break
+
+            frame_count += 1
+            # Kaynak tamponları yeniden kullanır; çıkarım sürerken okuma devam ettiği için kopya devredilir
+            dropped = self.capture_queue.put((frame_count, frame.copy(), time.perf_counter()))
+            if dropped:
+                self.metrics.increment(self.processor.camera_id, "frames_dropped_total", dropped)
+            self.capture_stats.tick()
+
+    def _inference_loop(self):
+        """Kuyruktaki en güncel kareyi işler ve çıktı kuyruğuna koyar."""
+        while self.running:
+            item = self.capture_queue.get(timeout=0.1)
+            if item is None:
+                continue
+
+            frame_count, frame, captured_at = item
+            with self.processor_lock:
+                annotated_frame, data = self.processor.process_frame(frame, self.get_polygon())
+                if self.quality_controller is not None:
+                    # Kuyrukta bekleme dahil: yakalamadan sonuca kadar geçen süre
+                    self.quality_controller.observe(self.processor.camera_id,
+                                                    (time.perf_counter() - captured_at) * 1000)
+                    self.quality_controller.update()
+            dropped = self.output_queue.put((frame_count, frame, annotated_frame, data))
+            if dropped:
+                self.metrics.increment(self.processor.camera_id, "outputs_dropped_total", dropped)
+            self.inference_stats.tick()
+
+    def get_output(self, timeout=0.1):
+        """Ana thread için işlenmiş son kareyi döndürür (yoksa None)."""
+        item = self.output_queue.get(timeout=timeout)
+        if item is not None:
+            self.output_stats.tick()
+        return item
+
+    def report(self):
+        """Aşama verimlerini ve kuyruk derinliklerini tek satırlık metin olarak döndürür."""
+        return (f"capture {self.capture_stats.fps:.1f} fps | "
+                f"inference {self.inference_stats.fps:.1f} fps "
+                f"(kuyruk {self.capture_queue.depth()}, düşen {self.capture_queue.dropped}) | "
+                f"output {self.output_stats.fps:.1f} fps "
+                f"(kuyruk {self.output_queue.depth()}, düşen {self.output_queue.dropped})")
@@ -0,0 +1,447 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from modules.frame_source import open_frame_source
+
+class SharedFrameRing:
+    """`multiprocessing.shared_memory` üzerinde sabit boyutlu kare halkası (tek yazar, çok okur).
+
+    Başlık tek bir int64 yazma sayacıdır; yazar kareyi slota kopyaladıktan
+    sonra sayacı artırır. Okuyucu en son kareyi kendi tamponuna kopyalar ve
+    kopyalama sırasında slotun ezilmediğini sayaçla doğrular (seqlock).
+    """
+
+    HEADER_BYTES = 64
+
+    def __init__(self, frame_shape, slots=4, name=None, create=False):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.frame_shape))
+        size = self.HEADER_BYTES + frame_bytes * slots
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self.shm.name
+        self.counter = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8,
+                                 buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        if create:
+            self.counter[0] = 0
+
+    def write(self, frame):
+        """Kareyi sıradaki slota yazar ve yayınlar."""
+        seq = int(self.counter[0])
+        np.copyto(self.frames[seq % self.slots], frame)
+        self.counter[0] = seq + 1
+
+    def read_latest(self, out, last_seq=0):
+        """Yeni kare varsa `out` içine kopyalayıp sıra numarasını döndürür, yoksa None."""
+        for _ in range(3):
+            seq = int(self.counter[0])
+            if seq == 0 or seq == last_seq:
+                return None
+            np.copyto(out, self.frames[(seq - 1) % self.slots])
+            # Kopyalama sırasında yazar bu slota geri döndüyse tekrar dene
+            if int(self.counter[0]) - seq <= self.slots - 2:
+                return seq
+        return None
+
+    def close(self):
+        """Bu süreçteki eşlemeyi kapatır."""
+        self.counter = None
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self):
+        """Paylaşımlı belleği sistemden siler (sadece oluşturan süreç çağırır)."""
+        self.shm.unlink()
+
+
+class CaptureThread:
+    """Bir kaynağı okuyup karelerini paylaşımlı halkaya yazan thread; decoder çökerse kaynağı yeniden açar."""
+
+    def __init__(self, source, ring, frame_size, source_options=None, restart_delay=2.0):
+        self.source = source
+        self.ring = ring
+        self.frame_size = frame_size
+        self.source_options = source_options or {}
+        self.restart_delay = restart_delay
+        self.running = True
+        self.restarts = 0
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        while self.running:
+            frame_source = None
+            try:
+                frame_source = open_frame_source(self.source, self.frame_size, **self.source_options)
+                if not frame_source.isOpened():
+                    raise RuntimeError("kaynak açılamadı")
+                while self.running:
+                    success, frame = frame_source.read()
+                    if not success:
+                        # Dosya sonu (döngü kapalı) veya kamera durdu
+                        self.running = False
+                        break
+                    self.ring.write(frame)
+            except Exception as e:
+                if not self.running:
+                    break
+                self.restarts += 1
+                print(f"⚠️ Decoder hatası ({self.source}): {e}. {self.restart_delay:.0f} sn sonra yeniden açılıyor.")
+                time.sleep(self.restart_delay)
+            finally:
+                if frame_source is not None:
+                    frame_source.release()
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=2.0)
+
+
+# Paylaşımlı düşen sayaçlarının indeksleri
+DROPPED_EVENTS = 0
+DROPPED_FRAMES = 1
+
+
+def _count_dropped(dropped, index):
+    with dropped.get_lock():
+        dropped[index] += 1
+
+
+class _QueuePublisher:
+    """İşçideki geçiş olaylarını denetçinin olay kuyruğuna iletir (EventDispatcher arayüzü).
+
+    Geçiş/ihlal olayları kare özetlerinden ayrı kuyruktadır; özetler onları
+    dışarı itemez. Kuyruk yine de dolarsa olay düşürülür ve sayılır.
+    """
+
+    def __init__(self, event_queue, dropped):
+        self.event_queue = event_queue
+        self.dropped = dropped
+
+    def publish(self, event):
+        try:
+            self.event_queue.put_nowait(event)
+        except queue.Full:
+            _count_dropped(self.dropped, DROPPED_EVENTS)
+
+
+def _summarize(camera_id, seq, data):
+    """Ham sonuç verisinden süreçler arası gönderilecek küçük olay sözlüğü üretir."""
+    return {
+        "type": "frame",
+        "camera_id": camera_id,
+        "frame_seq": seq,
+        "timestamp": time.time(),
+        "risk_level": data["risk_level"],
+        "alert_message": data["alert_message"],
+        "persons": len(data["persons"]),
+        # Kişiler dict listesi yerine yapılandırılmış dizi olarak gönderilir (FrameRecord)
+        "record": data["record"],
+    }
+
+
+def _worker_main(worker_index, shard, yolo_model_path, frame_shape, detector_options, headless,
+                 configure, event_queue, frame_queue, dropped, stop_event, heartbeat, ready,
+                 quality_options=None):
+    """İşçi süreç: kendi kamera grubunu tek model ile batch halinde işler."""
+    from guardian_processor import GuardianProcessor, process_batch
+    from modules.object_detector import YoloDetector
+    from modules.quality_controller import QualityController
+
+    detector = YoloDetector(yolo_model_path, **(detector_options or {}))
+    heartbeat.value = time.time()
+    publisher = _QueuePublisher(event_queue, dropped)
+    # Her işçi kendi kamera grubunun kalitesini yönetir
+    controller = QualityController(**quality_options) if quality_options is not None else None
+    cameras = []
+    for camera in shard:
+        processor = GuardianProcessor(yolo_model_path, yolo_detector=detector, camera_id=camera["camera_id"])
+        if configure is not None:
+            configure(processor)  # Isınma dahil: kamera başına kalp atışı yenilenir
+        heartbeat.value = time.time()
+        processor.set_headless(headless)
+        processor.set_event_dispatcher(publisher)
+        processor.set_compact_records(True)  # Kare özeti kişileri FrameRecord olarak taşır
+        if controller is not None:
+            controller.register(processor)
+        cameras.append({
+            "camera_id": camera["camera_id"],
+            "processor": processor,
+            "input": SharedFrameRing(frame_shape, camera["slots"], name=camera["input_ring"]),
+            "output": None if headless else SharedFrameRing(frame_shape, camera["slots"], name=camera["output_ring"]),
+            "polygon": camera["polygon"],
+            # İki tampon dönüşümlü kullanılır: FrameBuffers aynı nesneyi aynı kare sayar
+            "buffers": [np.empty(frame_shape, dtype=np.uint8) for _ in range(2)],
+            "frame": None,
+            "read_at": 0.0,
+            "last_seq": 0,
+            "tracking_attempted": False,
+        })
+    print(f"👷 İşçi {worker_index} hazır: {[c['camera_id'] for c in cameras]}")
+    ready.value = 1
+
+    try:
+        while not stop_event.is_set():
+            heartbeat.value = time.time()
+            batch_items = []
+            for camera in cameras:
+                # Son işlenen karenin olmadığı tampona oku
+                buffer = camera["buffers"][1] if camera["frame"] is camera["buffers"][0] else camera["buffers"][0]
+                seq = camera["input"].read_latest(buffer, camera["last_seq"])
+                if seq is not None:
+                    camera["last_seq"] = seq
+                    camera["frame"] = buffer
+                    camera["read_at"] = time.perf_counter()
+                    batch_items.append(camera)
+            if not batch_items:
+                time.sleep(0.002)
+                continue
+
+            for camera in batch_items:
+                if not camera["tracking_attempted"] and len(camera["polygon"]) >= 3:
+                    camera["processor"].start_tracking(camera["frame"], camera["polygon"])
+                    camera["tracking_attempted"] = True
+
+            results = process_batch(detector, [c["processor"] for c in batch_items],
+                                    [c["frame"] for c in batch_items], [c["polygon"] for c in batch_items])
+            for camera, (annotated_frame, data) in zip(batch_items, results):
+                if camera["output"] is not None:
+                    camera["output"].write(annotated_frame)
+                try:
+                    frame_queue.put_nowait(_summarize(camera["camera_id"], camera["last_seq"], data))
+                except queue.Full:
+                    _count_dropped(dropped, DROPPED_FRAMES)
+                if controller is not None:
+                    controller.observe(camera["camera_id"], (time.perf_counter() - camera["read_at"]) * 1000)
+            if controller is not None:
+                controller.update()
+    finally:
+        for camera in cameras:
+            camera["processor"].close()
+            camera["input"].close()
+            if camera["output"] is not None:
+                camera["output"].close()
+
+
+class ShardedSupervisor:
+    """Kameraları işçi süreçlere bölen, kareleri paylaşımlı bellekle aktaran ve işçileri izleyen denetçi.
+
+    Kareler ana süreçte decode edilip kamera başına halkaya yazılır; her işçi
+    kendi kamera grubu için GuardianProcessor çalıştırır; kare özetleri
+    ("frame") ve geçiş olayları ayrı kuyruklarda toplanır, olaylar önceliklidir. Çöken veya kilitlenen işçi otomatik yeniden başlatılır.
+    """
+
+    def __init__(self, yolo_model_path, sources, frame_size=(854, 480), workers=None, polygon_files=None,
+                 source_options=None, detector_options=None, headless=False, configure=None,
+                 slots=4, heartbeat_timeout=30.0, event_queue_size=10000, frame_queue_size=1000,
+                 quality_options=None, startup_timeout=300.0, restart_delay=1.0, max_restart_delay=60.0,
+                 max_restarts=5, stable_seconds=60.0):
+        self.yolo_model_path = yolo_model_path
+        self.frame_shape = (frame_size[1], frame_size[0], 3)
+        self.detector_options = detector_options
+        self.headless = headless
+        self.configure = configure
+        self.quality_options = quality_options  # QualityController argümanları, None = kapalı
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_timeout = startup_timeout      # Model yükleme/ONNX dönüşümü/ısınma için süre
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_restarts = max_restarts            # Art arda bu kadar başarısız başlatmadan sonra vazgeç
+        self.stable_seconds = stable_seconds        # Bu kadar çalışan işçinin hata sayacı sıfırlanır
+        self.context = multiprocessing.get_context("spawn")
+        # Geçiş/ihlal olayları ve kare özetleri ayrı kuyruklarda (özetler olayları dışarı itmesin)
+        self.event_queue = self.context.Queue(event_queue_size)
+        self.frame_queue = self.context.Queue(frame_queue_size)
+        self.dropped = self.context.Array('q', 2)  # [düşen olay, düşen kare özeti]
+        self.stop_event = self.context.Event()
+
+        self.cameras = []
+        self.input_rings = []
+        self.output_rings = []
+        self.captures = []
+        for i, source in enumerate(sources):
+            input_ring = SharedFrameRing(self.frame_shape, slots, create=True)
+            output_ring = None if headless else SharedFrameRing(self.frame_shape, slots, create=True)
+            self.input_rings.append(input_ring)
+            self.output_rings.append(output_ring)
+            polygon_file = polygon_files[i] if polygon_files else None
+            self.cameras.append({
+                "camera_id": f"cam{i}",
+                "input_ring": input_ring.name,
+                "output_ring": None if output_ring is None else output_ring.name,
+                "polygon": self._load_polygon(polygon_file),
+                "slots": slots,
+            })
+            self.captures.append(CaptureThread(source, input_ring, frame_size, source_options))
+
+        # Kameralar işçilere sırayla dağıtılır
+        worker_count = max(1, min(workers or os.cpu_count() or 1, len(self.cameras)))
+        self.shards = [self.cameras[i::worker_count] for i in range(worker_count)]
+        self.processes = [None] * worker_count
+        self.heartbeats = [self.context.Value('d', 0.0) for _ in range(worker_count)]
+        self.ready = [self.context.Value('b', 0) for _ in range(worker_count)]
+        self.started_at = [0.0] * worker_count
+        self.restarts = [0] * worker_count
+        self.failures = [0] * worker_count          # Art arda başarısız başlatma sayısı
+        self.next_restart = [0.0] * worker_count
+        self.given_up = [False] * worker_count
+        # ONNX dönüşümü işçilerden önce bir kez yapılır (aynı .onnx dosyasına eşzamanlı yazılmasın)
+        self._prepare_model()
+        for index in range(worker_count):
+            self._start_worker(index)
+
+        self.display_buffers = [np.empty(self.frame_shape, dtype=np.uint8) for _ in self.cameras]
+        self.display_seqs = [0] * len(self.cameras)
+        self.processed_events = 0
+        self.start_time = time.time()
+
+    def _load_polygon(self, filename):
+        """Kameraya ait poligon dosyasını yükler (yoksa boş liste)."""
+        if filename and os.path.exists(filename):
+            with open(filename, 'r') as f:
+                return [tuple(p) for p in json.load(f)]
+        return []
+
+    def _prepare_model(self):
+        options = self.detector_options or {}
+        if options.get("backend", "torch") == "torch" or self.yolo_model_path.endswith(".onnx"):
+            return
+        from modules.object_detector import export_onnx
+
+        try:
+            export_onnx(self.yolo_model_path, options.get("imgsz", 640), options.get("int8", False))
+        except Exception as e:
+            print(f"⚠️ ONNX dönüşümü başarısız: {e}")
+
+    def _start_worker(self, index):
+        """İşçi sürecini (yeniden) başlatır."""
+        self.heartbeats[index].value = time.time()
+        self.ready[index].value = 0
+        self.started_at[index] = time.time()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(index, self.shards[index], self.yolo_model_path, self.frame_shape, self.detector_options,
+                  self.headless, self.configure, self.event_queue, self.frame_queue, self.dropped,
+                  self.stop_event, self.heartbeats[index], self.ready[index],
+                  self.quality_options),
+            daemon=True)
+        process.start()
+        self.processes[index] = process
+
+    def monitor(self):
+        """Ölen veya kalp atışı kesilen işçileri artan beklemeyle yeniden başlatır.
+
+        Açılışta (model yükleme, ONNX dönüşümü, ısınma) kalp atışı yerine
+        `startup_timeout` uygulanır. Art arda `max_restarts` başarısız
+        başlatmadan sonra işçiden vazgeçilir.
+        """
+        if self.stop_event.is_set():
+            return
+        now = time.time()
+        for index, process in enumerate(self.processes):
+            if self.given_up[index]:
+                continue
+            ready = bool(self.ready[index].value)
+            if ready and self.failures[index] and now - self.started_at[index] > self.stable_seconds:
+                self.failures[index] = 0
+            if ready:
+                hung = now - self.heartbeats[index].value > self.heartbeat_timeout
+            else:
+                hung = now - self.heartbeats[index].value > self.startup_timeout
+            if process.is_alive() and not hung:
+                continue
+
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=2.0)
+            if self.next_restart[index] == 0.0:
+                # Çöküş yeni fark edildi: bekleme süresi belirlenir
+                self.failures[index] += 1
+                reason = "yanıt vermiyor" if hung else f"çıkış kodu {process.exitcode}"
+                if self.failures[index] > self.max_restarts:
+                    self.given_up[index] = True
+                    print(f"❌ İşçi {index} art arda {self.max_restarts} kez başlatılamadı ({reason}), "
+                          f"kameraları durduruldu: {[c['camera_id'] for c in self.shards[index]]}")
+                    continue
+                delay = min(self.restart_delay * 2 ** (self.failures[index] - 1), self.max_restart_delay)
+                self.next_restart[index] = now + delay
+                print(f"⚠️ İşçi {index} {delay:.0f} sn sonra yeniden başlatılacak ({reason}, "
+                      f"{self.failures[index]}/{self.max_restarts})")
+            if now < self.next_restart[index]:
+                continue
+            self.next_restart[index] = 0.0
+            self.restarts[index] += 1
+            self._start_worker(index)
+
+    @staticmethod
+    def _drain(source, events, max_events):
+        try:
+            while len(events) < max_events:
+                events.append(source.get_nowait())
+        except queue.Empty:
+            pass
+
+    def events(self, timeout=0.1, max_events=256):
+        """Tüm işçilerden gelen olayları toplu olarak döndürür (birleşik olay akışı).
+
+        Geçiş/ihlal olayları önce alınır, kalan yere kare özetleri ("frame") eklenir.
+        """
+        events = []
+        self._drain(self.event_queue, events, max_events)
+        self._drain(self.frame_queue, events, max_events)
+        if not events:
+            try:
+                events.append(self.frame_queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            self._drain(self.event_queue, events, max_events)
+        self.processed_events += sum(1 for event in events if event["type"] == "frame")
+        return events
+
+    def dropped_counts(self):
+        """Kuyruk dolduğu için düşürülen geçiş olayı ve kare özeti sayıları."""
+        with self.dropped.get_lock():
+            return {"events": int(self.dropped[DROPPED_EVENTS]), "frames": int(self.dropped[DROPPED_FRAMES])}
+
+    def latest_annotated(self, index):
+        """Kameranın işçide çizilmiş son karesini döndürür (yeni kare yoksa None)."""
+        ring = self.output_rings[index]
+        if ring is None:
+            return None
+        seq = ring.read_latest(self.display_buffers[index], self.display_seqs[index])
+        if seq is None:
+            return None
+        self.display_seqs[index] = seq
+        return self.display_buffers[index]
+
+    def is_running(self):
+        """En az bir kaynak hâlâ kare üretiyor ve en az bir işçi hâlâ deneniyor mu?"""
+        return (any(capture.running for capture in self.captures) and
+                not all(self.given_up))
+
+    def aggregate_fps(self):
+        """Tüm kameralar için toplam işlenen kare/saniye değerini döndürür."""
+        elapsed = time.time() - self.start_time
+        return self.processed_events / elapsed if elapsed > 0 else 0.0
+
+    def release(self):
+        """İşçileri durdurur, kaynakları kapatır ve paylaşımlı belleği siler."""
+        self.stop_event.set()
+        for capture in self.captures:
+            capture.stop()
+        for process in self.processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.input_rings + self.output_rings:
+            if ring is not None:
+                ring.close()
+                ring.unlink()
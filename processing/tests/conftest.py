@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modüller `processing` klasöründen (`from modules...`) içe aktarılır
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+"""Sahte dedektörle kısa ölçümlerin uçtan uca çalıştığını ve depodaki referans bütçesini aşmadığını doğrular."""
+import json
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+import benchmark
+
+
+def test_process_frame_smoke(tmp_path):
+    output = tmp_path / "bench.json"
+    code = benchmark.main(["--stages", "process_frame", "--frames", "20", "--warmup", "2",
+                           "--no-isolate", "--output", str(output)])
+    assert code == 0
+
+    report = json.loads(output.read_text())
+    result = report["stages"]["process_frame"]
+    assert result["frames"] == 18
+    assert result["throughput_fps"] > 0
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_process_frame_headless_with_detection_interval(tmp_path):
+    output = tmp_path / "bench.json"
+    code = benchmark.main(["--stages", "process_frame", "--frames", "12", "--warmup", "2", "--headless",
+                           "--detection-interval", "3", "--no-isolate", "--output", str(output)])
+    assert code == 0
+    assert json.loads(output.read_text())["stages"]["process_frame"]["frames"] == 10
+
+
+def test_zone_cropping_and_batch_stages(tmp_path):
+    output = tmp_path / "bench.json"
+    code = benchmark.main(["--stages", "process_frame", "batch", "--frames", "12", "--warmup", "2",
+                           "--zone-cropping", "--cameras", "3", "--no-isolate", "--output", str(output)])
+    assert code == 0
+    stages = json.loads(output.read_text())["stages"]
+    assert stages["process_frame"]["frames"] == 10
+    assert stages["batch"]["frames"] == 10
+
+
+def test_stub_run_within_committed_baseline():
+    # Referans cömert bir bütçedir: sadece belirgin gerilemeler testi düşürür
+    baseline = os.path.join(os.path.dirname(benchmark.__file__), "benchmark_baseline.json")
+    code = benchmark.main(["--frames", "60", "--warmup", "10", "--no-isolate", "--baseline", baseline])
+    assert code == 0
@@ -0,0 +1,122 @@
+"""Vektörleştirilmiş KKD atamasının eski iç içe döngüyle aynı sonucu verdiğini doğrular."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from modules.ppe_assignment import assign_ppe
+
+PERSON, HARDHAT, VEST = 5, 0, 7
+
+
+def reference_assignment(detections):
+    """Eski `_match_ppe_to_person` iç içe döngüsü (sadece kutu/sınıf/güven girdisiyle).
+
+    Bir KKD'ye eşit uzaklıkta iki kişi düşüyorsa sahne belirsizdir: seçim
+    float hassasiyetine bağlı olduğundan None döner.
+    """
+    persons = []
+    ppe_items = []
+    for box, cls_id, conf in detections:
+        x1, y1, x2, y2 = box
+        if cls_id == PERSON:
+            persons.append({'box': box, 'has_helmet': False, 'has_vest': False,
+                            'helmet_conf': 0.0, 'vest_conf': 0.0})
+        elif cls_id in (HARDHAT, VEST):
+            ppe_items.append({'type': cls_id, 'center': ((x1 + x2) // 2, (y1 + y2) // 2), 'conf': conf})
+
+    for ppe in ppe_items:
+        ppx, ppy = ppe['center']
+        distances = []
+        for person in persons:
+            px1, py1, px2, py2 = person['box']
+            person_width = px2 - px1
+            person_height = py2 - py1
+            search_area = (px1 - person_width * 1.2, py1 - person_height * 0.7,
+                           px2 + person_width * 1.2, py2 + person_height * 0.3)
+            if search_area[0] <= ppx <= search_area[2] and search_area[1] <= ppy <= search_area[3]:
+                distance = ((ppx - (px1 + px2) / 2) ** 2 + (ppy - (py1 + py2) / 2) ** 2) ** 0.5
+                distances.append((distance, len(distances), person))
+            else:
+                distances.append((float('inf'), len(distances), person))
+
+        candidates = sorted(d for d in distances if d[0] != float('inf'))
+        if not candidates:
+            continue
+        if len(candidates) > 1 and candidates[1][0] - candidates[0][0] < 1e-3:
+            return None
+        closest_person = candidates[0][2]
+
+        if ppe['type'] == HARDHAT:
+            person_mid_y = (closest_person['box'][1] + closest_person['box'][3]) / 2
+            if ppy < person_mid_y and ppe['conf'] > closest_person['helmet_conf']:
+                closest_person['has_helmet'] = True
+                closest_person['helmet_conf'] = ppe['conf']
+        elif ppe['conf'] > closest_person['vest_conf']:
+            closest_person['has_vest'] = True
+            closest_person['vest_conf'] = ppe['conf']
+    return persons
+
+
+def random_scene(rng, frame_size=(854, 480)):
+    """Rastgele kişi ve KKD kutuları.
+
+    Genişlik 5k+2, yükseklik 10k+3 seçilir: arama alanı sınırları tam sayı
+    olmaz, tam sayı KKD merkezleri float32/float64 farkıyla sınırda kalmaz.
+    """
+    width, height = frame_size
+    detections = []
+    for _ in range(rng.randint(0, 6)):
+        w, h = 5 * rng.randint(4, 20) + 2, 10 * rng.randint(6, 20) + 3
+        x1, y1 = rng.randint(0, width - w), rng.randint(0, height - h)
+        detections.append(((x1, y1, x1 + w, y1 + h), PERSON, 0.9))
+    for _ in range(rng.randint(0, 10)):
+        cls_id = rng.choice((HARDHAT, VEST))
+        w, h = rng.randint(8, 40), rng.randint(8, 40)
+        x1, y1 = rng.randint(0, width - w), rng.randint(0, height - h)
+        conf = float(np.float32(rng.randint(5, 99) / 100))
+        detections.append(((x1, y1, x1 + w, y1 + h), cls_id, conf))
+    rng.shuffle(detections)
+    return detections
+
+
+def test_assign_ppe_matches_nested_loop():
+    rng = random.Random(0)
+    compared = 0
+    for _ in range(500):
+        detections = random_scene(rng)
+        expected = reference_assignment(detections)
+        if expected is None:
+            continue
+
+        xyxy = np.array([d[0] for d in detections], dtype=np.float32).reshape(-1, 4)
+        cls = np.array([d[1] for d in detections], dtype=np.float32)
+        conf = np.array([d[2] for d in detections], dtype=np.float32)
+        table = assign_ppe(xyxy, cls, conf, PERSON, HARDHAT, VEST)
+
+        assert len(table) == len(expected)
+        for i, person in enumerate(expected):
+            assert tuple(int(v) for v in table.boxes[i]) == person['box']
+            assert bool(table.has_helmet[i]) == person['has_helmet']
+            assert bool(table.has_vest[i]) == person['has_vest']
+            assert float(table.helmet_conf[i]) == pytest.approx(person['helmet_conf'])
+            assert float(table.vest_conf[i]) == pytest.approx(person['vest_conf'])
+        compared += 1
+
+    # Belirsiz (eşit uzaklık) sahneler nadir olmalı
+    assert compared > 450
+
+
+def test_assign_ppe_keeps_highest_confidence_box():
+    xyxy = np.array([[100, 100, 160, 300],    # kişi
+                     [115, 90, 145, 120],     # baret, düşük güven
+                     [120, 95, 150, 125]],    # baret, yüksek güven
+                    dtype=np.float32)
+    cls = np.array([PERSON, HARDHAT, HARDHAT])
+    conf = np.array([0.9, 0.4, 0.8], dtype=np.float32)
+    table = assign_ppe(xyxy, cls, conf, PERSON, HARDHAT, VEST)
+    assert table.helmet_conf[0] == pytest.approx(0.8)
+    assert tuple(table.helmet_boxes[0]) == (120, 95, 150, 125)
+    assert not table.has_vest[0]